@@ -1,11 +1,13 @@
 #!/usr/bin/env python3
 
+import warnings
 import pandas as pd
 import xarray
 
 from .Config import Configuration
 from .Domain import Domain
 from .ModelTime import ModelTime
+from .ForcingStore import PointForcingStore
 # from .Weather import Temperature, Precipitation, ET0
 
 # FIXME implement BMI
@@ -17,6 +19,7 @@ class AquaCrop:
         self.config = Configuration(configfile)
         self.set_domain()
         self.set_time()
+        self.set_forcing_store()
 
     def set_domain(self):
         model_grid = self.config.MODEL_GRID
@@ -51,6 +54,21 @@ class AquaCrop:
         timedelta = pd.Timedelta(1, unit='D')
         self.time = ModelTime(starttime, endtime, timedelta)
 
+    def set_forcing_store(self):
+        self.forcing_store = None
+        path = self.config.FORCING_STORE.path
+        if path is None or not PointForcingStore.exists(path):
+            return
+        store = PointForcingStore.open(path)
+        if store.is_compatible(self.domain.xy, self.time.values, self.config.dtype):
+            self.forcing_store = store
+        else:
+            warnings.warn(
+                'Forcing store at ' + path + ' does not match the model '
+                'domain, time and dtype, so it will be ignored. Run '
+                '`pyaquacrop prepare` to rebuild it.'
+            )
+
     def initial(self):
         pass
         # self.eto = ET0(self)
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+
+import os
+import stat
+import time
+import shutil
+import hashlib
+import numpy as np
+
+from .constants import AQUACROP_VERSION
+
+
+def write_file_atomic(filename, contents):
+    """Write ``contents`` (bytes) to ``filename`` through a temporary
+    file which then replaces it.
+
+    The file is never modified in place, so that a previous version
+    which is hard-linked elsewhere (e.g. into an ``InputFileCache``)
+    is left untouched. It is created with the permissions of files
+    created with ``open()``, i.e. subject to the process umask.
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    tmpname = os.path.join(directory, '.tmp' + os.urandom(8).hex())
+    fd = os.open(tmpname, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(contents)
+        os.replace(tmpname, filename)
+    except BaseException:
+        if os.path.exists(tmpname):
+            os.remove(tmpname)
+        raise
+    return None
+
+
+class InputFileCache:
+    def __init__(self, directory, max_size=None):
+        """Content-addressed cache of generated AquaCrop input files.
+
+        Entries are keyed by a hash of the data written to the file
+        and the parameters used to render it. On a hit the cached
+        file is hard-linked (or copied, if linking is not possible)
+        to its destination instead of being rendered again. Entries
+        are made read-only, so that a destination sharing an entry
+        cannot be edited in place; files are instead replaced, e.g.
+        with ``write_file_atomic``. When the cache grows beyond
+        ``max_size`` the least recently used entries are removed.
+
+        Parameters
+        ----------
+        directory: str
+            Cache directory, which is created if it does not exist.
+        max_size: int, optional
+            Maximum total size of the cache in bytes. If None the
+            cache is not limited.
+        """
+        self.directory = directory
+        self.max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(*parts):
+        """Hash the given parts, which may be strings, bytes or numpy
+        arrays, together with the AquaCrop version.
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(AQUACROP_VERSION.encode())
+        for part in parts:
+            if isinstance(part, np.ndarray):
+                digest.update(str(part.dtype).encode())
+                digest.update(str(part.shape).encode())
+                part = np.ascontiguousarray(part).tobytes()
+            elif isinstance(part, str):
+                part = part.encode()
+            digest.update(len(part).to_bytes(8, 'little'))
+            digest.update(part)
+        return digest.hexdigest()
+
+    def _entry(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    @staticmethod
+    def _touch(entry):
+        # Record use in the access time only: cached files are shared
+        # with their destinations, whose mtime must not change
+        st = os.stat(entry)
+        os.utime(entry, ns=(time.time_ns(), st.st_mtime_ns))
+
+    def fetch(self, key, filename):
+        """Place the cached file for ``key`` at ``filename``.
+
+        Returns True on a hit and False on a miss. If ``filename``
+        is already the cached file it is not touched.
+        """
+        entry = self._entry(key)
+        try:
+            if os.path.exists(filename) and os.path.samefile(entry, filename):
+                self._touch(entry)
+                return True
+            tmpname = filename + '.tmp' + key[:8]
+            try:
+                os.link(entry, tmpname)
+            except OSError:
+                shutil.copyfile(entry, tmpname)
+            os.replace(tmpname, filename)
+            self._touch(entry)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def store(self, key, filename):
+        """Add ``filename`` to the cache under ``key``."""
+        entry = self._entry(key)
+        if os.path.exists(entry):
+            # Share the existing entry rather than keeping a duplicate
+            self.fetch(key, filename)
+            return None
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        tmpname = entry + '.tmp' + str(os.getpid())
+        try:
+            os.link(filename, tmpname)
+        except OSError:
+            shutil.copyfile(filename, tmpname)
+        mode = stat.S_IMODE(os.stat(tmpname).st_mode)
+        os.chmod(tmpname, mode & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+        os.replace(tmpname, entry)
+        self._touch(entry)
+        return None
+
+    def _entries(self):
+        for subdir in os.scandir(self.directory):
+            if not subdir.is_dir():
+                continue
+            for entry in os.scandir(subdir.path):
+                if '.tmp' not in entry.name:
+                    yield entry
+
+    @property
+    def size(self):
+        """int: Total size of the cache in bytes."""
+        return sum(entry.stat().st_size for entry in self._entries())
+
+    def evict(self):
+        """Remove least recently used entries until the cache is no
+        larger than ``max_size``.
+        """
+        if self.max_size is None:
+            return None
+        entries = [(entry.stat(), entry.path) for entry in self._entries()]
+        total = sum(st.st_size for st, _ in entries)
+        for st, path in sorted(entries, key=lambda x: x[0].st_atime):
+            if total <= self.max_size:
+                break
+            os.remove(path)
+            total -= st.st_size
+        return None
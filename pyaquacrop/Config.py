@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 import os
+import numpy as np
 import pandas as pd
 import re
 import tomli
@@ -12,6 +13,8 @@ import logging
 from dataclasses import dataclass
 from typing import Any
 
+from .constants import methods, steps_per_day
+
 logger = logging.getLogger(__name__)
 
 # VALID_NONE_VALUES = ['None', 'NONE', 'none', '']
@@ -49,12 +52,34 @@ class WeatherConfig:
     xy_dimname: str = None
     factor: float = 1.
     offset: float = 0.
+    interval: str = 'daily'
+    aggregation: str = None
+    regrid: str = 'nearest'
+    time_column: str = 'time'
 
 
 @dataclass
 class ET0Config(WeatherConfig):
     preprocess: bool = False
     method: str = None
+    stream: bool = False
+    time_block_size: int = None
+    memory_budget: int = None
+
+
+@dataclass
+class ForcingStoreConfig:
+    path: str = None
+
+
+@dataclass
+class PrecisionConfig:
+    dtype: str = 'float64'
+
+
+@dataclass
+class CacheConfig:
+    path: str = None
 
 
 def _key_error_message(section, entry):
@@ -103,11 +128,56 @@ def _parse_weather_data(config, section):
         'is_1d': is_1d,
         'xy_dimname': xy_dimname
     }
+    parsed_entries.update(_parse_interval(config, section))
+    parsed_entries['regrid'] = _parse_regrid(config, section)
     # Handle other entries that may be present (e.g. factor, offset)
     existing_entries = {k: v for k, v in config[section].items() if k not in parsed_entries.keys()}
     return {**parsed_entries, **existing_entries}
 
 
+# How sub-daily values are reduced to daily values if the
+# `aggregation` entry is not given
+_default_aggregation = {
+    'TMIN': 'min',
+    'TMAX': 'max',
+    'PREC': 'total',
+    'SWDOWN': 'total',
+    'ET0': 'total'
+}
+
+
+def _parse_interval(config, section):
+    interval = str(config[section].get('interval', 'daily'))
+    if interval not in steps_per_day:
+        raise ValueError(
+            f'`interval` in section `{section}` must be one of '
+            f'{", ".join(steps_per_day)}, got `{interval}`'
+        )
+    aggregation = config[section].get('aggregation', None)
+    if aggregation is None:
+        aggregation = _default_aggregation.get(section, 'mean')
+    aggregation = str(aggregation)
+    if aggregation not in methods:
+        raise ValueError(
+            f'`aggregation` in section `{section}` must be one of '
+            f'{", ".join(methods)}, got `{aggregation}`'
+        )
+    return {'interval': interval, 'aggregation': aggregation}
+
+
+valid_regrid_methods = ['nearest', 'bilinear']
+
+
+def _parse_regrid(config, section):
+    regrid = str(config[section].get('regrid', 'nearest'))
+    if regrid not in valid_regrid_methods:
+        raise ValueError(
+            f'`regrid` in section `{section}` must be one of '
+            f'{", ".join(valid_regrid_methods)}, got `{regrid}`'
+        )
+    return regrid
+
+
 def _parse_model_grid(config):
     model_grid = config['MODEL_GRID']
     use_file = True
@@ -142,7 +212,24 @@ def _parse_model_time(config):
     return config
 
 
-valid_et_methods = ['Hargreaves', 'PenmanMonteith']
+valid_et_methods = ['Hargreaves', 'PenmanMonteith', 'PriestleyTaylor']
+
+_memory_units = {
+    '': 1, 'B': 1,
+    'KB': 10 ** 3, 'MB': 10 ** 6, 'GB': 10 ** 9, 'TB': 10 ** 12,
+    'KIB': 2 ** 10, 'MIB': 2 ** 20, 'GIB': 2 ** 30, 'TIB': 2 ** 40
+}
+
+
+def _parse_memory_size(value):
+    # Memory size in bytes, given as a number or a string
+    # such as "512MB" or "4 GiB"
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = re.fullmatch(r'\s*([0-9.]+)\s*([A-Za-z]*)\s*', str(value))
+    if (match is None) or (match.group(2).upper() not in _memory_units):
+        raise ValueError(f'Invalid memory size: {value}')
+    return int(float(match.group(1)) * _memory_units[match.group(2).upper()])
 
 
 def _parse_reference_et(config):
@@ -160,6 +247,16 @@ def _parse_reference_et(config):
         method = str(config['ET0']['method'])
         if method not in valid_et_methods:
             raise ValueError('Invalid `method` for ET0')
+
+        # Optional settings for computing ET0 in blocks of time
+        et0 = config['ET0']
+        et0['stream'] = bool(et0.get('stream', False))
+        if 'time_block_size' in et0:
+            et0['time_block_size'] = int(et0['time_block_size'])
+            if et0['time_block_size'] < 1:
+                raise ValueError('`time_block_size` for ET0 must be positive')
+        if 'memory_budget' in et0:
+            et0['memory_budget'] = _parse_memory_size(et0['memory_budget'])
     else:
         # Otherwise we need to read ET0 data from a file
         config['method'] = None
@@ -181,7 +278,7 @@ def _parse_required_weather_data(config):
 
 
 def _parse_optional_weather_data(config):
-    for var in ['TDEW', 'RHMAX', 'RHMIN', 'RHMEAN', 'SH', 'SWDOWN', 'LWDOWN', 'WIND', 'WIND_U', 'WIND_V', 'SP']:
+    for var in ['TDEW', 'RHMAX', 'RHMIN', 'RHMEAN', 'SH', 'SWDOWN', 'LWDOWN', 'WIND', 'WIND_U', 'WIND_V', 'SP', 'ELEV']:
         if var in config:
             if 'use' not in config[var]:
                 config[var]['use'] = False
@@ -196,6 +293,47 @@ def _parse_optional_weather_data(config):
     return config
 
 
+def _parse_forcing_store(config):
+    if 'FORCING_STORE' not in config:
+        config['FORCING_STORE'] = ForcingStoreConfig()
+        return config
+    _check_entry(config, 'FORCING_STORE', 'path')
+    path = str(config['FORCING_STORE']['path'])
+    if not os.path.isabs(path):
+        path = os.path.join(config['configpath'], path)
+    config['FORCING_STORE'] = ForcingStoreConfig(path)
+    return config
+
+
+def _parse_cache(config):
+    if 'CACHE' not in config:
+        config['CACHE'] = CacheConfig()
+        return config
+    _check_entry(config, 'CACHE', 'path')
+    path = str(config['CACHE']['path'])
+    if not os.path.isabs(path):
+        path = os.path.join(config['configpath'], path)
+    config['CACHE'] = CacheConfig(path)
+    return config
+
+
+valid_dtypes = ['float32', 'float64']
+
+
+def _parse_precision(config):
+    if 'PRECISION' not in config:
+        config['PRECISION'] = PrecisionConfig()
+        return config
+    dtype = str(config['PRECISION'].get('dtype', 'float64'))
+    if dtype not in valid_dtypes:
+        raise ValueError(
+            f'`dtype` in section `PRECISION` must be one of '
+            f'{", ".join(valid_dtypes)}, got `{dtype}`'
+        )
+    config['PRECISION'] = PrecisionConfig(dtype)
+    return config
+
+
 def _get_configpath(configfile):
     path = os.path.dirname(configfile)
     filename = os.path.basename(configfile)
@@ -223,12 +361,21 @@ class Configuration:
         config = _parse_model_time(config)
         config = _parse_required_weather_data(config)
         config = _parse_optional_weather_data(config)
+        config = _parse_forcing_store(config)
+        config = _parse_cache(config)
+        config = _parse_precision(config)
 
         # Copy config sections to object
         config_sections = config.keys()
         for section in config_sections:
             vars(self)[section] = config[section]
 
+    @property
+    def dtype(self):
+        """numpy.dtype: Floating point type of the forcing, ET0 and
+        their intermediate arrays."""
+        return np.dtype(self.PRECISION.dtype)
+
     @property
     def has_max_daily_temperature(self):
         return self.TMAX.use
@@ -247,7 +394,7 @@ class Configuration:
 
     @property
     def has_elevation(self):
-        return False
+        return self.ELEV.use
 
     @property
     def has_dewpoint_temperature(self):
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+
+import threading
+from collections import OrderedDict
+
+from .FileIndex import open_indexed_mfdataset
+
+
+def _in_memory_nbytes(ds):
+    # Bytes held in memory by a dataset, i.e. excluding variables
+    # which are still backed by dask or the files on disk
+    return sum(
+        var.nbytes for var in ds.variables.values()
+        if var._in_memory
+    )
+
+
+class DatasetPool:
+    def __init__(self, max_datasets=32, max_memory=None):
+        """Process-wide pool of open datasets.
+
+        Every input variable read from the same list of files shares
+        one dataset, so that the files are opened and their metadata
+        parsed once rather than by every call to
+        ``xarray.open_mfdataset``. Least recently used datasets are
+        closed when the pool holds more than ``max_datasets`` or
+        their in-memory variables (e.g. coordinates) exceed
+        ``max_memory`` bytes. Closing a dataset only releases its
+        file handles: arrays taken from it reopen the files when
+        they are next read. Datasets are opened with
+        ``open_indexed_mfdataset``, so that the metadata of files
+        which have been opened before is read from their index,
+        saved in ``cache_dir``.
+
+        Parameters
+        ----------
+        max_datasets: int, optional
+            Maximum number of open datasets.
+        max_memory: int, optional
+            Maximum total size in bytes of the in-memory variables
+            of the open datasets. If None the size is not limited.
+        """
+        self.max_datasets = max_datasets
+        self.max_memory = max_memory
+        self._datasets = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(filenames, time_range=None, **kwargs):
+        if isinstance(filenames, str):
+            filenames = [filenames]
+        if time_range is not None:
+            time_range = tuple(str(t) for t in time_range)
+        options = tuple(sorted((k, repr(v)) for k, v in kwargs.items()))
+        return (tuple(filenames), time_range, options)
+
+    def open(self, filenames, time_range=None, cache_dir=None, **kwargs):
+        """Return the dataset for ``filenames``, opening it with
+        ``open_indexed_mfdataset(filenames, time_range, cache_dir, **kwargs)``
+        if it is not already in the pool.
+        """
+        if isinstance(filenames, str):
+            filenames = [filenames]
+        key = self.key(filenames, time_range, **kwargs)
+        with self._lock:
+            if key in self._datasets:
+                self._datasets.move_to_end(key)
+                return self._datasets[key][0]
+        ds = open_indexed_mfdataset(filenames, time_range, cache_dir, **kwargs)
+        with self._lock:
+            if key in self._datasets:
+                # Opened concurrently by another thread
+                ds.close()
+                self._datasets.move_to_end(key)
+                return self._datasets[key][0]
+            self._datasets[key] = (ds, _in_memory_nbytes(ds))
+            self._evict()
+        return ds
+
+    def __len__(self):
+        return len(self._datasets)
+
+    def __contains__(self, key):
+        return key in self._datasets
+
+    @property
+    def memory(self):
+        """int: Total size in bytes of in-memory variables."""
+        return sum(nbytes for _, nbytes in self._datasets.values())
+
+    def _evict(self):
+        # Keep the most recently used dataset even if it alone
+        # exceeds the memory limit
+        while len(self._datasets) > 1 and (
+                len(self._datasets) > self.max_datasets
+                or (self.max_memory is not None and self.memory > self.max_memory)):
+            _, (ds, _) = self._datasets.popitem(last=False)
+            ds.close()
+
+    def clear(self):
+        """Close every dataset in the pool."""
+        with self._lock:
+            while self._datasets:
+                _, (ds, _) = self._datasets.popitem(last=False)
+                ds.close()
+
+
+# Pool shared by all model inputs in this process
+dataset_pool = DatasetPool()
+
+
+def open_dataset(filenames, time_range=None, cache_dir=None, **kwargs):
+    """Open ``filenames`` through the process-wide ``dataset_pool``."""
+    return dataset_pool.open(filenames, time_range, cache_dir, **kwargs)
@@ -2,6 +2,7 @@
 
 import os
 import math
+import hashlib
 import string
 import datetime
 import netCDF4 as nc
@@ -13,6 +14,8 @@ import pandas as pd
 from box import Box
 from collections import OrderedDict
 
+from .regrid import bilinear_weights
+from .SpatialIndex import SpatialIndex
 from .constants import (allowed_xy_dim_names,
                         allowed_x_dim_names,
                         allowed_y_dim_names,
@@ -67,6 +70,100 @@ def get_xr_coordinates(dataset_or_dataarray):
     return Box(coords, frozen_box=False)
 
 
+def get_xr_grid_signature(dataset_or_dataarray):
+    """Hash of the horizontal coordinates of an xarray object.
+
+    Two objects with the same signature share the same source grid,
+    so any lookup computed against one can be reused for the other.
+    """
+    coords = get_xr_coordinates(dataset_or_dataarray)
+    signature = hashlib.sha1()
+    for dim in ['y', 'x']:
+        coord = coords[dim]
+        values = np.ascontiguousarray(dataset_or_dataarray[coord].values)
+        signature.update(coord.encode())
+        signature.update(str(values.dtype).encode())
+        signature.update(values.tobytes())
+    return signature.hexdigest()
+
+
+def get_spatial_extent(x, y):
+    """Extent of a regular grid with cell centres ``x`` and ``y``."""
+    x = np.asarray(x)
+    y = np.asarray(y)
+    xres = abs(x[1] - x[0]) if x.size > 1 else 0.
+    yres = abs(y[1] - y[0]) if y.size > 1 else 0.
+    return Box(
+        left=np.min(x) - (xres / 2.),
+        right=np.max(x) + (xres / 2.),
+        top=np.max(y) + (yres / 2.),
+        bottom=np.min(y) - (yres / 2.),
+        frozen_box=True
+    )
+
+
+def _readonly(values):
+    # Contiguous copy of `values` which cannot be modified in place
+    values = np.array(values, order='C')
+    values.flags.writeable = False
+    return values
+
+
+def _nearest_longitude_index(source, values):
+    # Positions of the nearest `source` longitudes to `values`,
+    # allowing for the two being given in different ranges (e.g.
+    # [0, 360) and [-180, 180)) and for neighbours across the
+    # antimeridian
+    source = np.asarray(source, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    centre = (source.min() + source.max()) / 2
+    values = centre + ((values - centre + 180.) % 360.) - 180.
+    order = np.argsort(source, kind='stable')
+    ascending = source[order]
+    extended = np.concatenate([[ascending[-1] - 360.], ascending, [ascending[0] + 360.]])
+    positions = np.concatenate([[order[-1]], order, [order[0]]])
+    return positions[pd.Index(extended).get_indexer(values, method='nearest')]
+
+
+def _hilbert_index(x, y, order):
+    # Distance along a Hilbert curve of order `order` of the integer
+    # positions (x, y), each in [0, 2**order)
+    n = 1 << order
+    x = np.array(x, dtype=np.int64)
+    y = np.array(y, dtype=np.int64)
+    d = np.zeros(x.shape, dtype=np.int64)
+    s = n >> 1
+    while s > 0:
+        rx = ((x & s) > 0).astype(np.int64)
+        ry = ((y & s) > 0).astype(np.int64)
+        d += s * s * ((3 * rx) ^ ry)
+        # Rotate the quadrant
+        flip = (ry == 0) & (rx == 1)
+        x = np.where(flip, n - 1 - x, x)
+        y = np.where(flip, n - 1 - y, y)
+        swap = ry == 0
+        x, y = np.where(swap, y, x), np.where(swap, x, y)
+        s >>= 1
+    return d
+
+
+def _tile_bounds(n, n_tiles, keys=None):
+    # Start and end positions of `n_tiles` runs of near-equal length
+    # covering `n` items. If `keys` (sorted) is given, runs only
+    # start where the key changes.
+    targets = np.round(np.arange(n_tiles + 1) * (n / n_tiles)).astype(np.int64)
+    if keys is not None and n > 0:
+        candidates = np.concatenate(
+            [[0], np.flatnonzero(np.diff(keys)) + 1, [n]]
+        )
+        nearest = np.abs(targets[:, None] - candidates[None, :]).argmin(axis=1)
+        targets = candidates[nearest]
+    return np.unique(np.concatenate([[0], targets, [n]]))
+
+
+PARTITION_STRATEGIES = ['balanced', 'chunks', 'hilbert']
+
+
 class Base(object):
 
     def __init__(
@@ -226,12 +323,27 @@ class Domain(Base):
         self._model_is_1d = model_is_1d
         self._has_data = has_data
         self._in_memory = False
+        # Positions in the parent domain of a tile's points
+        self.parent_index = None
         self._update_metadata()
-        if self._is_2d:
-            self._coords['xy'] = np.where(self._data['mask'])
+
+    def _compress(self):
+        # Land-only representation of a 2D grid. Active cells are
+        # numbered contiguously along `xy` by their flat (row-major)
+        # index into the (y, x) grid, so masked cells are never
+        # selected, computed or stored.
+        mask = self._data['mask'].transpose(self._dims['y'], self._dims['x'])
+        mask = np.asarray(mask.values).astype(bool)
+        land_index = np.flatnonzero(mask).astype(np.int32)
+        land_lookup = np.full(mask.size, -1, dtype=np.int32)
+        land_lookup[land_index] = np.arange(land_index.size, dtype=np.int32)
+        self._land_index = _readonly(land_index)
+        self._land_lookup = _readonly(land_lookup)
 
     def _update_metadata(self):
-        # Extract metadata from xarray dataset.
+        # Extract metadata from xarray dataset. This must be called
+        # whenever the dataset is changed (e.g. subset), as it also
+        # invalidates the arrays and lookups derived from it.
         self._dims = get_xr_dimension_names(
             self._data,
             self._is_1d,
@@ -246,15 +358,42 @@ class Domain(Base):
             & ('y' in self.dims)
         )
         self._is_spatial = self._is_1d | self._is_2d
+        self._reset_caches()
+        if self._is_2d:
+            self._compress()
         self._spatial_extent()
 
+    def _reset_caches(self):
+        # Coordinates are read from the dataset once (which computes
+        # them if the dataset is backed by dask) and kept as
+        # read-only arrays; derived arrays are computed on first use
+        coordinate_values = {
+            key: _readonly(self._data[name].values)
+            for key, name in self._coords.items()
+            if key in ('x', 'y', 'xy')
+        }
+        self._x = coordinate_values.get('x')
+        self._y = coordinate_values.get('y')
+        self._xy = coordinate_values.get('xy') if self._is_1d else None
+        self._derived = {}
+        self._grid_index_cache = {}
+        self._grid_weights_cache = {}
+        self._spatial_index_cache = {}
+
+    def _derived_array(self, name, func):
+        # Array computed by `func`, memoized until the next call to
+        # `_update_metadata`
+        if name not in self._derived:
+            self._derived[name] = _readonly(func())
+        return self._derived[name]
+
     def _spatial_extent(self):
         # Extract spatial extent from data object.
 
         # Only relevant for two-dimensional datasets; for
         # one-dimensional datasets the extent is None.
         if self.is_2d:
-            self._extent = get_spatial_extent(self._coords)
+            self._extent = get_spatial_extent(self.x, self.y)
         else:
             self._extent = None
 
@@ -310,26 +449,58 @@ class Domain(Base):
 
     @property
     def y(self):
-        """numpy.array: y-coordinates."""
-        ycoord = self._coords['y']
-        return self._data[ycoord].values
-        # return self._coords['y'].values
+        """numpy.array: y-coordinates (read-only)."""
+        return self._y
 
     @property
     def x(self):
-        """numpy.array: x-coordinates."""
-        xcoord = self._coords['x']
-        return self._data[xcoord].values
-        # return self._coords['x'].values
+        """numpy.array: x-coordinates (read-only)."""
+        return self._x
 
     @property
     def xy(self):
+        """numpy.array: Identifier of each model grid point. For 2D
+        grids this is the flat index of each active cell."""
         if self._is_1d:
-            xycoord = self._coords['xy']
-            return self._data[xycoord].values
+            return self._xy
+        elif self._is_2d:
+            return self._land_index
         else:
             return None
 
+    @property
+    def land_lookup(self):
+        """numpy.array: Position along ``xy`` of each cell of a 2D
+        grid, by flat index, or -1 for masked cells."""
+        if self._is_2d:
+            return self._land_lookup
+        return None
+
+    @property
+    def point_x(self):
+        """numpy.array: x-coordinate of each model grid point."""
+        if self._is_2d:
+            return self._derived_array(
+                'point_x', lambda: self.x[self._land_index % self.nx]
+            )
+        return self.x
+
+    @property
+    def point_y(self):
+        """numpy.array: y-coordinate of each model grid point."""
+        if self._is_2d:
+            return self._derived_array(
+                'point_y', lambda: self.y[self._land_index // self.nx]
+            )
+        return self.y
+
+    @property
+    def point_latitude_radians(self):
+        """numpy.array: Latitude [radians] of each model grid point."""
+        return self._derived_array(
+            'point_latitude_radians', lambda: np.radians(self.point_y)
+        )
+
     @property
     def nx(self):
         """int: Size of model grid in x-direction."""
@@ -342,11 +513,263 @@ class Domain(Base):
 
     @property
     def nxy(self):
-        """int: Total number of model grid points."""
-        if self._is_1d:
+        """int: Total number of model grid points, which for 2D
+        grids excludes masked cells."""
+        if self._is_spatial:
             return len(self.xy)
-        elif self._is_2d:
-            return (self.nx * self.ny)
+
+    def compress(self, values):
+        """Select the active cells of an array whose last two
+        dimensions are the (y, x) grid, giving a trailing ``xy``
+        dimension."""
+        values = np.asarray(values)
+        return values.reshape(values.shape[:-2] + (-1,))[..., self._land_index]
+
+    def decompress(self, values, fill_value=np.nan):
+        """Scatter an array with a trailing ``xy`` dimension onto
+        the (y, x) grid, filling masked cells with ``fill_value``."""
+        values = np.asarray(values)
+        dtype = np.result_type(values, fill_value)
+        grid = np.full(values.shape[:-1] + (self.ny * self.nx,), fill_value, dtype=dtype)
+        grid[..., self._land_index] = values
+        return grid.reshape(values.shape[:-1] + (self.ny, self.nx))
+
+    def subset(self, index):
+        """Sub-domain of the model grid points at positions
+        ``index`` along ``xy``.
+
+        A subset of a 2D domain is the smallest rectangle of the grid
+        containing the points, with all other cells masked. The
+        positions of the sub-domain's points in this domain, in the
+        sub-domain's ``xy`` order, are stored as its ``parent_index``.
+        """
+        index = np.sort(np.asarray(index, dtype=np.int64))
+        if self._is_1d:
+            data = self._data.isel({self._dims['xy']: index})
+            domain = Domain(
+                data, True, self._xy_dimname, self._model_is_1d, self._has_data
+            )
+        else:
+            flat = self._land_index[index]
+            rows, cols = flat // self.nx, flat % self.nx
+            ydim, xdim = self._dims['y'], self._dims['x']
+            rows0, cols0 = rows.min(), cols.min()
+            data = self._data.isel({
+                ydim: slice(rows0, rows.max() + 1),
+                xdim: slice(cols0, cols.max() + 1)
+            })
+            mask = np.zeros((data.sizes[ydim], data.sizes[xdim]), dtype=self.mask.dtype)
+            mask[rows - rows0, cols - cols0] = 1
+            data = data.assign(mask=((ydim, xdim), mask))
+            domain = Domain(
+                data, False, None, self._model_is_1d, self._has_data
+            )
+        domain.parent_index = index
+        return domain
+
+    def partition(self, n_tiles, strategy='balanced', grid=None):
+        """Split the domain into at most ``n_tiles`` sub-domains.
+
+        Tiles can be staged, run and written independently, e.g. by
+        separate processes, each of which only needs its own tile.
+
+        Parameters
+        ----------
+        n_tiles: int
+            Number of tiles.
+        strategy: str, optional
+            How points are assigned to tiles:
+
+            - 'balanced': runs of consecutive points along ``xy``
+              with equal numbers of points (row bands for 2D grids).
+            - 'chunks': as 'balanced', but tiles only split between
+              chunks of ``grid``, so that no input chunk is read by
+              more than one tile.
+            - 'hilbert': runs of equal numbers of points along a
+              Hilbert curve, giving compact tiles for scattered
+              points.
+        grid: xarray.DataArray, optional
+            Chunked gridded input, required by the 'chunks' strategy.
+
+        Returns
+        -------
+        list of Domain
+            Non-empty tiles, each with ``parent_index`` set.
+        """
+        n = self.nxy
+        keys = None
+        if strategy == 'balanced':
+            order = np.arange(n)
+        elif strategy == 'hilbert':
+            order = np.argsort(self._hilbert_index(), kind='stable')
+        elif strategy == 'chunks':
+            if grid is None or grid.chunks is None:
+                raise ValueError('Strategy `chunks` requires a chunked `grid`')
+            keys = self._chunk_index(grid)
+            order = np.argsort(keys, kind='stable')
+            keys = keys[order]
+        else:
+            raise ValueError(
+                f'Invalid partition strategy `{strategy}`: must be one of '
+                f'{", ".join(PARTITION_STRATEGIES)}'
+            )
+        bounds = _tile_bounds(n, n_tiles, keys)
+        return [
+            self.subset(order[start:stop])
+            for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start
+        ]
+
+    def _hilbert_index(self, order=16):
+        # Position of each point along a Hilbert curve over the extent
+        # of the domain
+        if self._is_2d:
+            rows, cols = self._land_index // self.nx, self._land_index % self.nx
+            order = max(1, int(np.ceil(np.log2(max(self.nx, self.ny)))))
+            return _hilbert_index(cols, rows, order)
+        scaled = []
+        for values in [self.point_x, self.point_y]:
+            values = np.asarray(values, dtype=np.float64)
+            span = np.ptp(values) if values.size > 0 else 0.
+            scale = ((1 << order) - 1) / span if span > 0 else 0.
+            scaled.append(np.round((values - values.min()) * scale).astype(np.int64))
+        return _hilbert_index(scaled[0], scaled[1], order)
+
+    def _chunk_index(self, grid):
+        # Identifier of the chunk of `grid` holding the nearest cell
+        # to each point
+        chunks = dict(zip(grid.dims, grid.chunks))
+        key = np.zeros(self.nxy, dtype=np.int64)
+        for dim, indexer in self.nearest_grid_index(grid).items():
+            bounds = np.cumsum(chunks[dim])
+            block = np.searchsorted(bounds, indexer, side='right')
+            key = key * len(bounds) + block
+        return key
+
+    def spatial_index(self, dataset_or_dataarray):
+        """``SpatialIndex`` of the cells of an input, built once per
+        source grid.
+
+        Parameters
+        ----------
+        dataset_or_dataarray: xarray.Dataset or xarray.DataArray
+            Gridded input with one-dimensional x and y coordinates,
+            or a point input whose x and y coordinates lie along the
+            same dimension (e.g. weather stations).
+        """
+        signature = get_xr_grid_signature(dataset_or_dataarray)
+        if signature in self._spatial_index_cache:
+            return self._spatial_index_cache[signature]
+
+        coords = get_xr_coordinates(dataset_or_dataarray)
+        ycoord = dataset_or_dataarray[coords['y']]
+        xcoord = dataset_or_dataarray[coords['x']]
+        if ycoord.dims == xcoord.dims:
+            index = SpatialIndex(xcoord.values, ycoord.values, xcoord.dims, xcoord.shape)
+        else:
+            lon, lat = np.meshgrid(xcoord.values, ycoord.values)
+            dims = (ycoord.dims[0], xcoord.dims[0])
+            index = SpatialIndex(lon, lat, dims, lon.shape)
+
+        self._spatial_index_cache[signature] = index
+        return index
+
+    def query_grid(self, dataset_or_dataarray, k=1):
+        """The ``k`` nearest cells of an input to each model grid
+        point, by great-circle distance.
+
+        Returns
+        -------
+        tuple
+            Distance [m] and positional indexers of the cells, as
+            returned by ``SpatialIndex.query``.
+        """
+        return self.spatial_index(dataset_or_dataarray).query(
+            self.point_x, self.point_y, k=k
+        )
+
+    def nearest_grid_index(self, dataset_or_dataarray):
+        """Positional indices of the nearest source grid cell to
+        each model grid point.
+
+        For grids with one-dimensional x and y coordinates this is
+        the cell containing the point, found along each axis, with
+        longitudes compared modulo 360 degrees. For point inputs it
+        is the nearest point by great-circle distance, found with
+        ``spatial_index``.
+
+        The lookup is computed once per source grid and cached, so
+        that all inputs sharing a grid reuse the same indexers.
+
+        Parameters
+        ----------
+        dataset_or_dataarray: xarray.Dataset or xarray.DataArray
+            Gridded or point input, as for ``spatial_index``.
+
+        Returns
+        -------
+        collections.OrderedDict
+            Integer indexers along the y and x dimensions of the
+            input (or its point dimension), keyed by dimension name
+            and suitable for ``isel``.
+        """
+        signature = get_xr_grid_signature(dataset_or_dataarray)
+        if signature in self._grid_index_cache:
+            return self._grid_index_cache[signature]
+
+        coords = get_xr_coordinates(dataset_or_dataarray)
+        ycoord = dataset_or_dataarray[coords['y']]
+        xcoord = dataset_or_dataarray[coords['x']]
+        if ycoord.dims == xcoord.dims:
+            _, index = self.query_grid(dataset_or_dataarray)
+        else:
+            index = OrderedDict()
+            index[ycoord.dims[0]] = ycoord.to_index().get_indexer(
+                self.point_y, method='nearest'
+            )
+            index[xcoord.dims[0]] = _nearest_longitude_index(
+                xcoord.values, self.point_x
+            )
+
+        self._grid_index_cache[signature] = index
+        return index
+
+    def bilinear_grid_weights(self, dataset_or_dataarray, cache_dir=None):
+        """Bilinear interpolation weights from a source grid to the
+        model grid points.
+
+        Like ``nearest_grid_index`` the weights are computed once per
+        source grid; if ``cache_dir`` is given they are also saved
+        there for later runs.
+
+        Parameters
+        ----------
+        dataset_or_dataarray: xarray.Dataset or xarray.DataArray
+            Gridded input with one-dimensional x and y coordinates.
+        cache_dir: str, optional
+            Directory in which the weights are cached.
+
+        Returns
+        -------
+        tuple
+            The names of the y and x dimensions of the input and
+            the ``regrid.RegridWeights`` between the grids.
+        """
+        signature = get_xr_grid_signature(dataset_or_dataarray)
+        if signature in self._grid_weights_cache:
+            return self._grid_weights_cache[signature]
+
+        coords = get_xr_coordinates(dataset_or_dataarray)
+        ycoord = dataset_or_dataarray[coords['y']]
+        xcoord = dataset_or_dataarray[coords['x']]
+        # Longitudes are compared modulo 360 degrees
+        x_period = 360. if coords['x'] in ('lon', 'longitude') else None
+        weights = bilinear_weights(
+            xcoord.values, ycoord.values, self.point_x, self.point_y,
+            x_period=x_period, cache_dir=cache_dir
+        )
+        result = (ycoord.dims[0], xcoord.dims[0], weights)
+        self._grid_weights_cache[signature] = result
+        return result
 
     # @property
     # def area(self):
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+import xarray
+import dask.array
+from dask.base import tokenize
+from xarray.backends import CachingFileManager
+
+from .constants import allowed_t_dim_names
+from .Cache import write_file_atomic
+
+# Increment when the layout of the index changes
+INDEX_VERSION = 1
+
+
+def _jsonable(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _jsonable(v) for k, v in value.items()}
+    return value
+
+
+def _coordinate_record(coord):
+    values = coord.values
+    return {
+        'dims': list(coord.dims),
+        'dtype': str(values.dtype),
+        'values': _jsonable(values),
+        'attrs': _jsonable(dict(coord.attrs))
+    }
+
+
+class _FileArray:
+    """One variable of one file, read from disk when indexed.
+
+    The file is opened on the first read and then kept open by
+    ``manager``, a ``CachingFileManager`` shared by every variable of
+    the file. Open files count towards xarray's ``file_cache_maxsize``:
+    the least recently used are closed, and reopened when next read.
+    """
+
+    def __init__(self, manager, varname, shape, dtype):
+        self.varname = varname
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.ndim = len(self.shape)
+        self._manager = manager
+
+    def __getitem__(self, key):
+        with self._manager.acquire_context() as ds:
+            return np.asarray(ds[self.varname][key].values, dtype=self.dtype)
+
+
+class FileIndex:
+    """Index of the netCDF files in a directory.
+
+    For each file the index records its modification time and size,
+    time points, variables (dims, shape, dtype, attributes and chunk
+    layout) and a reference to its non-time coordinates, which are
+    stored once for each distinct grid. Entries are refreshed when a
+    file's modification time or size changes.
+
+    Parameters
+    ----------
+    directory: str
+        Directory of the indexed files, which is never written to.
+    cache_dir: str, optional
+        Directory in which the index is saved, so that it can be
+        reused by later runs. If None the index is only held in
+        memory.
+    """
+
+    def __init__(self, directory, cache_dir=None):
+        self.directory = directory
+        self.path = None
+        if cache_dir is not None:
+            digest = hashlib.blake2b(
+                os.path.abspath(directory).encode(), digest_size=16
+            ).hexdigest()
+            self.path = os.path.join(cache_dir, 'file_index', digest + '.json')
+        self._files, self._grids = self._read()
+        self._modified = False
+
+    def _read(self):
+        if self.path is None:
+            return {}, {}
+        try:
+            with open(self.path, 'r') as f:
+                index = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}, {}
+        if index.get('version') != INDEX_VERSION:
+            return {}, {}
+        return index['files'], index['grids']
+
+    def save(self):
+        if (self.path is None) or (not self._modified):
+            return None
+        contents = json.dumps({
+            'version': INDEX_VERSION,
+            'directory': os.path.abspath(self.directory),
+            'files': self._files,
+            'grids': self._grids
+        })
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        write_file_atomic(self.path, contents.encode())
+        self._modified = False
+        return None
+
+    def entry(self, filename):
+        """Index entry of ``filename``, which is (re)scanned if it
+        is not indexed or has changed since it was indexed.
+        """
+        name = os.path.basename(filename)
+        stat = os.stat(filename)
+        entry = self._files.get(name)
+        if (entry is None
+                or entry['mtime_ns'] != stat.st_mtime_ns
+                or entry['size'] != stat.st_size):
+            entry = self._scan(filename, stat)
+            self._files[name] = entry
+            self._modified = True
+        return entry
+
+    def grid(self, key):
+        """Non-time coordinates of the grid ``key``, as records of
+        dims, dtype, values and attributes.
+        """
+        return self._grids[key]
+
+    def _scan(self, filename, stat):
+        with xarray.open_dataset(filename) as ds:
+            time_dim = next(
+                (dim for dim in ds.dims if dim in allowed_t_dim_names), None
+            )
+            time = None
+            if time_dim is not None and time_dim in ds.indexes:
+                index = ds.indexes[time_dim]
+                if isinstance(index, pd.DatetimeIndex):
+                    time = index.asi8.tolist()
+            coords = {
+                name: _coordinate_record(coord)
+                for name, coord in ds.coords.items()
+                if time_dim not in coord.dims
+            }
+            grid = hashlib.blake2b(
+                json.dumps(coords, sort_keys=True).encode(), digest_size=16
+            ).hexdigest()
+            self._grids[grid] = coords
+            variables = {
+                name: {
+                    'dims': list(var.dims),
+                    'shape': list(var.shape),
+                    'dtype': str(var.dtype),
+                    'attrs': _jsonable(dict(var.attrs)),
+                    'chunks': _jsonable(var.encoding.get('chunksizes'))
+                }
+                for name, var in ds.data_vars.items()
+            }
+            return {
+                'mtime_ns': stat.st_mtime_ns,
+                'size': stat.st_size,
+                'time_dim': time_dim,
+                'time': time,
+                'grid': grid,
+                'variables': variables,
+                'attrs': _jsonable(dict(ds.attrs))
+            }
+
+
+def _overlaps(time, time_range):
+    # Whether the times of a file overlap `time_range`, widened by
+    # one day so that nearest-neighbour selection at the ends of the
+    # range sees the neighbouring files
+    start, end = time_range
+    margin = pd.Timedelta(days=1)
+    first, last = pd.Timestamp(time[0]), pd.Timestamp(time[-1])
+    return (last >= pd.Timestamp(start) - margin) and (first <= pd.Timestamp(end) + margin)
+
+
+def _build_dataset(filenames, entries, grid):
+    # Dataset holding the variables of `filenames`, concatenated in
+    # time, without opening any of the files
+    first = entries[0]
+    time_dim = first['time_dim']
+    time = np.concatenate(
+        [np.asarray(entry['time'], dtype='datetime64[ns]') for entry in entries]
+    )
+    # One manager per file, so that its variables share one handle
+    managers = {
+        filename: CachingFileManager(xarray.open_dataset, filename, kwargs={'cache': False})
+        for filename in filenames
+    }
+    data_vars = {}
+    for name, var in first['variables'].items():
+        dims = var['dims']
+        dtype = np.dtype(var['dtype'])
+        meta = np.empty((0,) * len(dims), dtype=dtype)
+        if time_dim in dims:
+            sources = list(zip(filenames, entries))
+        else:
+            sources = [(filenames[0], first)]
+        arrays = [
+            dask.array.from_array(
+                _FileArray(managers[filename], name, entry['variables'][name]['shape'], dtype),
+                chunks=tuple(entry['variables'][name]['shape']),
+                name='indexed-' + tokenize(filename, name, entry['mtime_ns']),
+                fancy=False,
+                meta=meta
+            )
+            for filename, entry in sources
+        ]
+        if time_dim in dims:
+            data = dask.array.concatenate(arrays, axis=dims.index(time_dim))
+        else:
+            data = arrays[0]
+        data_vars[name] = xarray.Variable(dims, data, attrs=var['attrs'])
+    coords = {
+        name: xarray.Variable(
+            coord['dims'],
+            np.asarray(coord['values'], dtype=coord['dtype']),
+            attrs=coord['attrs']
+        )
+        for name, coord in grid.items()
+    }
+    coords[time_dim] = (time_dim, time)
+    return xarray.Dataset(data_vars, coords=coords, attrs=first['attrs'])
+
+
+def _is_concatenable(entries):
+    # Whether the files are pieces of one record split along time
+    first = entries[0]
+    time_dim = first['time_dim']
+    if (time_dim is None) or any(entry['time'] is None for entry in entries):
+        return False
+    for entry in entries[1:]:
+        if (entry['time_dim'] != time_dim
+                or entry['grid'] != first['grid']
+                or entry['variables'].keys() != first['variables'].keys()):
+            return False
+        for name, var in entry['variables'].items():
+            ref = first['variables'][name]
+            if var['dims'] != ref['dims'] or var['dtype'] != ref['dtype']:
+                return False
+            if time_dim not in var['dims'] and var['shape'] != ref['shape']:
+                return False
+            other = [
+                n for dim, n in zip(var['dims'], var['shape']) if dim != time_dim
+            ]
+            if other != [n for dim, n in zip(ref['dims'], ref['shape']) if dim != time_dim]:
+                return False
+    return True
+
+
+def open_indexed_mfdataset(filenames, time_range=None, cache_dir=None, **kwargs):
+    """Open a multi-file dataset using the ``FileIndex`` of the
+    files' directories.
+
+    When the files hold the same variables on the same grid and
+    differ only in time (e.g. one file per month), the dataset is
+    built from the index without reading any file, and only files
+    overlapping ``time_range`` are included. Otherwise, or if any
+    ``kwargs`` are given, the files are opened with
+    ``xarray.open_mfdataset(filenames, **kwargs)``.
+
+    Parameters
+    ----------
+    filenames: str or list of str
+        Files to open.
+    time_range: tuple, optional
+        ``(start_time, end_time)`` of the data required.
+    cache_dir: str, optional
+        Directory in which the indexes are saved between runs.
+    """
+    if isinstance(filenames, str):
+        filenames = [filenames]
+    if len(kwargs) > 0 or len(filenames) == 0:
+        return xarray.open_mfdataset(filenames, **kwargs)
+
+    indexes = {}
+    entries = []
+    for filename in filenames:
+        directory = os.path.dirname(os.path.abspath(filename))
+        if directory not in indexes:
+            indexes[directory] = FileIndex(directory, cache_dir)
+        entries.append(indexes[directory].entry(filename))
+    for index in indexes.values():
+        index.save()
+
+    if not _is_concatenable(entries):
+        return xarray.open_mfdataset(filenames)
+    order = np.argsort([entry['time'][0] for entry in entries], kind='stable')
+    filenames = [filenames[i] for i in order]
+    entries = [entries[i] for i in order]
+    if time_range is not None:
+        selected = [
+            i for i, entry in enumerate(entries)
+            if _overlaps(np.asarray(entry['time'], dtype='datetime64[ns]'), time_range)
+        ]
+        if len(selected) > 0:
+            filenames = [filenames[i] for i in selected]
+            entries = [entries[i] for i in selected]
+    time = np.concatenate([entry['time'] for entry in entries])
+    if np.any(np.diff(time) <= 0):
+        # Overlapping files: leave it to xarray to combine them
+        return xarray.open_mfdataset(filenames)
+    grid = indexes[os.path.dirname(os.path.abspath(filenames[0]))].grid(entries[0]['grid'])
+    return _build_dataset(filenames, entries, grid)
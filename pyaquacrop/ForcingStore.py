@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+
+import os
+import json
+import numpy as np
+import pandas as pd
+import xarray
+
+# Variables written by `prepare_forcing_store`, in store order
+FORCING_STORE_VARIABLES = ['PREC', 'TMIN', 'TMAX', 'ET0']
+
+# Increment when the layout of the store changes
+FORCING_STORE_VERSION = 3
+
+
+class PointForcingStore:
+    """Point-major on-disk store of the model forcing.
+
+    Gridded inputs are typically chunked by time (e.g. one file per
+    month), so reading the full time series of a single point touches
+    every file. The store holds the forcing for the model domain as a
+    memory-mapped ``.npy`` array laid out [var, xy, time], such that
+    the series of one variable at each point is one contiguous read.
+
+    Use ``PointForcingStore.create`` to write a new store and
+    ``PointForcingStore.open`` to read an existing one.
+    """
+
+    DATA_FILENAME = 'forcing.npy'
+    XY_FILENAME = 'xy.npy'
+    METADATA_FILENAME = 'forcing.json'
+
+    # Number of time points read from the source per write
+    TIME_BLOCK_SIZE = 366
+
+    def __init__(self, path, data, xy, metadata):
+        self.path = path
+        self._data = data
+        self._xy = xy
+        self._metadata = metadata
+
+    @classmethod
+    def create(cls, path, variables, xy, time, dtype=np.float64):
+        os.makedirs(path, exist_ok=True)
+        xy = np.asarray(xy)
+        time = pd.DatetimeIndex(time)
+        data = np.lib.format.open_memmap(
+            os.path.join(path, cls.DATA_FILENAME),
+            mode='w+',
+            dtype=dtype,
+            shape=(len(variables), len(xy), len(time))
+        )
+        np.save(os.path.join(path, cls.XY_FILENAME), xy)
+        metadata = {
+            'version': FORCING_STORE_VERSION,
+            'variables': list(variables),
+            'start_time': time[0].isoformat(),
+            'n_time': len(time),
+            'dtype': np.dtype(dtype).name,
+            'complete': False
+        }
+        store = cls(path, data, xy, metadata)
+        store._write_metadata()
+        return store
+
+    @classmethod
+    def open(cls, path):
+        with open(os.path.join(path, cls.METADATA_FILENAME), 'r') as f:
+            metadata = json.load(f)
+        data = np.load(os.path.join(path, cls.DATA_FILENAME), mmap_mode='r')
+        xy = np.load(os.path.join(path, cls.XY_FILENAME))
+        return cls(path, data, xy, metadata)
+
+    @classmethod
+    def exists(cls, path):
+        return os.path.exists(os.path.join(path, cls.METADATA_FILENAME))
+
+    def _write_metadata(self):
+        with open(os.path.join(self.path, self.METADATA_FILENAME), 'w') as f:
+            json.dump(self._metadata, f, indent=2)
+
+    def close(self):
+        """Flush pending writes and mark the store as complete."""
+        if self._data.mode != 'r':
+            self._data.flush()
+            self._metadata['complete'] = True
+            self._write_metadata()
+
+    @property
+    def variables(self):
+        return tuple(self._metadata['variables'])
+
+    @property
+    def xy(self):
+        return self._xy
+
+    @property
+    def time(self):
+        return pd.date_range(
+            self._metadata['start_time'],
+            periods=self._metadata['n_time'],
+            freq='D'
+        )
+
+    @property
+    def complete(self):
+        return self._metadata['complete']
+
+    def is_compatible(self, xy, time, dtype=np.float64):
+        """Whether the store covers exactly the given points and times
+        in values of type ``dtype``, with the current layout."""
+        return (
+            self.complete
+            and self._metadata.get('version') == FORCING_STORE_VERSION
+            and self._metadata.get('dtype') == np.dtype(dtype).name
+            and np.array_equal(self.xy, np.asarray(xy))
+            and self.time.equals(pd.DatetimeIndex(time))
+        )
+
+    def write(self, varname, values, start=0):
+        """Write a [time, xy] block of ``varname`` beginning at
+        time index ``start``.
+        """
+        k = self.variables.index(varname)
+        values = np.asarray(values)
+        self._data[k, :, start:(start + values.shape[0])] = values.T
+
+    def dataarray(self, varname):
+        """Return ``varname`` as a [time, xy] DataArray backed by
+        the memory-mapped store (no data is read).
+        """
+        k = self.variables.index(varname)
+        return xarray.DataArray(
+            self._data[k],
+            dims=['xy', 'time'],
+            coords={'xy': self.xy, 'time': self.time},
+            name=varname
+        ).transpose('time', 'xy')
+
+
+def _write_spacetimeinput(store, varname, spacetimeinput):
+    for start, values in spacetimeinput.iter_time_blocks(store.TIME_BLOCK_SIZE):
+        store.write(varname, values, start)
+
+
+def prepare_forcing_store(model):
+    """Rewrite the model forcing over the model domain into the
+    point-major store given by the ``FORCING_STORE`` config section.
+    """
+    from .Weather import Precipitation, Temperature, ET0
+
+    path = model.config.FORCING_STORE.path
+    if path is None:
+        raise ValueError('Config must have a `FORCING_STORE` section with entry `path`')
+
+    # Always read from the original sources
+    model.forcing_store = None
+    store = PointForcingStore.create(
+        path, FORCING_STORE_VARIABLES, model.domain.xy, model.time.values,
+        dtype=model.config.dtype
+    )
+    _write_spacetimeinput(store, 'PREC', Precipitation(model))
+    temperature = Temperature(model)
+    _write_spacetimeinput(store, 'TMIN', temperature.tmin)
+    _write_spacetimeinput(store, 'TMAX', temperature.tmax)
+    _write_spacetimeinput(store, 'ET0', ET0(model))
+    store.close()
+    return store
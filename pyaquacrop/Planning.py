@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+
+import os
+import io
+import hashlib
+import numpy as np
+
+from .Cache import write_file_atomic
+
+
+def point_signatures(arrays, point_keys=None, common=b''):
+    """Digest of the inputs of each point.
+
+    Parameters
+    ----------
+    arrays: list of numpy.ndarray
+        Per-point inputs, each with the point as the first axis.
+    point_keys: array_like, optional
+        Further per-point keys (e.g. a soil or crop class), with one
+        entry per point.
+    common: bytes, optional
+        Inputs shared by every point (e.g. parameter files), which
+        are included so that signatures from different runs are
+        only equal if these are too.
+
+    Returns
+    -------
+    numpy.ndarray
+        16-byte digests with dtype 'S16', one per point.
+    """
+    n_point = len(arrays[0])
+    signatures = np.empty(n_point, dtype='S16')
+    for i in range(n_point):
+        digest = hashlib.blake2b(common, digest_size=16)
+        for array in arrays:
+            value = np.ascontiguousarray(array[i])
+            digest.update(str(value.dtype).encode())
+            digest.update(value.tobytes())
+        if point_keys is not None:
+            digest.update(repr(point_keys[i]).encode())
+        signatures[i] = digest.digest()
+    return signatures
+
+
+class SimulationPlan:
+    """Assignment of model grid points to unique simulation units.
+
+    Points whose inputs are identical (e.g. points sharing a weather
+    cell, soil, crop and management) give identical results, so only
+    one simulation is run for each unit, at the unit's representative
+    point, and its results are scattered back to every member point.
+
+    Use ``SimulationPlan.from_signatures`` to build a plan, or
+    ``SimulationPlanBuilder`` to build one block of points at a time.
+
+    Parameters
+    ----------
+    xy: numpy.ndarray
+        Identifier of each point.
+    unit: numpy.ndarray
+        Simulation unit of each point.
+    representative: numpy.ndarray
+        Position of the representative point of each unit, which is
+        its first point along ``xy``.
+    """
+
+    FILENAME = 'plan.npz'
+
+    def __init__(self, xy, unit, representative):
+        self.xy = np.asarray(xy)
+        self.unit = np.asarray(unit, dtype=np.int64)
+        self.representative = np.asarray(representative, dtype=np.int64)
+
+    @classmethod
+    def from_signatures(cls, xy, signatures):
+        """Plan grouping points with equal ``signatures``."""
+        builder = SimulationPlanBuilder()
+        builder.add(xy, signatures)
+        return builder.plan()
+
+    @property
+    def n_points(self):
+        return len(self.xy)
+
+    @property
+    def n_units(self):
+        return len(self.representative)
+
+    @property
+    def representative_xy(self):
+        """Identifiers of the points which are simulated."""
+        return self.xy[self.representative]
+
+    def members(self, unit):
+        """Positions of the points of simulation unit ``unit``."""
+        return np.flatnonzero(self.unit == unit)
+
+    def scatter(self, results):
+        """Results for every point from ``results`` for each unit,
+        given with the unit as the first axis."""
+        return np.asarray(results)[self.unit]
+
+    def save(self, directory):
+        f = io.BytesIO()
+        np.savez(f, xy=self.xy, unit=self.unit, representative=self.representative)
+        write_file_atomic(os.path.join(directory, self.FILENAME), f.getvalue())
+
+    @classmethod
+    def load(cls, directory):
+        with np.load(os.path.join(directory, cls.FILENAME)) as f:
+            return cls(f['xy'], f['unit'], f['representative'])
+
+
+class SimulationPlanBuilder:
+    """Build a ``SimulationPlan`` from blocks of points, in ``xy``
+    order, so that signatures never need to be held for the whole
+    domain at once.
+    """
+
+    def __init__(self):
+        self._units = {}
+        self._xy = []
+        self._unit = []
+        self._representative = []
+        self._n_points = 0
+
+    def add(self, xy, signatures):
+        """Add a block of points, returning the positions within the
+        block of points which are the first of a new unit."""
+        unit = np.empty(len(xy), dtype=np.int64)
+        new = []
+        for i, signature in enumerate(signatures):
+            if signature not in self._units:
+                self._units[signature] = len(self._units)
+                self._representative.append(self._n_points + i)
+                new.append(i)
+            unit[i] = self._units[signature]
+        self._xy.append(np.asarray(xy))
+        self._unit.append(unit)
+        self._n_points += len(xy)
+        return np.asarray(new, dtype=np.int64)
+
+    def plan(self):
+        if self._n_points == 0:
+            return SimulationPlan(np.empty(0), np.empty(0), np.empty(0))
+        return SimulationPlan(
+            np.concatenate(self._xy),
+            np.concatenate(self._unit),
+            np.asarray(self._representative)
+        )
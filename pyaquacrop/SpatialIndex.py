@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+import numpy as np
+from collections import OrderedDict
+from scipy.spatial import cKDTree
+
+# Mean radius of the Earth [m]
+EARTH_RADIUS = 6371008.8
+
+# Cells whose distances from a point differ by less than this (as
+# chord length on the unit sphere, about 6 micrometres) are treated
+# as equidistant
+TIE_TOLERANCE = 1e-12
+
+# Extra neighbours queried so that ties can be broken, e.g. a point
+# on the corner of four cells
+N_TIE_CANDIDATES = 3
+
+
+def unit_vectors(lon, lat):
+    """Points on the unit sphere with longitude ``lon`` and latitude
+    ``lat`` [degrees], as an array with shape (n, 3)."""
+    lon = np.radians(np.asarray(lon, dtype=np.float64).ravel())
+    lat = np.radians(np.asarray(lat, dtype=np.float64).ravel())
+    coslat = np.cos(lat)
+    return np.stack([coslat * np.cos(lon), coslat * np.sin(lon), np.sin(lat)], axis=1)
+
+
+class SpatialIndex:
+    def __init__(self, lon, lat, dims, shape):
+        """Nearest-neighbour index of the cells of an input grid.
+
+        Cell centres are placed on the unit sphere and indexed with a
+        KD-tree, so that the nearest cells to a point are those with
+        the smallest great-circle distance, which remains correct
+        near the poles and across the antimeridian.
+
+        Use ``Domain.spatial_index`` to index an xarray object.
+
+        Parameters
+        ----------
+        lon, lat: numpy.ndarray
+            Coordinates [degrees] of each cell, flattened in the
+            (row-major) order of ``shape``.
+        dims: tuple of str
+            Dimensions of the input indexed by the cells.
+        shape: tuple of int
+            Size of each dimension in ``dims``.
+        """
+        self.dims = tuple(dims)
+        self.shape = tuple(shape)
+        self._lon = np.asarray(lon, dtype=np.float64).ravel()
+        self._lat = np.asarray(lat, dtype=np.float64).ravel()
+        self._tree = cKDTree(unit_vectors(self._lon, self._lat))
+
+    def query(self, lon, lat, k=1):
+        """Nearest ``k`` cells to each point.
+
+        Equidistant cells (e.g. for a point on a cell boundary) are
+        ordered by largest longitude then latitude, which is the
+        choice made by a nearest lookup along each axis.
+
+        Returns
+        -------
+        tuple
+            The great-circle distance [m] to each cell and the
+            positional indexers of the cells along each of ``dims``,
+            keyed by dimension name and suitable for ``isel``. Arrays
+            have shape (n,) if ``k`` is 1, otherwise (n, k).
+        """
+        n = min(k + N_TIE_CANDIDATES, self._tree.n)
+        chord, flat = self._tree.query(unit_vectors(lon, lat), k=n)
+        if n == 1:
+            chord, flat = chord[:, None], flat[:, None]
+        order = np.lexsort(
+            (-self._lat[flat], -self._lon[flat], np.floor(chord / TIE_TOLERANCE))
+        )
+        chord = np.take_along_axis(chord, order, axis=-1)[:, :k]
+        flat = np.take_along_axis(flat, order, axis=-1)[:, :k]
+        if k == 1:
+            chord, flat = chord[:, 0], flat[:, 0]
+        distance = 2 * np.arcsin(np.clip(chord / 2, 0, 1)) * EARTH_RADIUS
+        index = OrderedDict(zip(self.dims, np.unravel_index(flat, self.shape)))
+        return distance, index
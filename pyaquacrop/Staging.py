@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+
+import os
+import json
+import tempfile
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+from .Cache import write_file_atomic
+from .Planning import point_signatures, SimulationPlanBuilder
+from .Weather import (Precipitation,
+                      Temperature,
+                      ET0,
+                      _append_climate_files,
+                      _write_climate_files)
+
+# AquaCrop climate input files written for each point, in the
+# order their values are stacked along the last axis of a block
+CLIMATE_FILES = (
+    ('climate.PLU', slice(0, 1)),
+    ('climate.TMP', slice(1, 3)),
+    ('climate.ETo', slice(3, 4)),
+)
+
+
+def point_directory(directory, xy):
+    """Directory holding the AquaCrop input files of point ``xy``."""
+    return os.path.join(directory, str(xy))
+
+
+def _render(writer):
+    # Render a parameter file once so that its contents can be
+    # copied to every point rather than regenerated
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = os.path.join(tmpdir, 'parameters')
+        writer(filename)
+        with open(filename, 'rb') as f:
+            return f.read()
+
+
+def _prefetch(iterator):
+    # Yield the items of `iterator`, loading each next item in a
+    # background thread while the current one is being written
+    with ThreadPoolExecutor(max_workers=1) as loader:
+        future = loader.submit(next, iterator, None)
+        while True:
+            item = future.result()
+            if item is None:
+                return
+            future = loader.submit(next, iterator, None)
+            yield item
+
+
+def _stage_points(shm_name, shape, dtype, start, stop, xy, directory, headers, parameter_files,
+                  point_files=None, cache=None, append=False, n_existing=None):
+    # Worker: attach to the shared forcing block and write the
+    # input files for points `start:stop` of the block. If the block
+    # only holds the days from `n_existing - 1` on, the climate files
+    # are extended, and the positions within the block of the points
+    # whose files could not be are returned
+    shm = shared_memory.SharedMemory(name=shm_name)
+    stale = set()
+    try:
+        block = np.ndarray(shape, dtype=dtype, buffer=shm.buf)[start:stop]
+        directories = [point_directory(directory, i) for i in xy]
+        for point_dir in directories:
+            os.makedirs(point_dir, exist_ok=True)
+        for (basename, var_slice), header in zip(CLIMATE_FILES, headers):
+            values = block[..., var_slice]
+            if values.shape[-1] == 1:
+                values = values[..., 0]
+            filenames = [os.path.join(d, basename) for d in directories]
+            if n_existing is None:
+                _write_climate_files(filenames, values, header, cache, append)
+            else:
+                stale.update(_append_climate_files(filenames, values, header, n_existing))
+        for basename, contents in parameter_files.items():
+            key = None if cache is None else cache.key(contents)
+            for point_dir in directories:
+                filename = os.path.join(point_dir, basename)
+                if key is not None and cache.fetch(key, filename):
+                    continue
+                write_file_atomic(filename, contents)
+                if key is not None:
+                    cache.store(key, filename)
+        for basename, writer in (point_files or {}).items():
+            for i, point_dir in zip(xy, directories):
+                writer(os.path.join(point_dir, basename), i)
+        del block
+    finally:
+        shm.close()
+    return [start + i for i in sorted(stale)]
+
+
+class InputStager:
+
+    # Period of the staged climate files, written once every file has
+    # been staged
+    STATE_FILENAME = 'staging.json'
+
+    def __init__(self, model, directory, n_workers=None, block_size=None, cache=None, append=False,
+                 deduplicate=False, point_keys=None):
+        """Parallel generation of per-point AquaCrop input files.
+
+        The domain is processed in blocks of points. For each block
+        the main process loads the forcing once into shared memory,
+        and the points are then split across worker processes, which
+        write the input files for their points without any xarray
+        objects being pickled. The next block is loaded while the
+        workers write the current one.
+
+        Parameters
+        ----------
+        model: AquaCrop
+            Model object providing the configuration, domain and time.
+        directory: str
+            Output directory; the files for each point are written
+            to a subdirectory named after its ``xy`` coordinate.
+        n_workers: int, optional
+            Number of worker processes. Defaults to the number of CPUs.
+        block_size: int, optional
+            Number of points loaded into shared memory at a time.
+        cache: InputFileCache, optional
+            Cache of previously generated files. Files whose contents
+            are cached are linked rather than written, and files that
+            are already up to date are not touched.
+        append: bool, optional
+            Extend existing climate files with the days they do not
+            yet contain (e.g. after ``MODEL_TIME.end_time`` is moved
+            forward) instead of rewriting them. Only the forcing of
+            the new days is loaded. ``MODEL_TIME.start_time`` must be
+            that of the staged files.
+        deduplicate: bool, optional
+            Only write the input files of the first point of each
+            group of points with identical inputs, and save a
+            ``SimulationPlan`` mapping every point to the point
+            which is simulated in its place. Cannot be combined with
+            ``append``, as the groups of the extended period may
+            differ from those whose files were staged.
+        point_keys: array_like, optional
+            Further inputs of each point which are not staged here
+            (e.g. a soil, crop or management class), in ``xy`` order.
+            Points are only grouped together if their keys are equal.
+        """
+        if append and deduplicate:
+            raise ValueError('`append` and `deduplicate` cannot both be set')
+        self.model = model
+        self.directory = directory
+        self.cache = cache
+        self.append = append
+        self.deduplicate = deduplicate
+        self.point_keys = None if point_keys is None else np.asarray(point_keys)
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.block_size = (
+            block_size
+            or Precipitation.POINT_BLOCK_SIZE * self.n_workers
+        )
+
+    def _iter_forcing_blocks(self, precipitation, temperature, eto, time_start=0):
+        for (xy, prec), (_, temp), (_, et0) in zip(
+                precipitation.iter_point_blocks(self.block_size, time_start),
+                temperature.iter_point_blocks(self.block_size, time_start),
+                eto.iter_point_blocks(self.block_size, time_start)):
+            yield xy, (prec[..., None], temp, et0[..., None])
+
+    @staticmethod
+    def _load_forcing(precipitation, temperature, eto, index):
+        # Forcing of the points at positions `index` for the whole period
+        return (
+            precipitation._point_values(index)[..., None],
+            temperature._point_values(index),
+            eto._point_values(index)[..., None]
+        )
+
+    def _staged_records(self):
+        # Number of days in the climate files staged by a previous
+        # run, or None if this is not known
+        filename = os.path.join(self.directory, self.STATE_FILENAME)
+        try:
+            with open(filename, 'r') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return None
+        start_time = pd.Timestamp(state['start_time'])
+        model_start_time = pd.Timestamp(self.model.time.values[0])
+        if start_time != model_start_time:
+            raise ValueError(
+                f'Climate files in {self.directory} start on {start_time.date()}, '
+                f'not on `MODEL_TIME.start_time` ({model_start_time.date()}): '
+                'they must be staged without `append`'
+            )
+        return state['n_time']
+
+    def _write_state(self):
+        state = {
+            'start_time': pd.Timestamp(self.model.time.values[0]).isoformat(),
+            'n_time': len(self.model.time.values)
+        }
+        filename = os.path.join(self.directory, self.STATE_FILENAME)
+        write_file_atomic(filename, json.dumps(state, indent=2).encode())
+
+    def stage(self, parameter_files=None, point_files=None):
+        """Write the input files for every point in the domain.
+
+        Parameters
+        ----------
+        parameter_files: dict, optional
+            Files which are the same for every point, mapping the
+            output basename to a writer called with the filename
+            (e.g. ``{'crop.CRO': crop_params._write_aquacrop_input}``).
+            Each file is rendered once and copied by the workers.
+        point_files: dict, optional
+            Files which differ between points (e.g. crop, management
+            or groundwater files of spatially varying parameters),
+            mapping the output basename to a writer called by the
+            workers as ``writer(filename, xy)`` for each of their
+            points. Writers must be picklable, e.g. module-level
+            functions or ``functools.partial`` objects. With
+            ``deduplicate``, points whose files differ must also have
+            different ``point_keys``.
+
+        Returns
+        -------
+        SimulationPlan or None
+            The simulation units if ``deduplicate`` is set, which are
+            also saved in the output directory.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        n_existing = None
+        if self.append:
+            n_existing = self._staged_records()
+            if (n_existing is not None) and (n_existing > len(self.model.time.values)):
+                n_existing = None
+        if os.path.exists(os.path.join(self.directory, self.STATE_FILENAME)):
+            # Until all files are staged their period is not known
+            os.remove(os.path.join(self.directory, self.STATE_FILENAME))
+        time_start = 0 if n_existing is None else max(n_existing - 1, 0)
+        parameter_files = {
+            basename: _render(writer)
+            for basename, writer in (parameter_files or {}).items()
+        }
+        precipitation = Precipitation(self.model)
+        temperature = Temperature(self.model)
+        eto = ET0(self.model)
+        headers = (
+            precipitation.aquacrop_header,
+            temperature.aquacrop_header,
+            eto.aquacrop_header
+        )
+        if self.n_workers > 1:
+            executor = ProcessPoolExecutor(max_workers=self.n_workers)
+        else:
+            executor = None
+        builder = SimulationPlanBuilder() if self.deduplicate else None
+        common = b''.join(
+            basename.encode() + contents
+            for basename, contents in sorted(parameter_files.items())
+        )
+        start = 0
+        try:
+            blocks = self._iter_forcing_blocks(precipitation, temperature, eto, time_start)
+            for xy, arrays in _prefetch(blocks):
+                start += len(xy)
+                if builder is not None:
+                    keys = None
+                    if self.point_keys is not None:
+                        keys = self.point_keys[start - len(xy):start]
+                    signatures = point_signatures(arrays, keys, common)
+                    new = builder.add(xy, signatures)
+                    if len(new) == 0:
+                        continue
+                    xy = xy[new]
+                    arrays = tuple(arr[new] for arr in arrays)
+                stale = self._stage_block(
+                    executor, xy, arrays, headers, parameter_files, point_files, n_existing
+                )
+                if len(stale) > 0:
+                    # Climate files which could not be extended are
+                    # written in full
+                    index = start - len(xy) + np.asarray(stale)
+                    arrays = self._load_forcing(precipitation, temperature, eto, index)
+                    self._stage_block(executor, xy[stale], arrays, headers, {})
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        if self.cache is not None:
+            self.cache.evict()
+        self._write_state()
+        if builder is None:
+            return None
+        plan = builder.plan()
+        plan.save(self.directory)
+        return plan
+
+    def _stage_block(self, executor, xy, arrays, headers, parameter_files, point_files=None,
+                     n_existing=None):
+        n_point = len(xy)
+        n_var = sum(arr.shape[-1] for arr in arrays)
+        shape = (n_point, arrays[0].shape[1], n_var)
+        dtype = np.result_type(*arrays)
+        shm = shared_memory.SharedMemory(
+            create=True, size=max(int(np.prod(shape)) * dtype.itemsize, 1)
+        )
+        try:
+            block = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+            np.concatenate(arrays, axis=-1, out=block)
+            del block
+            bounds = np.linspace(0, n_point, min(self.n_workers, n_point) + 1).astype(int)
+            tasks = [
+                (shm.name, shape, dtype, start, stop, xy[start:stop],
+                 self.directory, headers, parameter_files, point_files,
+                 self.cache, self.append, n_existing)
+                for start, stop in zip(bounds[:-1], bounds[1:])
+            ]
+            if executor is None:
+                results = [_stage_points(*task) for task in tasks]
+            else:
+                futures = [executor.submit(_stage_points, *task) for task in tasks]
+                results = [future.result() for future in futures]
+        finally:
+            shm.close()
+            shm.unlink()
+        return [i for stale in results for i in stale]
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+
+from collections import namedtuple
+
+_Route = namedtuple('_Route', ['inputs', 'func', 'available', 'cost'])
+
+
+class VariableGraph:
+    """Declarative graph of input and derived variables.
+
+    Source variables are read by a loader function, and are only
+    available if their predicate (e.g. a config flag) is true.
+    Derived variables have one or more routes, each a function of
+    other variables. Every route has a cost, by default one for each
+    source read, and of the routes whose inputs are all available
+    the one adding the least cost to the plan is used (variables the
+    plan already holds are free); ties go to the route declared
+    first. Nothing is loaded or computed until a consumer asks for
+    it through ``compute``.
+
+    Example
+    -------
+    >>> graph = VariableGraph()
+    >>> graph.add_source('u', load_u, available=config.has_u)
+    >>> graph.add_source('speed', load_speed, available=config.has_speed)
+    >>> graph.add_derived('wind', ['speed'], lambda speed: speed)
+    >>> graph.add_derived('wind', ['u'], abs)
+    >>> values = graph.compute(['wind'], start, stop)
+    """
+
+    def __init__(self):
+        self._routes = {}
+
+    def add_source(self, name, loader, available=True, cost=1):
+        """Add a source variable, read by ``loader(*args)`` where
+        ``args`` are those given to ``compute``, at cost ``cost``.
+        """
+        self._routes.setdefault(name, []).append(_Route((), loader, available, cost))
+
+    def add_derived(self, name, inputs, func, cost=0):
+        """Add a route to ``name`` computing ``func(*inputs)``, whose
+        cost is ``cost`` plus that of any inputs not otherwise needed.
+        """
+        self._routes.setdefault(name, []).append(_Route(tuple(inputs), func, True, cost))
+
+    def resolve(self, targets):
+        """Return the route chosen for each variable needed to compute
+        ``targets``, as a dict in evaluation order.
+
+        Raises
+        ------
+        KeyError
+            If a target cannot be computed from the available sources.
+        """
+        plan = {}
+        for name in targets:
+            if not self._resolve(name, plan, ()):
+                raise KeyError(f'Variable `{name}` cannot be computed from the available inputs')
+        return plan
+
+    def _resolve(self, name, plan, visiting):
+        if name in plan:
+            return True
+        if (name not in self._routes) or (name in visiting):
+            return False
+        best = None
+        for route in self._routes[name]:
+            available = route.available
+            if callable(available):
+                available = available()
+            if not available:
+                continue
+            # Resolve into a copy so that a route which turns out to
+            # be unavailable leaves no partial entries in the plan
+            trial = dict(plan)
+            if all(self._resolve(x, trial, visiting + (name,)) for x in route.inputs):
+                trial[name] = route
+                cost = sum(x.cost for x in trial.values())
+                if (best is None) or (cost < best[0]):
+                    best = (cost, trial)
+        if best is None:
+            return False
+        plan.clear()
+        plan.update(best[1])
+        return True
+
+    def is_available(self, name):
+        try:
+            self.resolve([name])
+        except KeyError:
+            return False
+        return True
+
+    def sources(self, targets):
+        """Names of the source variables read to compute ``targets``."""
+        return [name for name, route in self.resolve(targets).items() if len(route.inputs) == 0]
+
+    def compute(self, targets, *args):
+        """Compute ``targets``, returning a dict of their values.
+
+        Each variable is computed at most once, and intermediate
+        values are released as soon as their last consumer has been
+        computed, so that only the variables still needed are held
+        in memory.
+        """
+        plan = self.resolve(targets)
+        consumers = {name: 0 for name in plan}
+        for route in plan.values():
+            for x in route.inputs:
+                consumers[x] += 1
+        values = {}
+        for name, route in plan.items():
+            if len(route.inputs) == 0:
+                values[name] = route.func(*args)
+            else:
+                values[name] = route.func(*[values[x] for x in route.inputs])
+                for x in route.inputs:
+                    consumers[x] -= 1
+                    if consumers[x] == 0 and x not in targets:
+                        del values[x]
+        return {name: values[name] for name in targets}
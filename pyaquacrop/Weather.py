@@ -2,46 +2,132 @@
 # -*- coding: utf-8 -*-
 
 import os
+import io
+import stat
+import tempfile
+from abc import ABC, abstractmethod
 import numpy as np
 import pandas as pd
 import xarray
+import dask.array
 from pint.errors import DimensionalityError
 import warnings
 
-from .Domain import get_xr_coordinates
 from .constants import allowed_t_dim_names
+from .utils import fixed_point_lengths, format_fixed_point
+from .units import linear_conversion
+from . import et0
+from .VariableGraph import VariableGraph
+from .Cache import write_file_atomic
+from .DatasetPool import open_dataset
+from .resample import aggregate_daily
+from .tables import open_point_table, table_format
+
+
+def _select_points(x, index, xy, block_size):
+    # Select the cells `index` of `x` for each model point. Dask-backed
+    # inputs are selected `block_size` points at a time from the window
+    # of the grid spanning those points, so that computing a block of
+    # points reads that window of each file rather than whole files
+    if (not isinstance(x.data, dask.array.Array)) or len(xy) <= block_size:
+        starts = [0]
+        block_size = len(xy)
+    else:
+        starts = range(0, len(xy), block_size)
+    pieces = []
+    for start in starts:
+        points = slice(start, start + block_size)
+        window = {
+            dimname: slice(indexer[points].min(), indexer[points].max() + 1)
+            for dimname, indexer in index.items()
+        }
+        select_dict = {
+            dimname: xarray.DataArray(
+                indexer[points] - window[dimname].start,
+                dims='xy',
+                coords={'xy': xy[points]}
+            )
+            for dimname, indexer in index.items()
+        }
+        pieces.append(x.isel(window).isel(select_dict))
+    if len(pieces) == 1:
+        return pieces[0]
+    return xarray.concat(pieces, dim='xy')
+
+
+def _time_dimname(x):
+    # Name of the time dimension of `x`, or None if it has none
+    return next((dim for dim in x.dims if dim in allowed_t_dim_names), None)
 
 
 class SpaceTimeInput:
+
+    # Number of model grid points materialized per compute
+    POINT_BLOCK_SIZE = 1024
+
     def __init__(self,
                  dataarray,
-                 model):
+                 model,
+                 select=True,
+                 config_section=None,
+                 units=None):
 
         self.model = model
-        self._data = self._select(dataarray)
+        self.config_section = config_section
+        self.units = units
+        if select:
+            self._data = self._select(dataarray)
+        else:
+            self._data = dataarray
 
     def initial(self):
         pass
 
     def _select(self, x):
         x = self._select_domain(x)
+        x = self._convert(x)
+        x = self._aggregate_daily(x)
         x = self._select_time(x)
         return x
 
     def _select_domain(self, x):
-        coords = get_xr_coordinates(x)
-        lats = xarray.DataArray(
-            self.model.domain.y,
-            dims='xy',
-            coords={'xy': self.model.domain.xy}
+        config_section = getattr(self, 'config_section', None)
+        if config_section is not None:
+            config = vars(self.model.config)[config_section]
+            if config.regrid == 'bilinear':
+                return self._regrid_domain(x)
+        index = self.model.domain.nearest_grid_index(x)
+        return _select_points(x, index, self.model.domain.xy, self.POINT_BLOCK_SIZE)
+
+    def _regrid_domain(self, x):
+        # Interpolate to the model points with sparse weights, which
+        # are computed once per source grid
+        y_dim, x_dim, weights = self.model.domain.bilinear_grid_weights(
+            x, cache_dir=self.model.config.CACHE.path
         )
-        lons = xarray.DataArray(
-            self.model.domain.x,
-            dims='xy',
-            coords={'xy': self.model.domain.xy}
+        return weights.apply(x, y_dim, x_dim, self.model.domain.xy)
+
+    def _convert(self, x):
+        # Values of a config section are converted as they are read
+        config_section = getattr(self, 'config_section', None)
+        if config_section is None:
+            return x
+        return _convert_dataarray(
+            x, vars(self.model.config)[config_section],
+            self.model.config.dtype, getattr(self, 'units', None)
         )
-        select_dict = {coords['y']: lats, coords['x']: lons}
-        return x.sel(select_dict, method='nearest')
+
+    def _aggregate_daily(self, x):
+        # Reduce sub-daily inputs to daily values after the model
+        # domain has been selected, so only model points are read
+        config_section = getattr(self, 'config_section', None)
+        if config_section is None:
+            return x
+        config = vars(self.model.config)[config_section]
+        if config.interval == 'daily':
+            return x
+        time_range = (self.model.time.values[0], self.model.time.values[-1])
+        return aggregate_daily(x, config.interval, config.aggregation, time_range)
 
     def _select_time(self, x):
         time_dimname = [
@@ -54,12 +140,93 @@ class SpaceTimeInput:
         else:
             return x
 
+    def _xy_position(self, i):
+        if getattr(self, '_xy_index', None) is None:
+            self._xy_index = self._data.indexes['xy']
+        return self._xy_index.get_loc(i)
+
+    def _point_values(self, index, time_start=0):
+        """Values of the points at positions ``index`` (a slice or an
+        array) of the ``xy`` dimension from time point ``time_start``
+        on, read with a single compute as a point-major array.
+        """
+        block = self._data.isel(xy=index)
+        if time_start > 0:
+            block = block.isel({_time_dimname(block): slice(time_start, None)})
+        block = block.transpose('xy', ...)
+        return np.ascontiguousarray(block.values)
+
+    def _load_point_block(self, start, stop, time_start=0):
+        """Materialize points ``start:stop`` from time point
+        ``time_start`` to the end of the simulation period, stored
+        point-major so that each point is a contiguous slice of the
+        block.
+        """
+        self._point_block = self._point_values(slice(start, stop), time_start)
+        self._point_block.flags.writeable = False
+        self._point_block_start = start
+        self._point_block_stop = start + self._point_block.shape[0]
+
     def _select_point(self, i):
-        self._data_subset = self._data.sel(xy=i)
+        pos = self._xy_position(i)
+        start = getattr(self, '_point_block_start', 0)
+        stop = getattr(self, '_point_block_stop', 0)
+        if not (start <= pos < stop):
+            self._load_point_block(pos, pos + self.POINT_BLOCK_SIZE)
+        self._current_values = self._point_block[pos - self._point_block_start]
+
+    def iter_points(self, block_size=None):
+        """Iterate over model grid points in the order of the
+        ``xy`` dimension, yielding ``(xy, values)`` pairs.
+
+        Points are loaded ``block_size`` at a time, and ``values``
+        is a read-only view into the loaded block.
+        """
+        for xy, block in self.iter_point_blocks(block_size):
+            for j in range(block.shape[0]):
+                yield xy[j], block[j]
+
+    def iter_point_blocks(self, block_size=None, time_start=0):
+        """Iterate over blocks of model grid points, yielding
+        ``(xy, values)`` pairs where ``values`` has shape [xy, time]
+        and holds the time points from ``time_start`` on.
+        """
+        if block_size is None:
+            block_size = self.POINT_BLOCK_SIZE
+        xy = self._data['xy'].values
+        for start in range(0, len(xy), block_size):
+            self._load_point_block(start, start + block_size, time_start)
+            yield xy[start:self._point_block_stop], self._point_block
+
+    def iter_time_blocks(self, block_size=None):
+        """Iterate over blocks of time points, yielding
+        ``(start, values)`` pairs where ``values`` has shape
+        [time, xy] and ``start`` is the index of its first time point.
+        """
+        time_dimname = _time_dimname(self._data)
+        data = self._data.transpose(time_dimname, 'xy')
+        n_time = data.sizes[time_dimname]
+        if block_size is None:
+            block_size = n_time
+        for start in range(0, n_time, block_size):
+            block = data.isel({time_dimname: slice(start, start + block_size)})
+            yield start, block.values
+
+    @property
+    def start_time(self):
+        """pandas.Timestamp: First time point of the input."""
+        time_dimname = [
+            key for key in self._data.coords.keys()
+            if key in allowed_t_dim_names
+        ]
+        return pd.Timestamp(self._data[time_dimname[0]].values[0])
 
     @property
     def values(self):
-        return self._data_subset.values
+        """numpy.ndarray: Values of the point chosen with
+        ``_select_point``, or None if no point has been selected.
+        """
+        return getattr(self, '_current_values', None)
 
 # # Function to create SpaceTimeDataArray from file
 # def open_stdataarray(filename, varname, is_1d, xy_dimname, factor=1., offset=0.):
@@ -94,6 +261,179 @@ def _climate_data_header(start_date: pd.Timestamp) -> str:
     return header
 
 
+def _climate_file_header(start_date: pd.Timestamp, description: str) -> str:
+    header = _climate_data_header(start_date)
+    header += description + os.linesep
+    header += "======================="
+    return header
+
+
+def _climate_record_lengths(values):
+    # Length in bytes of each record of point-major `values` as
+    # formatted by `_format_climate_records`, with shape [xy, time]
+    return fixed_point_lengths(values, decimals=2, delimiter="\t", newline=os.linesep)
+
+
+def _format_climate_records(values):
+    # Format point-major values, falling back to savetxt for points
+    # with missing values
+    finite = np.isfinite(values.reshape(values.shape[0], -1)).all(axis=1)
+    records = [None] * values.shape[0]
+    for i, record in zip(np.nonzero(finite)[0], format_fixed_point(values[finite])):
+        records[i] = record
+    for i in np.nonzero(~finite)[0]:
+        f = io.BytesIO()
+        np.savetxt(f, values[i], fmt="%.2f", delimiter="\t", newline=os.linesep)
+        records[i] = f.getvalue()
+    return records
+
+
+# Bytes read from the end of an existing climate file to find its
+# last record
+_CLIMATE_FILE_TAIL_SIZE = 4096
+
+
+def _climate_file_tail(filename, header):
+    # Size and last record of an existing climate file beginning with
+    # `header`, or None if there is no such file that can be extended.
+    # Only the header and the end of the file are read
+    newline = os.linesep.encode()
+    try:
+        with open(filename, "rb") as f:
+            status = os.fstat(f.fileno())
+            if status.st_nlink > 1 or not (status.st_mode & stat.S_IWUSR):
+                # Shared with (or taken from) the input file cache, so
+                # must be replaced
+                return None
+            if f.read(len(header)) != header:
+                return None
+            offset = max(len(header), status.st_size - _CLIMATE_FILE_TAIL_SIZE)
+            f.seek(offset)
+            tail = f.read()
+    except FileNotFoundError:
+        return None
+    size = offset + len(tail)
+    if len(tail) == 0:
+        return size, tail
+    if not tail.endswith(newline):
+        return None
+    lines = tail[:-len(newline)].rsplit(newline, 1)
+    if len(lines) == 1 and offset > len(header):
+        # The last record does not fit in the tail
+        return None
+    return size, lines[-1] + newline
+
+
+def _append_climate_files(filenames, values, header, n_existing=None):
+    # Append the days missing from existing files with a compatible
+    # header, returning the indices of files to be written in full.
+    # The number of records in a file is found from its size, and
+    # checked against its last record. If `n_existing` is given, only
+    # files with that many records are extended, and `values` only
+    # holds the days from the last of these on
+    header = (header + os.linesep).encode()
+    if n_existing is None:
+        first = 0
+        ends = len(header) + np.cumsum(_climate_record_lengths(values), axis=1)
+    else:
+        first = max(n_existing - 1, 0)
+    n_time = first + values.shape[1]
+    rewrite = []
+    extend = {}
+    for i, filename in enumerate(filenames):
+        tail = _climate_file_tail(filename, header)
+        if tail is None:
+            rewrite.append(i)
+            continue
+        size, record = tail
+        if n_existing is not None:
+            n_record = n_existing
+            valid = (size == len(header)) == (n_record == 0)
+        elif size == len(header):
+            n_record = 0
+            valid = True
+        else:
+            n_record = int(np.searchsorted(ends[i], size)) + 1
+            valid = (n_record <= n_time) and (ends[i, n_record - 1] == size)
+        if valid and (n_record <= n_time):
+            extend.setdefault(n_record, {})[i] = record
+        else:
+            rewrite.append(i)
+    # Check the last record of each file against the values of that day
+    for n_record, index in list(extend.items()):
+        if n_record == 0:
+            continue
+        expected = _format_climate_records(values[list(index), n_record - 1 - first][:, None])
+        for (i, record), last in zip(list(index.items()), expected):
+            if record != last:
+                rewrite.append(i)
+                del index[i]
+    for n_record, index in extend.items():
+        index = list(index)
+        if (n_record == n_time) or (len(index) == 0):
+            continue
+        records = _format_climate_records(values[index, n_record - first:])
+        for i, record in zip(index, records):
+            with open(filenames[i], "ab") as f:
+                f.write(record)
+    return sorted(rewrite)
+
+
+def _extend_climate_files(filenames, values):
+    # Append point-major `values` to existing climate files
+    records = _format_climate_records(values)
+    for filename, record in zip(filenames, records):
+        with open(filename, "ab") as f:
+            f.write(record)
+    return None
+
+
+def _write_climate_files(filenames, values, header, cache=None, append=False):
+    # `values` is point-major, with shape [xy, time] or [xy, time, var]
+    values = np.asarray(values)
+    todo = range(len(filenames))
+    if append:
+        todo = _append_climate_files(filenames, values, header)
+    if cache is not None:
+        keys = {i: cache.key(header, "%.2f", values[i]) for i in todo}
+        todo = [i for i in todo if not cache.fetch(keys[i], filenames[i])]
+    if len(todo) == 0:
+        return None
+    header = (header + os.linesep).encode()
+    records = _format_climate_records(values[todo])
+    for i, record in zip(todo, records):
+        write_file_atomic(filenames[i], header + record)
+        if cache is not None:
+            cache.store(keys[i], filenames[i])
+    return None
+
+
+def write_climate_files(values, filenames, header, cache=None, append=False):
+    """Write AquaCrop climate files for many points at once.
+
+    Parameters
+    ----------
+    values: numpy.ndarray
+        Array with shape [time, xy] or [time, xy, var].
+    filenames: list of str
+        Output filename for each point.
+    header: str
+        File header shared by all points, as returned by
+        ``_climate_file_header``.
+    cache: InputFileCache, optional
+        If given, files whose contents are already cached are linked
+        from the cache instead of being written.
+    append: bool, optional
+        If True, existing files with the same header (i.e. the same
+        start date and variables) are extended with the days they do
+        not yet contain, rather than being rewritten.
+    """
+    values = np.moveaxis(np.asarray(values), 1, 0)
+    if values.shape[0] != len(filenames):
+        raise ValueError('`filenames` must have one entry per point')
+    _write_climate_files(filenames, values, header, cache, append)
+
+
 def _open_dataarray(config, config_section):
 
     # Retrieve values from config
@@ -101,52 +441,144 @@ def _open_dataarray(config, config_section):
     varname = vars(config)[config_section].varname
     # is_1d = vars(config)[config_section].is_1d
     # xy_dimname = vars(config)[config_section].xy_dimname
-    factor = vars(config)[config_section].factor
-    offset = vars(config)[config_section].offset
-
-    # Open dataset then select dataarray
-    if isinstance(filename, str):
-        filename = [filename]
-    ds = xarray.open_mfdataset(filename)
-    da = ds[varname]
-
-    # Apply factor/offset
-    attr_dict = da.attrs
-    da = (da * factor) + offset
+
+    # Open the files overlapping the model period (shared with other
+    # variables in the same files) then select dataarray
+    time_range = (config.MODEL_TIME.start_time, config.MODEL_TIME.end_time)
+    ds = open_dataset(filename, time_range=time_range, cache_dir=config.CACHE.path)
+    return ds[varname]
+
+
+def _convert_dataarray(da, section_config, dtype, units=None):
+    # Apply factor/offset (and the unit conversion, if any). This is
+    # done after the model domain has been selected: reads of a block
+    # of points are only narrowed to a window of each file if no
+    # arithmetic lies between the selection and the files
+    factor, offset, attr_dict = _linear_transform(section_config, da.attrs, units)
+    da = ((da * factor) + offset).astype(dtype, copy=False)
     da.attrs.update(**attr_dict)
     return da
 
 
-def open_spacetimeinput(model, config_section, convert_units=False, units=None):
-    da = _open_dataarray(model.config, config_section)
-    if convert_units:
+def _linear_transform(section_config, attrs, units=None):
+    # Factor/offset of a config section with the unit conversion,
+    # if any, folded in, and the attributes of the converted values
+    factor = section_config.factor
+    offset = section_config.offset
+    attr_dict = dict(attrs)
+    if units is not None:
         try:
-            da = da.metpy.convert_units(units).metpy.dequantify()
+            unit_factor, unit_offset = linear_conversion(
+                attr_dict.get('units', ''), units
+            )
         except DimensionalityError as e:
             warnings.warn(str(e))
-    return SpaceTimeInput(da, model)
+        else:
+            factor, offset = factor * unit_factor, offset * unit_factor + unit_offset
+            attr_dict.update(units=units)
+    return factor, offset, attr_dict
 
 
-class Precipitation(SpaceTimeInput):
+def _is_point_table(config, config_section):
+    return table_format(vars(config)[config_section].filename) is not None
 
-    def __init__(self, model):
-        self.model = model
-        dataarray = _open_dataarray(model.config, 'PREC')
-        self._data = self._select(dataarray)
+
+def _open_point_table(model, config_section, units=None):
+    # Values of a Parquet/Arrow point table, read directly onto the
+    # model domain and period
+    config = vars(model.config)[config_section]
+    if config.xy_dimname is None:
+        raise ValueError(
+            f'`{config_section}` section must have `is_1d` set to true and '
+            '`xy_dimname` set to the point id column of the table'
+        )
+    da = open_point_table(
+        config.filename, config.varname, config.xy_dimname,
+        config.time_column, model.domain.xy, model.time.values,
+        dtype=model.config.dtype, interval=config.interval
+    )
+    factor, offset, attr_dict = _linear_transform(config, da.attrs, units)
+    if (factor != 1) or (offset != 0):
+        # Values viewed in the table buffers are read-only
+        values = da.values if da.values.flags.writeable else da.values.copy()
+        values *= factor
+        values += offset
+        da = da.copy(data=values)
+    da.attrs.update(**attr_dict)
+    if config.interval != 'daily':
+        time_range = (model.time.values[0], model.time.values[-1])
+        da = aggregate_daily(da, config.interval, config.aggregation, time_range).compute()
+    return da
+
+
+def _in_forcing_store(model, config_section):
+    store = getattr(model, 'forcing_store', None)
+    return (store is not None) and (config_section in store.variables)
+
+
+def open_spacetimeinput(model, config_section, convert_units=False, units=None):
+    if _in_forcing_store(model, config_section):
+        # Values in the store are already on the model domain, in model units
+        da = model.forcing_store.dataarray(config_section)
+        return SpaceTimeInput(da, model, select=False)
+    if not convert_units:
+        units = None
+    if _is_point_table(model.config, config_section):
+        da = _open_point_table(model, config_section, units=units)
+        return SpaceTimeInput(da, model, select=False)
+    da = _open_dataarray(model.config, config_section)
+    return SpaceTimeInput(da, model, config_section=config_section, units=units)
+
+
+class _ClimateInput:
+    """Writer of the AquaCrop climate files of a forcing input.
+
+    Subclasses give the column description of the file header in
+    ``DESCRIPTION``, and provide ``start_time``, ``values`` (the
+    columns of the current point) and ``iter_point_blocks``.
+    """
+
+    DESCRIPTION = None
+
+    @property
+    def aquacrop_header(self):
+        return _climate_file_header(self.start_time, self.DESCRIPTION)
 
     def _write_aquacrop_input(self, filename):
-        header = _climate_data_header(pd.Timestamp(self._data_subset.time.values[0]))
-        header += "  Total Rain (mm)" + os.linesep
-        header += "======================="
-        with open(filename, "w") as f:
-            np.savetxt(
-                f, self.values, fmt="%.2f", delimiter="\t",
-                newline=os.linesep, header=header, comments=""
-            )
+        _write_climate_files([filename], self.values[None], self.aquacrop_header)
         return None
 
+    def _write_aquacrop_inputs(self, filenames, block_size=None, cache=None, append=False):
+        header = self.aquacrop_header
+        start = 0
+        for xy, block in self.iter_point_blocks(block_size):
+            stop = start + len(xy)
+            _write_climate_files(filenames[start:stop], block, header, cache, append)
+            start = stop
+        return None
+
+
+class Precipitation(_ClimateInput, SpaceTimeInput):
+
+    DESCRIPTION = "  Total Rain (mm)"
+
+    def __init__(self, model):
+        self.model = model
+        self.config_section = 'PREC'
+        self.units = None
+        if _in_forcing_store(model, 'PREC'):
+            self._data = model.forcing_store.dataarray('PREC')
+        elif _is_point_table(model.config, 'PREC'):
+            self._data = _open_point_table(model, 'PREC')
+        else:
+            dataarray = _open_dataarray(model.config, 'PREC')
+            self._data = self._select(dataarray)
+
+
+class Temperature(_ClimateInput):
+
+    DESCRIPTION = "  Tmin (C)   Tmax (C)"
 
-class Temperature:
     def __init__(self, model):
         self.tmin = open_spacetimeinput(
             model, 'TMIN',
@@ -160,55 +592,151 @@ class Temperature:
     @property
     def values(self):
         return np.column_stack(
-            (self.tmin._data_subset.values,
-             self.tmax._data_subset.values)
+            (self.tmin.values,
+             self.tmax.values)
         )
 
     def _select_point(self, i):
         self.tmin._select_point(i)
         self.tmax._select_point(i)
 
-    def _write_aquacrop_input(self, filename):
-        header = _climate_data_header(pd.Timestamp(self.tmin._data_subset.time.values[0]))
-        header += "  Tmin (C)   Tmax (C)" + os.linesep
-        header += "======================="
-        with open(filename, "w") as f:
-            np.savetxt(
-                f, self.values, fmt="%.2f", delimiter='\t',
-                newline=os.linesep, header=header, comments=""
-            )
-        return None
+    def _point_values(self, index, time_start=0):
+        return np.stack(
+            (self.tmin._point_values(index, time_start),
+             self.tmax._point_values(index, time_start)),
+            axis=-1
+        )
+
+    def iter_point_blocks(self, block_size=None, time_start=0):
+        """Iterate over blocks of model grid points, yielding
+        ``(xy, values)`` pairs where ``values`` has shape
+        [xy, time, 2] holding Tmin and Tmax.
+        """
+        for (xy, tmin), (_, tmax) in zip(
+                self.tmin.iter_point_blocks(block_size, time_start),
+                self.tmax.iter_point_blocks(block_size, time_start)):
+            yield xy, np.stack((tmin, tmax), axis=-1)
+
+    @property
+    def start_time(self):
+        return self.tmin.start_time
+
+
+# Source variables of the ET0 input graph, as (name, config section,
+# units); each is available if the `use` entry of its section is true
+_ET0_SOURCES = [
+    ('tmin', 'TMIN', 'degree_Celsius'),
+    ('tmax', 'TMAX', 'degree_Celsius'),
+    ('shortwave_radiation', 'SWDOWN', 'MJ m**-2'),
+    ('dewpoint_temperature', 'TDEW', 'degree_Celsius'),
+    ('max_relative_humidity', 'RHMAX', 'percent'),
+    ('min_relative_humidity', 'RHMIN', 'percent'),
+    ('mean_relative_humidity', 'RHMEAN', 'percent'),
+    ('wind_u', 'WIND_U', 'm s**-1'),
+    ('wind_v', 'WIND_V', 'm s**-1'),
+    ('wind_speed', 'WIND', 'm s**-1'),
+    ('input_surface_pressure', 'SP', 'kilopascal'),
+    ('elevation', 'ELEV', None),
+]
+
+
+def _surface_pressure_from_elevation(elevation):
+    return 101.3 * ((293. - 0.0065 * elevation) / 293) ** 5.26
 
 
 class _ET0_InputData:
     def __init__(self, model):
         self.model = model
-        # User-supplied:
-        self.tmin = None
-        self.tmax = None
-        self.shortwave_radiation = None
-        self.dewpoint_temperature = None
-        self.max_relative_humidity = None
-        self.min_relative_humidity = None
-        self.mean_relative_humidity = None
-        self.surface_pressure = None
-        # Computed:
-        self.extraterrestrial_radiation = None
-        self.saturated_vapour_pressure = None
-        self.actual_vapour_pressure = None
-        self.net_radiation = None
+        self.graph = None
+        self._dataarrays = {}
+        self._extraterrestrial_radiation_table = None
 
     def initial(self):
-        self._load_tmin()
-        self._load_tmax()
-        self._load_shortwave_radiation()
-        self._load_dewpoint_temperature()
-        self._load_max_relative_humidity()
-        self._load_min_relative_humidity()
-        self._load_mean_relative_humidity()
-        self._load_wind_speed()
-        self._load_surface_pressure()
-        self._compute_penman_monteith_inputs()
+        # Nothing is read here: inputs are opened when the graph
+        # first needs them, so unused variables cost no I/O
+        self.graph = self._build_graph()
+
+    def _open(self, section, units=None):
+        # Input `section` on the model domain and period (lazy)
+        if section not in self._dataarrays:
+            self._dataarrays[section] = open_spacetimeinput(
+                self.model, section,
+                convert_units=(units is not None), units=units
+            )._data
+        return self._dataarrays[section]
+
+    @property
+    def template(self):
+        """xarray.DataArray: Minimum temperature, with time as the
+        first dimension, whose dims and coordinates are those of the
+        computed quantities.
+        """
+        template = self._open('TMIN', 'degree_Celsius')
+        return template.transpose(_time_dimname(template), ...)
+
+    def _block_loader(self, section, units):
+        def load(start, stop):
+            x = self._open(section, units)
+            # Space dimensions, following time if `x` has it
+            dims = [dim for dim in self.template.dims[1:] if dim in x.dims]
+            time_dimname = _time_dimname(x)
+            if time_dimname is not None:
+                x = x.isel({time_dimname: slice(start, stop)})
+                dims = [time_dimname] + dims
+            return x.transpose(*dims).values
+        return load
+
+    def _build_graph(self):
+        """Graph of the quantities required by the ET0 methods,
+        evaluated one block of time points at a time, i.e.
+        ``graph.compute(names, start, stop)``.
+
+        Of the available routes to a variable the cheapest is used,
+        e.g. wind speed is read rather than derived from its
+        components if both are given. FAO-56 only recommends equations
+        18 and 19 for actual vapour pressure if the inputs of
+        equations 14 and 17 are missing, so these routes are given an
+        extra cost: the order of preference is FAO equation 14, 17, 18
+        then 19.
+        """
+        config = self.model.config
+        graph = VariableGraph()
+        for name, section, units in _ET0_SOURCES:
+            graph.add_source(
+                name, self._block_loader(section, units),
+                available=(lambda section=section: bool(vars(config)[section].use))
+            )
+        graph.add_source(
+            'extraterrestrial_radiation',
+            self._extraterrestrial_radiation_values
+        )
+        graph.add_derived(
+            'wind', ['wind_u', 'wind_v'],
+            lambda u, v: np.sqrt(u ** 2 + v ** 2)
+        )
+        graph.add_derived('wind', ['wind_speed'], lambda x: x)
+        graph.add_derived('surface_pressure', ['input_surface_pressure'], lambda x: x)
+        graph.add_derived('surface_pressure', ['elevation'], _surface_pressure_from_elevation)
+        # Humidity inputs from which `et0` computes actual vapour pressure
+        graph.add_derived(
+            'humidity', ['max_relative_humidity', 'min_relative_humidity'],
+            lambda rhmax, rhmin: dict(max_relative_humidity=rhmax, min_relative_humidity=rhmin)
+        )
+        graph.add_derived(
+            'humidity', ['max_relative_humidity'],
+            lambda rhmax: dict(max_relative_humidity=rhmax),
+            cost=2
+        )
+        graph.add_derived(
+            'humidity', ['mean_relative_humidity'],
+            lambda rhmean: dict(mean_relative_humidity=rhmean),
+            cost=2
+        )
+        graph.add_derived(
+            'humidity', ['dewpoint_temperature'],
+            lambda tdew: dict(dewpoint_temperature=tdew)
+        )
+        return graph
 
     # def _select_domain(self, x):
     #     coords = get_xr_coordinates(x)
@@ -236,417 +764,165 @@ class _ET0_InputData:
     #     else:
     #         return x
 
-    def _load_tmin(self):
-        tmin = open_spacetimeinput(
-            self.model, 'TMIN',
-            convert_units=True, units="degree_Celsius"
-        )
-        self.tmin = tmin._data
-
-    def _load_tmax(self):
-        tmax = open_spacetimeinput(
-            self.model, 'TMAX',
-            convert_units=True, units="degree_Celsius"
-        )
-        self.tmax = tmax._data
-
-    def _load_shortwave_radiation(self):
-        self.shortwave_radiation = None
-        if self.model.config.has_solar_radiation:
-            shortwave_radiation = open_spacetimeinput(
-                self.model, 'SWDOWN',
-                convert_units=True, units="MJ m**-2"
-            )
-            self.shortwave_radiation = shortwave_radiation._data
-
-    def _load_dewpoint_temperature(self):
-        self.dewpoint_temperature = None
-        if self.model.config.has_dewpoint_temperature:
-            dewpoint_temperature = open_spacetimeinput(
-                self.model, 'TDEW',
-                convert_units=True, units="degree_Celsius"
-            )
-            self.dewpoint_temperature = dewpoint_temperature._data
-
-    def _load_max_relative_humidity(self):
-        self.max_relative_humidity = None
-        if self.model.config.has_max_relative_humidity:
-            max_relative_humidity = open_spacetimeinput(
-                self.model, 'RHMAX',
-                convert_units=True, units="percent"
-            )
-            self.max_relative_humidity = max_relative_humidity._data
-
-    def _load_min_relative_humidity(self):
-        self.min_relative_humidity = None
-        if self.model.config.has_min_relative_humidity:
-            min_relative_humidity = open_spacetimeinput(
-                self.model, 'RHMIN',
-                convert_units=True, units="percent"
-            )
-            self.min_relative_humidity = min_relative_humidity._data
-
-    def _load_mean_relative_humidity(self):
-        self.mean_relative_humidity = None
-        if self.model.config.has_mean_relative_humidity:
-            mean_relative_humidity = open_spacetimeinput(
-                self.model, 'RHMEAN',
-                convert_units=True, units="percent"
-            )
-            self.mean_relative_humidity = mean_relative_humidity._data
-
-    def _load_wind_speed(self):
-        if self.model.config.has_wind:
-            if self.model.config.use_wind_components:
-                wind_u = _open_dataarray(
-                    self.model.config, 'WIND_U',
-                )
-                wind_v = _open_dataarray(
-                    self.model.config, 'WIND_V',
-                )
-                try:
-                    wind_u = wind_u.metpy.convert_units("m s**-1").metpy.dequantify()
-                    wind_v = wind_v.metpy.convert_units("m s**-1").metpy.dequantify()
-                except DimensionalityError as e:
-                    warnings.warn(str(e))
-
-                wind = np.sqrt(wind_u ** 2 + wind_v ** 2)
-                wind = SpaceTimeInput(wind, self.model)
-            else:
-                wind = open_spacetimeinput(
-                    self.model, 'WIND',
-                    convert_units=True, units="m s**-1"
-                )
-            self.wind = wind._data
-
-    def _load_surface_pressure(self):
-        if self.model.config.has_surface_pressure:
-            surface_pressure = open_spacetimeinput(
-                self.model, 'SP',
-                convert_units=True, units="kilopascal"
+    def _extraterrestrial_radiation_values(self, start=None, stop=None):
+        # Extraterrestrial radiation as a numpy array [time, space]
+        # for time points `start:stop` of the simulation period
+        if self._extraterrestrial_radiation_table is None:
+            self._extraterrestrial_radiation_table = et0.ExtraterrestrialRadiationTable(
+                self.model.domain.point_y,
+                cache_dir=self.model.config.CACHE.path
             )
+        days = np.asarray(self.model.time.doy)[start:stop]
+        # The table itself is kept in double precision
+        extraterrestrial_radiation = self._extraterrestrial_radiation_table.values(days)
+        return extraterrestrial_radiation.astype(self.model.config.dtype, copy=False)
 
-        elif self.model.config.has_elevation:
-            elevation = _open_dataarray(
-                self.model, 'ELEV'
-            )
-            surface_pressure = (
-                101.3 * ((293. - 0.0065 * elevation._data) / 293) ** 5.26
-            )
-            surface_pressure.attrs.update(units='kilopascal')
-            surface_pressure = SpaceTimeInput(surface_pressure, self.model)
-        self.surface_pressure = surface_pressure._data
-
-    def _compute_penman_monteith_inputs(self):
-        self._compute_mean_temperature()
-        self._compute_saturated_vapour_pressure()
-        self._compute_actual_vapour_pressure()
-        self._compute_vapour_pressure_deficit()
-        self._compute_extraterrestrial_radiation()
-        self._compute_net_radiation()
-
-    def _compute_mean_temperature(self):
-        self.tmean = (self.tmin + self.tmax) / 2
-
-    def _compute_extraterrestrial_radiation(self):
-        """Compute extraterrestrial radiation (MJ m-2 d-1)"""
-        latitude = self.model.domain.y
-        if self.model.domain.is_2d:
-            # Broadcast to 2D
-            latitude = (
-                latitude[:, None] *
-                np.ones(self.model.domain.nx)  # lat, lon
-            )
 
-        days = self.model.time.doy
-        LatRad = latitude * np.pi / 180.0
-        declin = 0.4093 * (
-            np.sin(((2.0 * np.pi * days) / 365.) - 1.405)
-        )
+class _ET0_Method(ABC):
+    """Base class of the ET0 methods, which compute reference ET from
+    the ET0 input graph one block of time points at a time.
 
-        # Broadcast so that arccosInput has dims (time, space)
-        arccosInput = (-(np.tan(LatRad[None, ...])) * (np.tan(declin[..., None])))
-        arccosInput = np.clip(arccosInput, -1, 1)
-        sunangle = np.arccos(arccosInput)
-        distsun = 1 + 0.033 * (np.cos((2 * np.pi * days) / 365.0))
-        extraterrestrial_radiation = (
-            ((24 * 60 * 0.082) / np.pi)
-            * distsun[..., None]
-            * (sunangle
-               * (np.sin(LatRad[None, ...]))
-               * (np.sin(declin[..., None]))
-               + (np.cos(LatRad[None, ...]))
-               * (np.cos(declin)[..., None])
-               * (np.sin(sunangle)))
-        )
+    Subclasses list the graph variables they need in ``INPUTS`` (and
+    those used if available in ``OPTIONAL_INPUTS``), and implement
+    ``_kernel``, which is called with their values for one block.
+    """
 
-        # Now create DataArray
-        space_coords = {
-            key: (
-                self.model.domain._data.coords[key].dims,
-                self.model.domain._data.coords[key].values
+    INPUTS = []
+    OPTIONAL_INPUTS = []
+
+    # Number of block-sized scratch arrays used by `_kernel`
+    SCRATCH = 0
+
+    def __init__(self, model, compute=True):
+        self.model = model
+        self.data = _ET0_InputData(model)
+        self.data.initial()
+        # Fail early if a required input is missing
+        self.data.graph.resolve(self.INPUTS)
+        self.eto = None
+        if compute:
+            self.compute()
+
+    @property
+    def _variables(self):
+        return self.INPUTS + [
+            x for x in self.OPTIONAL_INPUTS if self.data.graph.is_available(x)
+        ]
+
+    @abstractmethod
+    def _kernel(self, **inputs):
+        """Reference ET for one block of time points, with shape
+        [time, space], from the values of the input variables."""
+
+    def time_block_size(self):
+        """Number of time points computed at once, as set by the
+        ``time_block_size`` and ``memory_budget`` entries of the
+        ``ET0`` config section (by default the whole period).
+        """
+        config = self.model.config.ET0
+        template = self.data.template
+        n_time = template.sizes[_time_dimname(template)]
+        block_size = config.time_block_size or n_time
+        if config.memory_budget is not None:
+            # Bytes per time point: the variables read from the input
+            # graph, the result and the kernel scratch buffers
+            n_space = template.size // n_time
+            n_field = len(self.data.graph.sources(self._variables))
+            n_field += 1 + self.SCRATCH
+            itemsize = np.dtype(template.dtype).itemsize
+            block_size = min(
+                block_size,
+                max(1, config.memory_budget // (n_field * n_space * itemsize))
             )
-            for key in self.model.domain._data.coords
-        }
-        time_coords = {'time': self.model.time.values}
-        coords = {**time_coords, **space_coords}
-        dims = ['time'] + [dim for dim in self.model.domain._data.dims]
-        extraterrestrial_radiation = xarray.DataArray(
-            data=extraterrestrial_radiation,
-            coords=coords,
-            dims=dims,
-            name='extraterrestrial_radiation'
-        )
-        extraterrestrial_radiation.attrs.update(units='MJ m**-2')
-        self.extraterrestrial_radiation = extraterrestrial_radiation
-
-    def _compute_vapour_pressure_deficit(self):
-        # self._compute_saturated_vapour_pressure()
-        # self._compute_actual_vapour_pressure()
-        vpd = self.saturated_vapour_pressure - self.actual_vapour_pressure
-        vpd = vpd.clip(0, None)
-        self.vapour_pressure_deficit = vpd
-
-    def _compute_saturated_vapour_pressure(self):
-        es_min = self._fao_equation_11(self.tmin)
-        es_max = self._fao_equation_11(self.tmax)
-        self.saturated_vapour_pressure = (es_min + es_max) / 2.
-
-    def _compute_actual_vapour_pressure(self):
-        if self.can_use_fao_equation_14():
-            self.compute_actual_vapour_pressure_from_dewpoint_temperature()
-        if self.can_use_fao_equation_17():
-            self.compute_actual_vapour_pressure_from_min_max_relative_humidity()
-        elif self.can_use_fao_equation_18():
-            self.compute_actual_vapour_pressure_from_max_relative_humidity()
-        elif self.can_use_fao_equation_19():
-            self.compute_actual_vapour_pressure_from_mean_relative_humidity()
-        elif self.model.config.has_specific_humidity:
-            self.compute_actual_vapour_pressure_from_specific_humidity()
-
-    def _compute_net_radiation(self):
-        # requirements:
-        # -------------
-        # extraterrestrial_radiation
-        # shortwave_radiation
-        # tmin, tmax
-        # actual_vapour_pressure
-        #
-        # TODO check units
-        alpha = 0.23  # albedo, 0.23 [-]
-        sigma = 4.903e-9  # stephan boltzmann [W m-2 K-4]
-
-        # Clear sky solar radiation [MJ d-1]
-        R_s = self.shortwave_radiation
-        # FIXME this should include elevation
-        R_so = (0.75 + (2 * 0.00005)) * self.extraterrestrial_radiation
-        R_so = R_so.clip(0.1, None)
-        R_ns = (1 - alpha) * self.shortwave_radiation
-        ea = self.actual_vapour_pressure
-        ea = ea.clip(0, None)
-        tmax_K = self.tmax + 273.15
-        tmin_K = self.tmin + 273.15
-        R_nl = (
-            - sigma
-            * ((tmax_K ** 4 + tmin_K ** 4) / 2)
-            * (0.34 - 0.14 * np.sqrt(ea))
-            * (1.35 * np.minimum(1, (R_s / R_so)) - 0.35)
-        )
-        R_n = np.maximum(0, R_ns + R_nl)
-        R_n.attrs = {}
-        R_n.attrs.update(
-            long_name='net outgoing longwave radiation',
-            units='megajoule / meter ** 2',
-            standard_name='net_upward_longwave_flux_in_air'
-        )
-        self.net_radiation = R_n
+        return block_size
 
-    @staticmethod
-    def _fao_equation_11(T):
-        return (
-            0.6108 * np.exp((17.27 + T) / (T + 237.3))
+    def iter_time_blocks(self, block_size=None):
+        """Compute reference ET one block of time points at a time,
+        yielding ``(start, values)`` pairs where ``values`` has shape
+        [time, space]. Only the inputs for the current block are
+        loaded. ``block_size`` is limited by ``time_block_size()``.
+        """
+        template = self.data.template
+        n_time = template.sizes[_time_dimname(template)]
+        limit = self.time_block_size()
+        block_size = limit if block_size is None else min(block_size, limit)
+        variables = self._variables
+        for start in range(0, n_time, block_size):
+            stop = min(start + block_size, n_time)
+            yield start, self._kernel(**self.data.graph.compute(variables, start, stop))
+
+    def compute(self):
+        """Compute reference ET for the whole period as ``self.eto``."""
+        template = self.data.template
+        eto = np.empty(template.shape, dtype=self.model.config.dtype)
+        for start, values in self.iter_time_blocks():
+            eto[start:(start + values.shape[0])] = values
+        self.eto = xarray.DataArray(
+            eto,
+            coords=template.coords,
+            dims=template.dims,
+            name='eto'
         )
 
-    def compute_actual_vapour_pressure_from_dewpoint_temperature(self):
-        ea = self._fao_equation_11(self.dewpoint_temperature)
-        # print(self.dewpoint_temperature.values)
-        # print(ea.values)
-        ea.attrs = {}
-        ea.attrs.update(
-            long_name='actual vapour pressure',
-            units='kPa',
-            standard_name='water_vapor_partial_pressure_in_air'
-        )
-        self.actual_vapour_pressure = ea
-
-    def compute_actual_vapour_pressure_from_min_max_relative_humidity(self):
-        es_min = self._fao_equation_11(self.tmin)
-        es_max = self._fao_equation_11(self.tmax)
-        ea = (
-            (es_min * self.max_relative_humidity.values / 100.)
-            + (es_max * self.min_relative_humidity.values / 100.)
-        ) / 2
-        ea.attrs = {}
-        ea.attrs.update(
-            long_name='actual vapour pressure',
-            units='kPa',
-            standard_name='water_vapor_partial_pressure_in_air'
-        )
-        self.actual_vapour_pressure = ea
 
-    def compute_actual_vapour_pressure_from_max_relative_humidity(self):
-        es_min = self._fao_equation_11(self.tmin)
-        ea = (
-            es_min
-            * self.max_relative_humidity.values / 100.
-        )
-        ea.attrs = {}
-        ea.attrs.update(
-            long_name='actual vapour pressure',
-            units='kPa',
-            standard_name='water_vapor_partial_pressure_in_air'
-        )
-        self.actual_vapour_pressure = ea
+class _ET0_Hargreaves(_ET0_Method):
+    """Hargreaves method, which requires temperature only."""
 
-    def compute_actual_vapour_pressure_from_mean_relative_humidity(self):
-        ea = (
-            self.saturated_vapour_pressure * self.mean_relative_humidity.values / 100.
-        )
-        ea.attrs = {}
-        ea.attrs.update(
-            long_name='actual vapour pressure',
-            units='kPa',
-            standard_name='water_vapor_partial_pressure_in_air'
-        )
-        self.actual_vapour_pressure = ea
-
-    # def compute_actual_vapour_pressure_from_specific_humidity(self):
-    #     """Compute actual vapour pressure given specific
-    #     humidity, using equations from Bolton (1980);
-    #     """
-    #     def ea(Pres, Q, eps):
-    #         return (Q * Pres) / ((1 - eps) * Q + eps)
-
-    #     eps = 0.622  # ratio of water vapour/dry air molecular weights [-]
-    #     self.actual_vapour_pressure = ea(
-    #         self.surface_pressure,
-    #         self.specific_humidity,
-    #         eps
-    #     )
+    INPUTS = ['tmin', 'tmax', 'extraterrestrial_radiation']
+    SCRATCH = et0.HARGREAVES_SCRATCH
 
-    def can_use_fao_equation_14(self):
-        return self.model.config.has_dewpoint_temperature
+    def _kernel(self, **inputs):
+        return et0.hargreaves(**inputs)
 
-    def can_use_fao_equation_17(self):
-        return (
-            self.model.config.has_min_daily_temperature
-            and self.model.config.has_max_daily_temperature
-            and self.model.config.has_min_relative_humidity
-            and self.model.config.has_max_relative_humidity
-        )
 
-    def can_use_fao_equation_18(self):
-        return (
-            self.model.config.has_min_daily_temperature
-            and self.model.config.has_max_relative_humidity
-        )
+class _ET0_PriestleyTaylor(_ET0_Method):
+    """Priestley-Taylor method, which requires temperature, shortwave
+    radiation and humidity. Surface pressure is used if available.
+    """
 
-    def can_use_fao_equation_19(self):
-        return (
-            self.model.config.has_max_daily_temperature
-            and self.model.config.has_min_daily_temperature
-            and self.model.config.has_mean_relative_humidity
-        )
+    INPUTS = [
+        'tmin', 'tmax', 'shortwave_radiation', 'extraterrestrial_radiation',
+        'humidity'
+    ]
+    OPTIONAL_INPUTS = ['surface_pressure']
+    SCRATCH = et0.PRIESTLEY_TAYLOR_SCRATCH
 
+    def _kernel(self, humidity, **inputs):
+        return et0.priestley_taylor(**inputs, **humidity)
 
-class _ET0_PenmanMonteith:
-    def __init__(self, model):
-        self.data = _ET0_InputData(model)
-        self.data.initial()
-        self.penman_monteith()
+
+class _ET0_PenmanMonteith(_ET0_Method):
+
+    # Variables of the input graph passed to `et0.penman_monteith`
+    INPUTS = [
+        'tmin', 'tmax', 'shortwave_radiation', 'extraterrestrial_radiation',
+        'wind', 'surface_pressure', 'humidity'
+    ]
+    SCRATCH = et0.PENMAN_MONTEITH_SCRATCH
 
     def check_minimum_data_requirements(self):
-        return True
+        return self.data.graph.is_available('humidity')
+
+    def _kernel(self, humidity, **inputs):
+        return et0.penman_monteith(**inputs, **humidity)
 
     def penman_monteith(self):
         """Function implementing the Penman-Monteith
         equation (*NOT* FAO version) - TODO make FAO version
 
+        The equation is evaluated by the fused kernel
+        ``et0.penman_monteith`` on numpy arrays one block of time at
+        a time, without building the intermediate quantities as
+        full-size DataArrays.
+
         Data requirements:
-        * Tmean
-        * vapour pressure deficit
+        * Tmin, Tmax
+        * humidity (dewpoint temperature or relative humidity)
+        * shortwave radiation
+        * wind speed
         * surface pressure
-        * net radiation
         """
-
-        tmean = self.data.tmean
-        surface_pressure = self.data.surface_pressure
-        wind = self.data.wind
-        vapour_pressure_deficit = self.data.vapour_pressure_deficit
-        net_radiation = self.data.net_radiation
-
-        # # For identifying bugs
-        # Load eto object in scratch
-        # tmean = eto._input_data.tmean
-        # surface_pressure = eto._input_data.surface_pressure
-        # wind = eto._input_data.wind
-        # vapour_pressure_deficit = eto._input_data.vapour_pressure_deficit
-        # net_radiation = eto._input_data.net_radiation
-
-        # TODO check units throughout
-
-        cp = 0.001013               # specific heat of air 1013 [MJ kg-1 K-1]
-        TimeStepSecs = 86400        # timestep in seconds
-        rs = 70                     # surface resistance, 70 [s m-1]
-        R = 287.058                 # Universal gas constant [J kg-1 K-1]
-        # ratio of water vapour/dry air molecular weights [-]
-        eps = 0.622
-
-        # Density of air [kg m-3]
-        rho = surface_pressure * (tmean * R)
-
-        # Latent heat [MJ kg-1]
-        latent_heat = (2.501 - (0.002361 * (tmean - 273.15)))
-
-        # Slope of vapour pressure [kPa K-1]
-        deltop = 4098. * \
-            (0.6108 * np.exp((17.27 * tmean) / (tmean + 237.3)))
-        delbase = (tmean + 237.3) ** 2
-        delta = deltop / delbase
-
-        # Psychrometric constant [kPa K-1]
-        gamma = cp * surface_pressure / (eps * latent_heat)
-
-        # Aerodynamic resistance [m s-1]
-        z = 10  # height of wind speed variable (10 meters above surface)
-        Wsp_2 = wind * 4.87 / (np.log(67.8 * z - 5.42))
-        ra = np.divide(
-            208.,
-            Wsp_2.values,
-            out=np.zeros_like(Wsp_2.values),
-            where=Wsp_2 != 0
-        )
-
-        PETtop = np.maximum(
-            ((delta * 1e3)
-             * net_radiation
-             + rho
-             * (cp * 1e6)
-             * np.divide(
-                 vapour_pressure_deficit.values,
-                 ra,
-                 out=np.zeros_like(ra),
-                 where=ra != 0)),
-            1)
-
-        PETbase = np.maximum(
-            ((delta * 1e3)
-             + (gamma * 1e3)
-             * (1 + np.divide(rs, ra, out=np.zeros_like(ra), where=ra != 0))),
-            1)
-        PET = np.maximum(PETtop / PETbase, 0)
-        PETmm = np.maximum((PET / (latent_heat * 1e6) * TimeStepSecs), 0)
-        self.eto = PETmm.copy()
+        self.compute()
 
     # def initial(self):
     #     pass
@@ -682,66 +958,105 @@ class _ET0_FromFile:
 #         return None
 
 
-class ET0(SpaceTimeInput):
+class ET0(_ClimateInput, SpaceTimeInput):
+
+    DESCRIPTION = "  Average ETo (mm/day)"
 
     def __init__(self, model):
         self.model = model
+        self._method = None
+        if _in_forcing_store(model, 'ET0'):
+            self._input_data = None
+            self._eto = model.forcing_store.dataarray('ET0')
+            return
         preprocess = bool(model.config.ET0.preprocess)
         if preprocess:
+            # In streaming mode reference ET is computed block by
+            # block when it is written, rather than held in memory
+            compute = not self.stream
             method = str(model.config.ET0.method).lower()
             if method == "hargreaves":
-                eto_obj = _ET0_Hargreaves(model)
+                eto_obj = _ET0_Hargreaves(model, compute=compute)
             elif method == "penmanmonteith":
-                eto_obj = _ET0_PenmanMonteith(model)
+                eto_obj = _ET0_PenmanMonteith(model, compute=compute)
             elif method == "priestleytaylor":
-                eto_obj = _ET0_PriestleyTaylor(model)
+                eto_obj = _ET0_PriestleyTaylor(model, compute=compute)
             else:
                 raise ValueError("Invalid `method` in config: must be one of `Hargreaves`, `PenmanMonteith`, `PriestleyTaylor`")
+            self._method = eto_obj
+            self._input_data = eto_obj.data
+            self._eto = eto_obj.eto
         else:
-            eto_obj = open_spacetimeinput(model, 'ET0')
-        self._input_data = eto_obj.data
-        self._data = eto_obj.eto
-
-    def _write_aquacrop_input(self, filename):
-        header = _climate_data_header(pd.Timestamp(self._data_subset.time.values[0]))
-        header += "  Average ETo (mm/day)" + os.linesep
-        header += "======================="
-        with open(filename, "w") as f:
-            np.savetxt(
-                f, self.values, fmt="%.2f", delimiter="\t",
-                newline=os.linesep, header=header, comments=""
-            )
-        return None
+            # Read from file like the other forcing variables
+            self._input_data = None
+            self._eto = open_spacetimeinput(model, 'ET0')._data
 
+    @property
+    def stream(self):
+        """bool: Whether reference ET is computed in blocks of time
+        as it is written (``stream = true`` in the ``ET0`` section).
+        """
+        return bool(self.model.config.ET0.preprocess) and bool(self.model.config.ET0.stream)
 
-# class _ET0_Hargreaves:
-#     def __init__(self, config):
-#         pass
-
-#     def initial(self):
-#         pass
-
-#     def select(self):
-#         pass
-
-#     @property
-#     def values(self):
-#         pass
-
-
-# class _ET0_PriestleyTaylor:
-#     def __init__(self, config):
-#         pass
-
-#     def initial(self):
-#         pass
+    @property
+    def _data(self):
+        if self._eto is None:
+            # Streaming mode, but whole points have been requested
+            self._eto = self._spill()
+        return self._eto
+
+    def _spill(self):
+        # Compute reference ET one block of time at a time into a
+        # point-major array on disk (in the cache directory, if any),
+        # so that the whole period is never held in memory
+        template = self._method.data.template
+        directory = self.model.config.CACHE.path
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        with tempfile.TemporaryFile(dir=directory) as f:
+            eto = np.memmap(
+                f, dtype=self.model.config.dtype, mode='w+',
+                shape=template.shape[1:] + template.shape[:1]
+            )
+        for start, values in self._method.iter_time_blocks():
+            eto[..., start:(start + values.shape[0])] = np.moveaxis(values, 0, -1)
+        return xarray.DataArray(
+            eto,
+            coords=template.coords,
+            dims=template.dims[1:] + template.dims[:1],
+            name='eto'
+        )
 
-#     def select(self):
-#         pass
+    @property
+    def start_time(self):
+        if self._eto is None:
+            template = self._method.data.template
+            return pd.Timestamp(template[_time_dimname(template)].values[0])
+        return super().start_time
+
+    def iter_time_blocks(self, block_size=None):
+        if self._eto is None:
+            yield from self._method.iter_time_blocks(block_size)
+        else:
+            yield from super().iter_time_blocks(block_size)
+
+    def _write_aquacrop_inputs(self, filenames, block_size=None, cache=None, append=False):
+        if (self._eto is None) and (cache is None) and (not append):
+            return self._stream_aquacrop_inputs(filenames)
+        return super()._write_aquacrop_inputs(filenames, block_size, cache, append)
+
+    def _stream_aquacrop_inputs(self, filenames):
+        # Write the files for all points one block of time at a time:
+        # the first block creates the files, later blocks extend them
+        header = self.aquacrop_header
+        for start, block in self.iter_time_blocks():
+            values = np.ascontiguousarray(block.T)
+            if start == 0:
+                _write_climate_files(filenames, values, header)
+            else:
+                _extend_climate_files(filenames, values)
+        return None
 
-#     @property
-#     def values(self):
-#         pass
 
 # class ET0_PenmanMonteith:
 #     def __init__(self, config):
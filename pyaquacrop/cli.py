@@ -2,12 +2,27 @@
 import sys
 import click
 
+from .AquaCrop import AquaCrop
+from .ForcingStore import prepare_forcing_store
 
-@click.command()
-def main(args=None):
+
+@click.group(invoke_without_command=True)
+@click.pass_context
+def main(ctx, args=None):
     """Console script for pyaquacrop."""
-    click.echo("Replace this message by putting your code into " "pyaquacrop.cli.main")
-    click.echo("See click documentation at https://click.palletsprojects.com/")
+    if ctx.invoked_subcommand is None:
+        click.echo("Replace this message by putting your code into " "pyaquacrop.cli.main")
+        click.echo("See click documentation at https://click.palletsprojects.com/")
+    return 0
+
+
+@main.command()
+@click.argument('configfile', type=click.Path(exists=True))
+def prepare(configfile):
+    """Write the model forcing to a point-major store."""
+    model = AquaCrop(configfile)
+    store = prepare_forcing_store(model)
+    click.echo("Forcing store written to " + store.path)
     return 0
 
 
@@ -176,6 +176,9 @@ controlled_dim_names = allowed_y_dim_names + \
 
 intervals = ['hourly', 'three_hourly', 'daily', 'dekadal', 'month', 'year']
 methods = ['mean', 'max', 'min', 'end', 'total']
+
+# Number of time steps per day of sub-daily input intervals
+steps_per_day = {'hourly': 24, 'three_hourly': 8, 'daily': 1}
 allowed_reporting_options = []
 allowed_summary_options = []
 for interval in intervals:
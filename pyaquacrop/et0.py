@@ -0,0 +1,544 @@
+#!/usr/bin/env python3
+
+import os
+import io
+import hashlib
+import numpy as np
+
+from .Cache import write_file_atomic
+
+# Number of array elements in each scratch buffer used by the
+# blocked kernels (8 MiB per buffer at float64)
+DEFAULT_BLOCK_ELEMENTS = 2 ** 20
+
+# Number of scratch buffers used by each kernel
+PENMAN_MONTEITH_SCRATCH = 7
+PRIESTLEY_TAYLOR_SCRATCH = 5
+HARGREAVES_SCRATCH = 1
+
+# Physical constants used by the Penman-Monteith equation
+ALBEDO = 0.23                   # albedo [-]
+STEFAN_BOLTZMANN = 4.903e-9     # stephan boltzmann [W m-2 K-4]
+SPECIFIC_HEAT = 0.001013        # specific heat of air 1013 [MJ kg-1 K-1]
+TIMESTEP_SECS = 86400           # timestep in seconds
+SURFACE_RESISTANCE = 70         # surface resistance, 70 [s m-1]
+GAS_CONSTANT = 287.058          # Universal gas constant [J kg-1 K-1]
+EPSILON = 0.622                 # ratio of water vapour/dry air molecular weights [-]
+WIND_HEIGHT = 10                # height of wind speed variable [m]
+
+# Constants used by the Hargreaves and Priestley-Taylor equations (FAO-56)
+RADIATION_TO_EVAPORATION = 0.408    # MJ m-2 d-1 to mm d-1 [kg MJ-1]
+LATENT_HEAT = 2.45                  # latent heat of vaporization [MJ kg-1]
+PSYCHROMETRIC_COEFFICIENT = 0.665e-3  # gamma / P [degC-1]
+STANDARD_SURFACE_PRESSURE = 101.3   # surface pressure at sea level [kPa]
+PRIESTLEY_TAYLOR_ALPHA = 1.26       # Priestley-Taylor coefficient [-]
+
+
+def _time_blocks(n_time, n_space, block_size=None):
+    if block_size is None:
+        block_size = max(1, DEFAULT_BLOCK_ELEMENTS // max(n_space, 1))
+    for start in range(0, n_time, block_size):
+        yield start, min(start + block_size, n_time)
+
+
+def _block(x, start, stop):
+    # Inputs may be full [time, space] arrays or broadcastable along
+    # time (e.g. a constant surface pressure)
+    if np.ndim(x) < 2 or np.shape(x)[0] == 1:
+        return x
+    return np.asarray(x[start:stop])
+
+
+def _fao_equation_11(T, out, tmp):
+    # Saturation vapour pressure in the form used by the original
+    # Penman-Monteith implementation, which is kept so that its
+    # results do not change; new kernels use
+    # `_saturation_vapour_pressure`
+    np.add(T, 17.27, out=out)
+    np.add(T, 237.3, out=tmp)
+    np.divide(out, tmp, out=out)
+    np.exp(out, out=out)
+    np.multiply(out, 0.6108, out=out)
+    return out
+
+
+def _saturation_vapour_pressure(T, out, tmp):
+    # Saturation vapour pressure [kPa] (FAO equation 11)
+    np.multiply(T, 17.27, out=out)
+    np.add(T, 237.3, out=tmp)
+    np.divide(out, tmp, out=out)
+    np.exp(out, out=out)
+    np.multiply(out, 0.6108, out=out)
+    return out
+
+
+def _actual_vapour_pressure(es_min, es_max, out, tmp,
+                            dewpoint_temperature=None,
+                            max_relative_humidity=None,
+                            min_relative_humidity=None,
+                            mean_relative_humidity=None,
+                            saturation_vapour_pressure=_fao_equation_11):
+    # The FAO equation used depends on the humidity inputs given,
+    # i.e. on the route chosen by the ET0 input graph
+    if (max_relative_humidity is not None) and (min_relative_humidity is not None):
+        # FAO equation 17
+        np.multiply(es_min, max_relative_humidity, out=out)
+        np.divide(out, 100., out=out)
+        np.multiply(es_max, min_relative_humidity, out=tmp)
+        np.divide(tmp, 100., out=tmp)
+        np.add(out, tmp, out=out)
+        np.divide(out, 2, out=out)
+    elif max_relative_humidity is not None:
+        # FAO equation 18
+        np.multiply(es_min, max_relative_humidity, out=out)
+        np.divide(out, 100., out=out)
+    elif mean_relative_humidity is not None:
+        # FAO equation 19
+        np.add(es_min, es_max, out=out)
+        np.divide(out, 2., out=out)
+        np.multiply(out, mean_relative_humidity, out=out)
+        np.divide(out, 100., out=out)
+    elif dewpoint_temperature is not None:
+        # FAO equation 14
+        saturation_vapour_pressure(dewpoint_temperature, out, tmp)
+    else:
+        raise ValueError(
+            'Computing actual vapour pressure requires dewpoint '
+            'temperature or relative humidity'
+        )
+    return out
+
+
+def extraterrestrial_radiation(latitude, days):
+    """Extraterrestrial radiation (MJ m-2 d-1).
+
+    Parameters
+    ----------
+    latitude: numpy.ndarray
+        Latitude [degrees] of each point in space.
+    days: numpy.ndarray
+        Day of year of each time point.
+
+    Returns
+    -------
+    numpy.ndarray
+        Array with dims (time, space).
+    """
+    days = np.asarray(days)
+    LatRad = np.asarray(latitude) * np.pi / 180.0
+    declin = 0.4093 * (
+        np.sin(((2.0 * np.pi * days) / 365.) - 1.405)
+    )
+
+    # Broadcast so that arccosInput has dims (time, space)
+    arccosInput = (-(np.tan(LatRad[None, ...])) * (np.tan(declin[..., None])))
+    arccosInput = np.clip(arccosInput, -1, 1)
+    sunangle = np.arccos(arccosInput)
+    distsun = 1 + 0.033 * (np.cos((2 * np.pi * days) / 365.0))
+    return (
+        ((24 * 60 * 0.082) / np.pi)
+        * distsun[..., None]
+        * (sunangle
+           * (np.sin(LatRad[None, ...]))
+           * (np.sin(declin[..., None]))
+           + (np.cos(LatRad[None, ...]))
+           * (np.cos(declin)[..., None])
+           * (np.sin(sunangle)))
+    )
+
+
+class ExtraterrestrialRadiationTable:
+    """Extraterrestrial radiation for each day of the year and each
+    unique latitude of a domain.
+
+    Ra depends only on latitude and day of year, so rather than
+    evaluating it for every (time, space) cell it is computed once
+    for at most 366 x n_unique_latitudes values, from which the
+    values for any set of days are taken by indexing.
+
+    Parameters
+    ----------
+    latitude: numpy.ndarray
+        Latitude [degrees] of each point in space.
+    cache_dir: str, optional
+        Directory in which the table is saved, so that it can be
+        reused by later runs over the same latitudes.
+    """
+
+    N_DAYS = 366
+
+    def __init__(self, latitude, cache_dir=None):
+        latitude = np.asarray(latitude, dtype=np.float64)
+        self.latitudes, inverse = np.unique(latitude, return_inverse=True)
+        self._inverse = inverse.reshape(latitude.shape)
+        self._trivial = (
+            latitude.ndim == 1
+            and len(self.latitudes) == len(latitude)
+            and np.array_equal(self.latitudes, latitude)
+        )
+        self.table = self._load(cache_dir)
+
+    def _compute(self):
+        days = np.arange(1, self.N_DAYS + 1)
+        return extraterrestrial_radiation(self.latitudes, days)
+
+    def _load(self, cache_dir):
+        if cache_dir is None:
+            return self._compute()
+        digest = hashlib.blake2b(self.latitudes.tobytes(), digest_size=16).hexdigest()
+        filename = os.path.join(
+            cache_dir, 'extraterrestrial_radiation', digest + '.npy'
+        )
+        try:
+            return np.load(filename)
+        except (FileNotFoundError, ValueError):
+            pass
+        table = self._compute()
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        f = io.BytesIO()
+        np.save(f, table)
+        write_file_atomic(filename, f.getvalue())
+        return table
+
+    def values(self, days):
+        """Extraterrestrial radiation (MJ m-2 d-1) with dims
+        (time, space) for the given days of year.
+        """
+        rows = self.table[np.asarray(days) - 1]
+        if self._trivial:
+            return rows
+        return rows[:, self._inverse]
+
+
+def _net_radiation(tmin, tmax, shortwave_radiation, extraterrestrial_radiation, ea, out, tmp1, tmp2):
+    # Net radiation (FAO equations 37 to 40); overwrites `ea` and
+    # the temporary arrays
+    np.maximum(ea, 0, out=ea)
+    np.sqrt(ea, out=ea)
+    np.multiply(ea, 0.14, out=ea)
+    np.subtract(0.34, ea, out=ea)
+    np.multiply(extraterrestrial_radiation, (0.75 + (2 * 0.00005)), out=tmp1)
+    np.maximum(tmp1, 0.1, out=tmp1)
+    np.divide(shortwave_radiation, tmp1, out=tmp1)
+    np.minimum(tmp1, 1, out=tmp1)
+    np.multiply(tmp1, 1.35, out=tmp1)
+    np.subtract(tmp1, 0.35, out=tmp1)
+    np.add(tmax, 273.15, out=out)
+    np.power(out, 4, out=out)
+    np.add(tmin, 273.15, out=tmp2)
+    np.power(tmp2, 4, out=tmp2)
+    np.add(out, tmp2, out=out)
+    np.divide(out, 2, out=out)
+    np.multiply(out, -STEFAN_BOLTZMANN, out=out)
+    np.multiply(out, ea, out=out)
+    np.multiply(out, tmp1, out=out)
+    np.multiply(shortwave_radiation, (1 - ALBEDO), out=tmp1)
+    np.add(tmp1, out, out=out)
+    np.maximum(out, 0, out=out)
+    return out
+
+
+def _allocate(tmin, out, block_size, n_scratch):
+    # Output array, time blocks and scratch buffers for a kernel
+    n_time, n_space = np.shape(tmin)
+    if out is None:
+        out = np.empty((n_time, n_space), dtype=np.result_type(tmin, np.float32))
+    blocks = list(_time_blocks(n_time, n_space, block_size))
+    n_block = (blocks[0][1] - blocks[0][0]) if len(blocks) > 0 else 0
+    scratch = np.empty((n_scratch, n_block, n_space), dtype=out.dtype)
+    return out, blocks, scratch
+
+
+def hargreaves(tmin, tmax, extraterrestrial_radiation, out=None, block_size=None):
+    """Reference evapotranspiration from the Hargreaves equation
+    (FAO-56 equation 52), which requires temperature only.
+
+    Parameters
+    ----------
+    tmin, tmax: numpy.ndarray
+        Minimum and maximum daily temperature [degC], shape [time, space].
+    extraterrestrial_radiation: numpy.ndarray
+        Extraterrestrial radiation [MJ m-2 d-1], shape [time, space].
+    out: numpy.ndarray, optional
+        Array in which to place the result.
+    block_size: int, optional
+        Number of time steps evaluated at once.
+
+    Returns
+    -------
+    numpy.ndarray
+        Reference evapotranspiration [mm d-1], shape [time, space].
+    """
+    out, blocks, scratch = _allocate(tmin, out, block_size, HARGREAVES_SCRATCH)
+    for start, stop in blocks:
+        s1, = scratch[:, :(stop - start)]
+        Tn = _block(tmin, start, stop)
+        Tx = _block(tmax, start, stop)
+        Ra = _block(extraterrestrial_radiation, start, stop)
+        dest = out[start:stop]
+        # sqrt(Tmax - Tmin)
+        np.subtract(Tx, Tn, out=s1)
+        np.maximum(s1, 0, out=s1)
+        np.sqrt(s1, out=s1)
+        # Tmean + 17.8
+        np.add(Tn, Tx, out=dest)
+        np.divide(dest, 2, out=dest)
+        np.add(dest, 17.8, out=dest)
+        np.multiply(dest, s1, out=dest)
+        # Ra as equivalent evaporation [mm d-1]
+        np.multiply(dest, Ra, out=dest)
+        np.multiply(dest, 0.0023 * RADIATION_TO_EVAPORATION, out=dest)
+        np.maximum(dest, 0, out=dest)
+    return out
+
+
+def priestley_taylor(tmin,
+                     tmax,
+                     shortwave_radiation,
+                     extraterrestrial_radiation,
+                     surface_pressure=None,
+                     dewpoint_temperature=None,
+                     max_relative_humidity=None,
+                     min_relative_humidity=None,
+                     mean_relative_humidity=None,
+                     out=None,
+                     block_size=None):
+    """Reference evapotranspiration from the Priestley-Taylor
+    equation, with the radiation terms of ``penman_monteith`` but
+    no wind speed.
+
+    Parameters
+    ----------
+    tmin, tmax: numpy.ndarray
+        Minimum and maximum daily temperature [degC], shape [time, space].
+    shortwave_radiation: numpy.ndarray
+        Incoming shortwave radiation [MJ m-2 d-1].
+    extraterrestrial_radiation: numpy.ndarray
+        Extraterrestrial radiation [MJ m-2 d-1], shape [time, space].
+    surface_pressure: numpy.ndarray, optional
+        Surface pressure [kPa]. Defaults to the standard atmosphere.
+    dewpoint_temperature, max_relative_humidity, min_relative_humidity,
+    mean_relative_humidity: numpy.ndarray, optional
+        Humidity inputs, as for ``penman_monteith``.
+    out: numpy.ndarray, optional
+        Array in which to place the result.
+    block_size: int, optional
+        Number of time steps evaluated at once.
+
+    Returns
+    -------
+    numpy.ndarray
+        Reference evapotranspiration [mm d-1], shape [time, space].
+    """
+    out, blocks, scratch = _allocate(tmin, out, block_size, PRIESTLEY_TAYLOR_SCRATCH)
+    if surface_pressure is None:
+        surface_pressure = STANDARD_SURFACE_PRESSURE
+    humidity = dict(
+        dewpoint_temperature=dewpoint_temperature,
+        max_relative_humidity=max_relative_humidity,
+        min_relative_humidity=min_relative_humidity,
+        mean_relative_humidity=mean_relative_humidity
+    )
+    for start, stop in blocks:
+        s1, s2, s3, s4, s5 = scratch[:, :(stop - start)]
+        Tn = _block(tmin, start, stop)
+        Tx = _block(tmax, start, stop)
+        Rs = _block(shortwave_radiation, start, stop)
+        Ra = _block(extraterrestrial_radiation, start, stop)
+        P = _block(surface_pressure, start, stop)
+        rh = {
+            key: (None if value is None else _block(value, start, stop))
+            for key, value in humidity.items()
+        }
+
+        # Net radiation [MJ m-2 d-1]: s4 <- Rn
+        _saturation_vapour_pressure(Tn, s1, s3)
+        _saturation_vapour_pressure(Tx, s2, s3)
+        _actual_vapour_pressure(
+            s1, s2, s3, s4, saturation_vapour_pressure=_saturation_vapour_pressure, **rh
+        )
+        _net_radiation(Tn, Tx, Rs, Ra, s3, s4, s2, s5)
+
+        # Slope of vapour pressure curve [kPa degC-1]: s1 <- delta
+        np.add(Tn, Tx, out=s5)
+        np.divide(s5, 2, out=s5)
+        np.add(s5, 237.3, out=s2)
+        np.multiply(s5, 17.27, out=s1)
+        np.divide(s1, s2, out=s1)
+        np.exp(s1, out=s1)
+        np.multiply(s1, 0.6108 * 4098., out=s1)
+        np.power(s2, 2, out=s2)
+        np.divide(s1, s2, out=s1)
+
+        # Psychrometric constant [kPa degC-1] (FAO-56 eq. 8): s2 <- gamma
+        np.multiply(P, PSYCHROMETRIC_COEFFICIENT, out=s2)
+
+        # alpha * delta / (delta + gamma) * Rn / lambda
+        dest = out[start:stop]
+        np.add(s1, s2, out=s2)
+        np.divide(s1, s2, out=s1)
+        np.multiply(s1, s4, out=dest)
+        np.multiply(dest, PRIESTLEY_TAYLOR_ALPHA / LATENT_HEAT, out=dest)
+        np.maximum(dest, 0, out=dest)
+    return out
+
+
+def penman_monteith(tmin,
+                    tmax,
+                    shortwave_radiation,
+                    extraterrestrial_radiation,
+                    wind,
+                    surface_pressure,
+                    dewpoint_temperature=None,
+                    max_relative_humidity=None,
+                    min_relative_humidity=None,
+                    mean_relative_humidity=None,
+                    out=None,
+                    block_size=None):
+    """Reference evapotranspiration from the Penman-Monteith equation.
+
+    This is a fused implementation of ``_ET0_InputData`` and
+    ``_ET0_PenmanMonteith``. The computation proceeds in blocks of
+    time steps, reusing a fixed set of scratch buffers, so that peak
+    memory is the inputs and output plus a few block-sized arrays.
+
+    Parameters
+    ----------
+    tmin, tmax: numpy.ndarray
+        Minimum and maximum daily temperature [degC], shape [time, space].
+    shortwave_radiation: numpy.ndarray
+        Incoming shortwave radiation [MJ m-2 d-1].
+    extraterrestrial_radiation: numpy.ndarray
+        Extraterrestrial radiation [MJ m-2 d-1], shape [time, space].
+    wind: numpy.ndarray
+        Wind speed at 10 m [m s-1].
+    surface_pressure: numpy.ndarray
+        Surface pressure [kPa].
+    dewpoint_temperature, max_relative_humidity, min_relative_humidity,
+    mean_relative_humidity: numpy.ndarray, optional
+        Humidity inputs; at least one route to actual vapour
+        pressure (FAO equations 14, 17, 18, 19) must be available.
+    out: numpy.ndarray, optional
+        Array in which to place the result.
+    block_size: int, optional
+        Number of time steps evaluated at once.
+
+    Returns
+    -------
+    numpy.ndarray
+        Reference evapotranspiration [mm d-1], shape [time, space].
+
+    Notes
+    -----
+    The saturation vapour pressure (``_fao_equation_11``, i.e.
+    0.6108 exp((T + 17.27) / (T + 237.3))) and the air density
+    (P T R) are those of the original implementation rather than
+    FAO-56 equation 11 and the ideal gas law, and are kept on purpose
+    so that the reference ET of existing setups does not change.
+    ``priestley_taylor`` uses FAO-56 equation 11, so the two methods
+    do not share their vapour pressure.
+    """
+    out, blocks, scratch = _allocate(tmin, out, block_size, PENMAN_MONTEITH_SCRATCH)
+    valid = np.empty(scratch.shape[1:], dtype=bool)
+    humidity = dict(
+        dewpoint_temperature=dewpoint_temperature,
+        max_relative_humidity=max_relative_humidity,
+        min_relative_humidity=min_relative_humidity,
+        mean_relative_humidity=mean_relative_humidity
+    )
+    log_wind = np.log(67.8 * WIND_HEIGHT - 5.42)
+
+    for start, stop in blocks:
+        n = stop - start
+        s1, s2, s3, s4, s5, s6, s7 = scratch[:, :n]
+        m = valid[:n]
+        Tn = _block(tmin, start, stop)
+        Tx = _block(tmax, start, stop)
+        Rs = _block(shortwave_radiation, start, stop)
+        Ra = _block(extraterrestrial_radiation, start, stop)
+        U = _block(wind, start, stop)
+        P = _block(surface_pressure, start, stop)
+        rh = {
+            key: (None if value is None else _block(value, start, stop))
+            for key, value in humidity.items()
+        }
+
+        # Vapour pressure [kPa]: s1 <- es_min, s2 <- es_max, s3 <- ea
+        _fao_equation_11(Tn, s1, s3)
+        _fao_equation_11(Tx, s2, s3)
+        _actual_vapour_pressure(s1, s2, s3, s4, **rh)
+
+        # Vapour pressure deficit: s1 <- vpd
+        np.add(s1, s2, out=s1)
+        np.divide(s1, 2., out=s1)
+        np.subtract(s1, s3, out=s1)
+        np.maximum(s1, 0, out=s1)
+
+        # Net radiation [MJ m-2 d-1]: s4 <- Rn
+        _net_radiation(Tn, Tx, Rs, Ra, s3, s4, s2, s5)
+
+        # Mean temperature: s5 <- tmean
+        np.add(Tn, Tx, out=s5)
+        np.divide(s5, 2, out=s5)
+
+        # Density of air [kg m-3], as in the original implementation
+        # (see Notes): s2 <- rho
+        np.multiply(s5, GAS_CONSTANT, out=s2)
+        np.multiply(P, s2, out=s2)
+
+        # Latent heat [MJ kg-1]: s3 <- latent_heat
+        np.subtract(s5, 273.15, out=s3)
+        np.multiply(s3, 0.002361, out=s3)
+        np.subtract(2.501, s3, out=s3)
+
+        # Slope of vapour pressure [kPa K-1], scaled by 1e3: s5 <- delta
+        np.add(s5, 237.3, out=s6)
+        np.multiply(s5, 17.27, out=s5)
+        np.divide(s5, s6, out=s5)
+        np.exp(s5, out=s5)
+        np.multiply(s5, 0.6108, out=s5)
+        np.multiply(s5, 4098., out=s5)
+        np.power(s6, 2, out=s6)
+        np.divide(s5, s6, out=s5)
+        np.multiply(s5, 1e3, out=s5)
+
+        # Psychrometric constant [kPa K-1]: s6 <- gamma
+        np.multiply(P, SPECIFIC_HEAT, out=s6)
+        np.multiply(s3, EPSILON, out=s7)
+        np.divide(s6, s7, out=s6)
+
+        # Aerodynamic resistance [s m-1]: s7 <- ra
+        np.multiply(U, 4.87, out=s7)
+        np.divide(s7, log_wind, out=s7)
+        np.not_equal(s7, 0, out=m)
+        np.divide(208., s7, out=s7, where=m)
+        np.not_equal(s7, 0, out=m)
+
+        # Numerator: s4 <- PETtop
+        np.multiply(s4, s5, out=s4)
+        np.multiply(s2, SPECIFIC_HEAT * 1e6, out=s2)
+        np.divide(s1, s7, out=s1, where=m)
+        np.copyto(s1, 0, where=~m)
+        np.multiply(s2, s1, out=s2)
+        np.add(s4, s2, out=s4)
+        np.maximum(s4, 1, out=s4)
+
+        # Denominator: s6 <- PETbase
+        np.divide(SURFACE_RESISTANCE, s7, out=s1, where=m)
+        np.copyto(s1, 0, where=~m)
+        np.add(s1, 1, out=s1)
+        np.multiply(s6, 1e3, out=s6)
+        np.multiply(s6, s1, out=s6)
+        np.add(s5, s6, out=s6)
+        np.maximum(s6, 1, out=s6)
+
+        # Reference ET [mm d-1]
+        dest = out[start:stop]
+        np.divide(s4, s6, out=s4)
+        np.maximum(s4, 0, out=s4)
+        np.multiply(s3, 1e6, out=s3)
+        np.divide(s4, s3, out=s4)
+        np.multiply(s4, TIMESTEP_SECS, out=s4)
+        np.maximum(s4, 0, out=dest)
+
+    return out
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+
+import os
+import io
+import hashlib
+import numpy as np
+import xarray
+import dask.array
+import scipy.sparse
+
+from .Cache import write_file_atomic
+
+# Increment when the weights or their file layout change
+WEIGHTS_VERSION = 2
+
+
+def _axis_weights(source, target, period=None):
+    # Positions of the two source cells either side of each target
+    # coordinate and the weight of the second one. Targets beyond the
+    # edge cell centres but within the edge cells take the value of
+    # the edge cell; targets outside the grid are an error. If
+    # `period` is given the axis is cyclic (e.g. longitude):
+    # coordinates are compared modulo `period`, and on a grid covering
+    # the whole circle targets between the last and first cells are
+    # interpolated across the seam.
+    source = np.asarray(source, dtype=np.float64)
+    target = np.asarray(target, dtype=np.float64)
+    n = source.size
+    if n == 1:
+        zeros = np.zeros(target.shape, dtype=np.int64)
+        return zeros, zeros, np.zeros(target.shape)
+    if period is not None:
+        source = np.unwrap(source, period=period)
+    cells = np.arange(n)
+    if source[0] > source[-1]:
+        source, cells = source[::-1], cells[::-1]
+    spacing = np.diff(source)
+    lower_edge = source[0] - spacing[0] / 2
+    upper_edge = source[-1] + spacing[-1] / 2
+    is_global = (
+        period is not None
+        and source[0] + period - source[-1] <= spacing.max() * (1 + 1e-6)
+    )
+    if is_global:
+        target = source[0] + np.mod(target - source[0], period)
+        source = np.append(source, source[0] + period)
+        cells = np.append(cells, cells[0])
+        lower_edge, upper_edge = -np.inf, np.inf
+    elif period is not None:
+        # The discontinuity is put opposite the middle of the grid
+        middle = (source[0] + source[-1]) / 2
+        target = middle + np.mod(target - middle + period / 2, period) - period / 2
+    outside = (target < lower_edge) | (target > upper_edge)
+    if np.any(outside):
+        raise ValueError(
+            f'{np.count_nonzero(outside)} target coordinates (e.g. '
+            f'{target[outside][0]}) are outside the source grid, which '
+            f'spans {lower_edge} to {upper_edge}'
+        )
+    position = np.interp(target, source, np.arange(source.size, dtype=np.float64))
+    lower = np.minimum(np.floor(position).astype(np.int64), source.size - 2)
+    fraction = position - lower
+    return cells[lower], cells[lower + 1], fraction
+
+
+class RegridWeights:
+    """Sparse weights from the cells of a source grid to model points.
+
+    Only the window of the source grid containing cells with non-zero
+    weights is used, so that cells outside it are never read.
+
+    Parameters
+    ----------
+    matrix: scipy.sparse.csr_matrix
+        Weights with shape (n_points, ny * nx), where ny and nx are
+        the size of the window and cells are in row-major order.
+    y_window, x_window: tuple of int
+        ``(start, stop)`` of the window along the y and x dimensions
+        of the source grid.
+    """
+
+    def __init__(self, matrix, y_window, x_window):
+        self.matrix = matrix.tocsr()
+        self.y_window = tuple(int(i) for i in y_window)
+        self.x_window = tuple(int(i) for i in x_window)
+
+    @classmethod
+    def bilinear(cls, source_x, source_y, target_x, target_y, x_period=None):
+        """Bilinear interpolation weights from the grid with
+        coordinates ``source_x``, ``source_y`` to the points
+        ``(target_x[i], target_y[i])``.
+
+        If ``x_period`` is given (360 for longitude) x coordinates are
+        compared modulo ``x_period``, so that grids in 0 to 360 and
+        -180 to 180 degrees are equivalent, and a global grid is
+        interpolated across its seam. Points outside the source grid
+        raise ``ValueError``.
+        """
+        n_points = len(target_x)
+        y0, y1, fy = _axis_weights(source_y, target_y)
+        x0, x1, fx = _axis_weights(source_x, target_x, x_period)
+        rows = np.repeat(np.arange(n_points), 4)
+        yi = np.stack([y0, y0, y1, y1], axis=1).ravel()
+        xi = np.stack([x0, x1, x0, x1], axis=1).ravel()
+        weights = np.stack([
+            (1 - fy) * (1 - fx), (1 - fy) * fx, fy * (1 - fx), fy * fx
+        ], axis=1).ravel()
+        used = weights != 0
+        if not np.any(used):
+            used[:] = True
+        y_window = (yi[used].min(), yi[used].max() + 1)
+        x_window = (xi[used].min(), xi[used].max() + 1)
+        nx_window = x_window[1] - x_window[0]
+        cols = (yi - y_window[0]) * nx_window + (xi - x_window[0])
+        shape = (n_points, (y_window[1] - y_window[0]) * nx_window)
+        matrix = scipy.sparse.csr_matrix(
+            (weights[used], (rows[used], cols[used])), shape=shape
+        )
+        return cls(matrix, y_window, x_window)
+
+    def save(self, filename):
+        f = io.BytesIO()
+        np.savez(
+            f,
+            data=self.matrix.data,
+            indices=self.matrix.indices,
+            indptr=self.matrix.indptr,
+            shape=np.asarray(self.matrix.shape),
+            window=np.asarray(self.y_window + self.x_window)
+        )
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        write_file_atomic(filename, f.getvalue())
+
+    @classmethod
+    def load(cls, filename):
+        with np.load(filename) as f:
+            matrix = scipy.sparse.csr_matrix(
+                (f['data'], f['indices'], f['indptr']), shape=tuple(f['shape'])
+            )
+            window = f['window']
+        return cls(matrix, window[:2], window[2:])
+
+    def apply(self, x, y_dim, x_dim, xy):
+        """Regrid the ``xarray.DataArray`` ``x`` to the model points.
+
+        The source grid is reduced to the weights' window, and each
+        chunk of ``x`` along its other dimensions (e.g. a block of
+        time steps) is regridded with one sparse matrix product.
+        Missing (non-finite) source values are left out, and the
+        weights of the remaining cells are renormalised; points with
+        no finite neighbours are NaN.
+
+        Returns
+        -------
+        xarray.DataArray
+            ``x`` with dims ``y_dim`` and ``x_dim`` replaced by a
+            trailing ``xy`` dimension with coordinates ``xy``.
+        """
+        x = x.isel({y_dim: slice(*self.y_window), x_dim: slice(*self.x_window)})
+        x = x.transpose(..., y_dim, x_dim)
+        data = x.data
+        if not isinstance(data, dask.array.Array):
+            data = dask.array.from_array(data, chunks=-1)
+        data = data.rechunk({data.ndim - 2: -1, data.ndim - 1: -1})
+        matrix = self.matrix
+        n_points = matrix.shape[0]
+        # The products are computed with the (double precision)
+        # weights and returned in the precision of the input
+        dtype = np.result_type(data.dtype, np.float32)
+
+        def _apply(block):
+            lead = block.shape[:-2]
+            flat = block.reshape((-1, block.shape[-2] * block.shape[-1]))
+            finite = np.isfinite(flat)
+            if np.all(finite):
+                values = matrix @ flat.T
+            else:
+                values = matrix @ np.where(finite, flat, 0).T
+                total = matrix @ finite.T.astype(np.float64)
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    values = np.where(total > 0, values / total, np.nan)
+            values = values.T.reshape(lead + (n_points,))
+            return values.astype(dtype, copy=False)
+
+        regridded = data.map_blocks(
+            _apply,
+            drop_axis=data.ndim - 1,
+            chunks=data.chunks[:-2] + ((n_points,),),
+            dtype=dtype
+        )
+        coords = {
+            name: coord for name, coord in x.coords.items()
+            if y_dim not in coord.dims and x_dim not in coord.dims
+        }
+        coords['xy'] = xy
+        return xarray.DataArray(
+            regridded, dims=x.dims[:-2] + ('xy',), coords=coords,
+            name=x.name, attrs=x.attrs
+        )
+
+
+def bilinear_weights(source_x, source_y, target_x, target_y, x_period=None, cache_dir=None):
+    """``RegridWeights.bilinear``, saved in and read from
+    ``cache_dir`` if given, so that they are only computed once for
+    each pair of source grid and model points.
+    """
+    if cache_dir is None:
+        return RegridWeights.bilinear(source_x, source_y, target_x, target_y, x_period)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(x_period).encode())
+    for values in [source_x, source_y, target_x, target_y]:
+        values = np.ascontiguousarray(values, dtype=np.float64)
+        digest.update(str(values.shape).encode())
+        digest.update(values.tobytes())
+    filename = os.path.join(
+        cache_dir, 'regrid_weights',
+        f'bilinear_v{WEIGHTS_VERSION}_{digest.hexdigest()}.npz'
+    )
+    try:
+        return RegridWeights.load(filename)
+    except (OSError, ValueError, KeyError):
+        pass
+    weights = RegridWeights.bilinear(source_x, source_y, target_x, target_y, x_period)
+    weights.save(filename)
+    return weights
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+
+import warnings
+import numpy as np
+import pandas as pd
+import xarray
+import dask.array
+
+from .constants import allowed_t_dim_names, steps_per_day
+
+# Approximate number of days reduced at once when the input is not
+# chunked in time
+DAYS_PER_CHUNK = 31
+
+
+def _reduce_steps(values, n_steps, method, axis=0):
+    """Reduce consecutive groups of ``n_steps`` time steps along
+    ``axis``, whose length must be a multiple of ``n_steps``.
+
+    The reduction is accumulated one step at a time, so that the
+    only memory needed beyond ``values`` is the daily result. Sums
+    are accumulated in double precision and cast back to the type
+    returned by ``_daily_dtype``.
+    """
+    values = np.moveaxis(values, axis, 0)
+    days = values.reshape((values.shape[0] // n_steps, n_steps) + values.shape[1:])
+    if method == 'end':
+        out = days[:, -1].copy()
+    else:
+        dtype = values.dtype
+        if method in ('mean', 'total'):
+            dtype = np.result_type(dtype, np.float64)
+        out = days[:, 0].astype(dtype)
+        for k in range(1, n_steps):
+            step = days[:, k]
+            if method == 'min':
+                np.minimum(out, step, out=out)
+            elif method == 'max':
+                np.maximum(out, step, out=out)
+            else:
+                np.add(out, step, out=out)
+        if method == 'mean':
+            out /= n_steps
+    out = out.astype(_daily_dtype(values.dtype, method), copy=False)
+    return np.moveaxis(out, 0, axis)
+
+
+def _daily_dtype(dtype, method):
+    if method == 'mean':
+        return np.result_type(dtype, np.float32)
+    return np.dtype(dtype)
+
+
+def aggregate_daily(x, interval, method, time_range=None):
+    """Aggregate a sub-daily ``xarray.DataArray`` to daily values.
+
+    The time dimension is rechunked so that every chunk holds whole
+    days, and each chunk is reduced independently, so the sub-daily
+    data are streamed through memory chunk by chunk when the result
+    is computed rather than loaded at once. Incomplete days at the
+    start and end of the record are dropped. Irregular time axes are
+    reduced with ``DataArray.resample`` instead.
+
+    Parameters
+    ----------
+    x: xarray.DataArray
+        Input with a time dimension at ``interval`` resolution.
+    interval: str
+        One of the keys of ``constants.steps_per_day``.
+    method: str
+        One of 'mean', 'min', 'max', 'total' or 'end'.
+    time_range: tuple, optional
+        ``(start_time, end_time)`` of the days required; time steps
+        outside these days are not read.
+
+    Returns
+    -------
+    xarray.DataArray
+        Daily values labelled by the start of each day.
+    """
+    n_steps = steps_per_day[interval]
+    time_dim = next((dim for dim in x.dims if dim in allowed_t_dim_names), None)
+    if n_steps == 1 or time_dim is None:
+        return x
+    if time_range is not None:
+        start = pd.Timestamp(time_range[0]).floor('D')
+        end = pd.Timestamp(time_range[1]).floor('D') + pd.Timedelta(days=1)
+        x = x.sel({time_dim: slice(start, end - pd.Timedelta(1, 'ns'))})
+
+    time = x.indexes[time_dim]
+    step = pd.Timedelta(days=1) / n_steps
+    first = np.flatnonzero(time == time.floor('D'))
+    regular = len(time) > 1 and np.all(np.diff(time.asi8) == step.value)
+    if not regular or len(first) == 0:
+        warnings.warn(
+            f'Time steps of `{x.name}` are not regular at the `{interval}` '
+            'interval: falling back to resampling'
+        )
+        how = 'sum' if method == 'total' else ('last' if method == 'end' else method)
+        return getattr(x.resample({time_dim: '1D'}), how)()
+
+    # Keep whole days only
+    start = first[0]
+    n_days = (len(time) - start) // n_steps
+    x = x.isel({time_dim: slice(start, start + n_days * n_steps)})
+    axis = x.dims.index(time_dim)
+    data = x.data
+    if not isinstance(data, dask.array.Array):
+        data = dask.array.from_array(data, chunks={axis: DAYS_PER_CHUNK * n_steps})
+    days_per_chunk = max(1, max(data.chunks[axis]) // n_steps)
+    data = data.rechunk({axis: days_per_chunk * n_steps})
+    chunks = list(data.chunks)
+    chunks[axis] = tuple(c // n_steps for c in chunks[axis])
+    daily = data.map_blocks(
+        _reduce_steps, n_steps, method, axis,
+        chunks=tuple(chunks), dtype=_daily_dtype(data.dtype, method)
+    )
+    coords = {
+        name: coord for name, coord in x.coords.items()
+        if time_dim not in coord.dims
+    }
+    coords[time_dim] = x.indexes[time_dim][::n_steps].floor('D')
+    return xarray.DataArray(daily, dims=x.dims, coords=coords, name=x.name, attrs=x.attrs)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+
+import os
+import numpy as np
+import pandas as pd
+import pyarrow
+import pyarrow.dataset
+import xarray
+
+from .constants import steps_per_day
+
+# Table formats read by `open_point_table`, by file extension
+TABLE_FORMATS = {
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.arrow': 'ipc',
+    '.feather': 'ipc',
+    '.ipc': 'ipc'
+}
+
+
+def table_format(filenames):
+    """Format of a list of point tables, or None if any of the
+    files is not a Parquet or Arrow table.
+    """
+    if isinstance(filenames, str):
+        filenames = [filenames]
+    formats = {
+        TABLE_FORMATS.get(os.path.splitext(f)[1].lower()) for f in filenames
+    }
+    if len(formats) != 1:
+        return None
+    return formats.pop()
+
+
+def _to_numpy(array):
+    # Columns without nulls are viewed rather than copied
+    try:
+        return array.to_numpy(zero_copy_only=True)
+    except pyarrow.ArrowInvalid:
+        return array.to_numpy(zero_copy_only=False)
+
+
+def _column_to_numpy(column):
+    # A column held in one chunk is viewed rather than copied
+    if column.num_chunks == 1:
+        return _to_numpy(column.chunk(0))
+    return _to_numpy(column.combine_chunks())
+
+
+def _as_grid(values, i, j, shape, dtype):
+    # View the rows of a table as an array with dims (time, xy) if
+    # they hold each time step of each point once, in time- or
+    # point-major order, or return None
+    n_time, n_point = shape
+    if (values.dtype != dtype) or (values.size != n_time * n_point):
+        return None
+    if np.any(i < 0) or np.any(j < 0):
+        return None
+    rows = np.arange(values.size)
+    if np.array_equal(i * n_point + j, rows):
+        return values.reshape(shape)
+    if np.array_equal(j * n_time + i, rows):
+        return values.reshape((n_point, n_time)).T
+    return None
+
+
+def _time_scalar(value, type):
+    return pyarrow.scalar(
+        pd.Timestamp(value).to_pydatetime(), type=pyarrow.timestamp('ns')
+    ).cast(type)
+
+
+def open_point_table(filenames, varname, point_column, time_column, points, time, dtype=np.float64,
+                     interval='daily'):
+    """Read a variable from Parquet or Arrow tables of values keyed
+    by point id and time.
+
+    Only rows for ``points`` and the days in ``time`` are read: both
+    are pushed down to the dataset scan as a filter, so that row
+    groups and files outside them are skipped. If the rows read hold
+    every time step of every point once, in time- or point-major
+    order, and the value column is of type ``dtype`` without nulls,
+    the returned array is a view of the column; otherwise the values
+    are scattered into a new array.
+
+    Parameters
+    ----------
+    filenames: str or list of str
+        Table files, all of the same format.
+    varname: str
+        Column holding the values.
+    point_column, time_column: str
+        Columns holding the point id and the date (or time).
+    points: array_like
+        Point ids of the model domain, in ``xy`` order.
+    time: array_like
+        Model time points, at daily resolution.
+    dtype: numpy.dtype, optional
+        Type of the returned values.
+    interval: str, optional
+        Interval of the values, one of the keys of
+        ``constants.steps_per_day``. Sub-daily values are read at
+        each time step of the model days, which the caller reduces
+        to daily values with ``resample.aggregate_daily``.
+
+    Returns
+    -------
+    xarray.DataArray
+        Values with dims (time, xy), which may be read-only. Points
+        or time steps missing from the tables are NaN. The units are
+        taken from the ``units`` field metadata of the value column,
+        if present.
+    """
+    if isinstance(filenames, str):
+        filenames = [filenames]
+    dataset = pyarrow.dataset.dataset(filenames, format=table_format(filenames))
+    schema = dataset.schema
+    points = np.asarray(points)
+    time = pd.DatetimeIndex(time)
+    n_steps = steps_per_day[interval]
+    start = time[0].floor('D')
+    end = time[-1].floor('D') + pd.Timedelta(days=1)
+    if n_steps > 1:
+        time = pd.date_range(start, end, freq=pd.Timedelta(days=1) / n_steps, inclusive='left')
+
+    time_type = schema.field(time_column).type
+    point_type = schema.field(point_column).type
+    field = pyarrow.dataset.field
+    condition = (
+        (field(time_column) >= _time_scalar(start, time_type))
+        & (field(time_column) < _time_scalar(end, time_type))
+        & field(point_column).isin(pyarrow.array(points).cast(point_type))
+    )
+    table = dataset.to_table(
+        columns=[point_column, time_column, varname], filter=condition
+    )
+    ids = _column_to_numpy(table.column(point_column))
+    dates = pd.DatetimeIndex(_column_to_numpy(table.column(time_column)).astype('datetime64[ns]'))
+    if (n_steps == 1) and np.any(dates != dates.floor('D')):
+        raise ValueError(
+            f'`{time_column}` of the tables of `{varname}` holds sub-daily '
+            'times: the `interval` of the values must be given'
+        )
+    i = time.get_indexer(dates)
+    j = pd.Index(points).get_indexer(ids)
+    del ids, dates
+    x = _column_to_numpy(table.column(varname))
+    del table
+
+    shape = (len(time), len(points))
+    values = _as_grid(x, i, j, shape, np.dtype(dtype))
+    if values is None:
+        values = np.full(shape, np.nan, dtype=dtype)
+        found = (i >= 0) & (j >= 0)
+        values[i[found], j[found]] = x[found]
+
+    attrs = {}
+    metadata = schema.field(varname).metadata or {}
+    if b'units' in metadata:
+        attrs['units'] = metadata[b'units'].decode()
+    return xarray.DataArray(
+        values, dims=('time', 'xy'), coords={'time': time, 'xy': points},
+        name=varname, attrs=attrs
+    )
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+
+from metpy.units import units as _registry
+
+# Resolved conversions, mapping (source units, target units) to
+# (factor, offset) such that `value * factor + offset` converts a
+# value in the source units to the target units
+_conversions = {}
+
+
+def register_conversion(source_units, target_units, factor, offset=0.):
+    """Register the linear conversion between two unit strings,
+    e.g. for source units which cannot be parsed.
+    """
+    _conversions[(source_units, target_units)] = (float(factor), float(offset))
+    return None
+
+
+def _resolve_conversion(source_units, target_units):
+    # Raises pint.errors.DimensionalityError if the units are incompatible
+    source = _registry.Quantity(0., source_units)
+    target = _registry.Quantity(0., target_units)
+    zero = source.to(target.units).magnitude
+    # The scale is taken from the root units, such that offset units
+    # (e.g. K -> degC) give an exact factor
+    source_factor, _ = _registry.get_root_units(source.units)
+    target_factor, _ = _registry.get_root_units(target.units)
+    return float(source_factor / target_factor), float(zero)
+
+
+def linear_conversion(source_units, target_units):
+    """Factor and offset converting values from ``source_units``
+    to ``target_units``.
+
+    The conversion is resolved with pint once per pair of unit
+    strings, so converting an array costs one multiply-add rather
+    than wrapping it as a pint quantity.
+
+    Parameters
+    ----------
+    source_units, target_units: str
+        Unit strings, e.g. ``"K"`` and ``"degree_Celsius"``.
+
+    Returns
+    -------
+    tuple
+        ``(factor, offset)``.
+    """
+    key = (source_units, target_units)
+    if key not in _conversions:
+        _conversions[key] = _resolve_conversion(source_units, target_units)
+    return _conversions[key]
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
-# import os
+import os
+import numpy as np
 
 
 def format_parameter(number_str, pad_before=6, pad_after=7):
@@ -18,3 +19,139 @@ def format_parameter(number_str, pad_before=6, pad_after=7):
         frac = "." + frac + " " * (pad_after_adj - len(frac))
         number_str = whole + frac
     return number_str
+
+
+def _fixed_point_digits(values, decimals):
+    # Absolute values scaled by 10**decimals and rounded as printf would
+    scaled = np.abs(values) * 10 ** decimals
+    digits = np.rint(scaled).astype(np.int64)
+
+    # Where the scaled value is within rounding error of a tie the
+    # result of `rint` may differ from printf, so defer to Python
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for idx in zip(*np.nonzero(near_tie)):
+        text = "%.*f" % (decimals, abs(values[idx]))
+        digits[idx] = int(text.replace(".", ""))
+    return digits
+
+
+def format_fixed_point(values, decimals=2, delimiter="\t", newline=os.linesep):
+    """Format rows of floating point values as text without calling
+    Python string formatting for each value.
+
+    The output for each index along the first axis is equivalent to
+    ``np.savetxt(f, values[i], fmt="%.<decimals>f", ...)``. All values
+    must be finite.
+
+    Parameters
+    ----------
+    values: numpy.ndarray
+        Array with shape (n, n_row) or (n, n_row, n_col).
+    decimals: int, optional
+        Number of digits after the decimal point.
+    delimiter: str, optional
+        String separating columns.
+    newline: str, optional
+        String terminating each row.
+
+    Returns
+    -------
+    list of bytes
+        Formatted text for each index along the first axis.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 2:
+        values = values[..., None]
+    n, n_row, n_col = values.shape
+    if n == 0:
+        return []
+    if n_row == 0:
+        return [b""] * n
+
+    scale = 10 ** decimals
+    negative = np.signbit(values)
+    digits = _fixed_point_digits(values, decimals)
+
+    whole = digits // scale
+    frac = digits % scale
+    n_whole = max(len(str(int(whole.max()))), 1)
+
+    # Each value occupies a fixed-width field of bytes: sign, whole
+    # digits, decimal point, fractional digits, separator. Unused
+    # bytes are left as zero and removed before writing.
+    delimiter = delimiter.encode()
+    newline = newline.encode()
+    n_sep = max(len(delimiter), len(newline))
+    width = 1 + n_whole + (1 if decimals > 0 else 0) + decimals + n_sep
+    field = np.zeros((n, n_row, n_col, width), dtype=np.uint8)
+    field[..., 0] = np.where(negative, ord("-"), 0)
+    for k in range(n_whole):
+        power = 10 ** k
+        digit = ((whole // power) % 10).astype(np.uint8) + ord("0")
+        shown = (whole >= power) | (k == 0)
+        field[..., n_whole - k] = np.where(shown, digit, 0)
+    pos = n_whole + 1
+    if decimals > 0:
+        field[..., pos] = ord(".")
+        pos += 1
+        for k in range(decimals):
+            power = 10 ** (decimals - k - 1)
+            field[..., pos + k] = ((frac // power) % 10).astype(np.uint8) + ord("0")
+        pos += decimals
+    sep = np.zeros((n_col, n_sep), dtype=np.uint8)
+    sep[:-1, :len(delimiter)] = np.frombuffer(delimiter, dtype=np.uint8)
+    sep[-1, :len(newline)] = np.frombuffer(newline, dtype=np.uint8)
+    field[..., pos:] = sep
+
+    field = field.reshape(n, -1)
+    keep = field != 0
+    text = field[keep].tobytes()
+    ends = np.cumsum(keep.sum(axis=1))
+    starts = np.concatenate([[0], ends[:-1]])
+    return [text[start:end] for start, end in zip(starts, ends)]
+
+
+def fixed_point_lengths(values, decimals=2, delimiter="\t", newline=os.linesep):
+    """Length in bytes of each row of ``values`` as formatted by
+    ``np.savetxt(f, values[i], fmt="%.<decimals>f", ...)``, computed
+    without formatting them.
+
+    Parameters
+    ----------
+    values: numpy.ndarray
+        Array with shape (n, n_row) or (n, n_row, n_col).
+    decimals: int, optional
+        Number of digits after the decimal point.
+    delimiter: str, optional
+        String separating columns.
+    newline: str, optional
+        String terminating each row.
+
+    Returns
+    -------
+    numpy.ndarray
+        Integer array with shape (n, n_row).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 2:
+        values = values[..., None]
+    finite = np.isfinite(values)
+    digits = _fixed_point_digits(np.where(finite, values, 0.), decimals)
+    whole = digits // 10 ** decimals
+    n_whole = np.ones(whole.shape, dtype=np.int64)
+    power = 10
+    while power <= max(int(whole.max(initial=0)), 1):
+        n_whole += whole >= power
+        power *= 10
+    length = np.where(
+        finite,
+        np.signbit(values) + n_whole + (1 if decimals > 0 else 0) + decimals,
+        # "nan", "inf" or "-inf"
+        3 + (np.isinf(values) & np.signbit(values))
+    )
+    n_col = values.shape[-1]
+    return (
+        length.sum(axis=-1)
+        + (n_col - 1) * len(delimiter.encode())
+        + len(newline.encode())
+    )
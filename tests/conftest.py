@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+
+"""Fixtures shared by the tests: a small model written to disk."""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow
+import pyarrow.parquet
+import pytest
+import xarray
+
+# Gridded forcing of the test model: (section, variable, units,
+# offset, scale) of uniformly distributed values
+FORCING = [
+    ("TMIN", "tmin", "K", 280., 10.),
+    ("TMAX", "tmax", "K", 292., 10.),
+    ("PREC", "prec", "mm", 0., 10.),
+    ("TDEW", "tdew", "K", 272., 5.),
+    ("SWDOWN", "sw", "MJ m**-2", 5., 20.),
+    ("WIND_U", "u", "m s**-1", -2., 4.),
+    ("WIND_V", "v", "m s**-1", -2., 4.),
+    ("SP", "sp", "Pa", 98000., 2000.),
+    ("ET0", "et0", "mm", 0., 6.),
+]
+
+# Weather grid, on which the model points are nearest neighbours of
+# several cells each
+LAT = np.arange(5.125, 8, 0.25)[::-1]
+LON = np.arange(-3.125, -1, 0.25)
+
+
+def _write_grid_forcing(directory, time):
+    rng = np.random.default_rng(0)
+    for section, name, units, offset, scale in FORCING:
+        os.makedirs(os.path.join(directory, name), exist_ok=True)
+        values = offset + scale * rng.random((len(time), len(LAT), len(LON)))
+        da = xarray.DataArray(
+            values, dims=("time", "lat", "lon"),
+            coords={"time": time, "lat": LAT, "lon": LON},
+            name=name, attrs={"units": units}
+        )
+        for month, group in da.groupby("time.month"):
+            group.to_netcdf(os.path.join(directory, name, f"{name}_{month:02d}.nc"))
+
+
+def _write_point_tables(directory, time, xy):
+    # Point tables holding the forcing of each model point
+    os.makedirs(os.path.join(directory, "tables"), exist_ok=True)
+    rng = np.random.default_rng(1)
+    ids, dates = np.meshgrid(xy, time, indexing="ij")
+    for section, name, units, offset, scale in FORCING:
+        values = offset + scale * rng.random(ids.size)
+        schema = pyarrow.schema([
+            pyarrow.field("xy", pyarrow.int64()),
+            pyarrow.field("time", pyarrow.date32()),
+            pyarrow.field("value", pyarrow.float64(), metadata={"units": units})
+        ])
+        table = pyarrow.Table.from_arrays(
+            [pyarrow.array(ids.ravel()),
+             pyarrow.array(dates.ravel().astype("datetime64[D]")),
+             pyarrow.array(values)],
+            schema=schema
+        )
+        pyarrow.parquet.write_table(
+            table, os.path.join(directory, "tables", f"{name}.parquet")
+        )
+
+
+def _write_model_grid(directory, n_points, is_2d):
+    rng = np.random.default_rng(2)
+    if is_2d:
+        lat = np.arange(5.3, 7.9, 0.2)[::-1]
+        lon = np.arange(-3.0, -1.2, 0.2)
+        mask = np.zeros(lat.size * lon.size, dtype=np.int8)
+        mask[rng.choice(mask.size, n_points, replace=False)] = 1
+        ds = xarray.Dataset(
+            {"mask": (("lat", "lon"), mask.reshape(lat.size, lon.size))},
+            coords={"lat": lat, "lon": lon}
+        )
+    else:
+        ds = xarray.Dataset(
+            {"mask": ("xy", np.ones(n_points, dtype=np.int8))},
+            coords={
+                "xy": np.arange(1, n_points + 1),
+                "lat": ("xy", rng.uniform(5.2, 7.9, n_points)),
+                "lon": ("xy", rng.uniform(-3.0, -1.2, n_points)),
+            }
+        )
+    ds.to_netcdf(os.path.join(directory, "grid.nc"))
+
+
+def _config(et0, point_tables, is_2d):
+    if is_2d:
+        grid = 'is_1d = false'
+    else:
+        grid = 'is_1d = true\nxy_dimname = "xy"'
+    sections = [
+        f'[MODEL_GRID]\nfilename = "grid.nc"\nmask_varname = "mask"\n{grid}',
+        '[MODEL_TIME]\nstart_time = "2010-01-01"\nend_time = "2010-03-31"',
+    ]
+    for section, name, units, offset, scale in FORCING:
+        if section == "ET0":
+            if et0 is not None:
+                sections.append(f'[ET0]\npreprocess = true\nmethod = "{et0}"')
+                continue
+            sections.append('[ET0]\npreprocess = false')
+        elif section not in ("TMIN", "TMAX", "PREC"):
+            sections.append(f'[{section}]\nuse = true')
+        else:
+            sections.append(f'[{section}]')
+        if point_tables and section in ("TMIN", "TMAX", "PREC", "ET0"):
+            sections[-1] += (
+                f'\nfilename = "tables/{name}.parquet"\nvarname = "value"'
+                '\nis_1d = true\nxy_dimname = "xy"'
+            )
+        else:
+            sections[-1] += (
+                f'\nfilename = "{name}/{name}_.*.nc"\nvarname = "{name}"\nis_1d = false'
+            )
+    return "\n\n".join(sections) + "\n"
+
+
+@pytest.fixture
+def model_config(tmp_path):
+    """Factory writing a small model to ``tmp_path``, returning the
+    path of its config file.
+
+    Parameters of the factory: ``n_points`` model points, on a 2D
+    grid if ``is_2d``; ET0 computed with method ``et0``, or read from
+    file if None; TMIN, TMAX, PREC and ET0 read from point tables if
+    ``point_tables``; and ``extra`` config sections.
+    """
+    time = pd.date_range("2010-01-01", "2010-03-31", freq="D")
+
+    def write(n_points=23, is_2d=False, et0="PenmanMonteith", point_tables=False, extra=""):
+        directory = str(tmp_path)
+        if not os.path.exists(os.path.join(directory, "tmin")):
+            _write_grid_forcing(directory, time)
+        _write_model_grid(directory, n_points, is_2d)
+        if point_tables:
+            _write_point_tables(directory, time, np.arange(1, n_points + 1))
+        filename = os.path.join(directory, "config.toml")
+        with open(filename, "w") as f:
+            f.write(_config(et0, point_tables, is_2d) + extra)
+        return filename
+    return write
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+
+"""Tests for `pyaquacrop.Cache`."""
+
+import os
+import stat
+
+import numpy as np
+
+from pyaquacrop.Cache import InputFileCache, write_file_atomic
+
+
+def test_input_file_cache(tmp_path):
+    cache = InputFileCache(str(tmp_path / "cache"), max_size=10)
+    key = cache.key("header", np.arange(3.))
+    assert key != cache.key("header", np.arange(3.) + 1)
+
+    first = str(tmp_path / "first.txt")
+    second = str(tmp_path / "second.txt")
+    assert not cache.fetch(key, first)
+    write_file_atomic(first, b"0123456789")
+    cache.store(key, first)
+    assert cache.fetch(key, second)
+    assert os.path.samefile(first, second)
+
+    # Rewriting a destination must not alter the cached entry
+    write_file_atomic(first, b"changed")
+    with open(second, "rb") as f:
+        assert f.read() == b"0123456789"
+
+    other = cache.key("other")
+    cache.store(other, first)
+    cache.evict()
+    assert cache.size <= 10
+    assert not cache.fetch(key, str(tmp_path / "third.txt"))
+
+
+def test_write_file_atomic_permissions(tmp_path):
+    filename = str(tmp_path / "a.txt")
+    write_file_atomic(filename, b"a")
+    with open(str(tmp_path / "b.txt"), "wb") as f:
+        f.write(b"b")
+    assert os.stat(filename).st_mode == os.stat(str(tmp_path / "b.txt")).st_mode
+
+
+def test_write_file_atomic_umask(tmp_path):
+    # The umask in effect when the file is written applies
+    umask = os.umask(0o077)
+    try:
+        write_file_atomic(str(tmp_path / "a.txt"), b"a")
+    finally:
+        os.umask(umask)
+    assert stat.S_IMODE(os.stat(str(tmp_path / "a.txt")).st_mode) == 0o600
+
+
+def test_cached_files_are_read_only(tmp_path):
+    cache = InputFileCache(str(tmp_path / "cache"))
+    key = cache.key("contents")
+    first = str(tmp_path / "first.txt")
+    write_file_atomic(first, b"contents")
+    cache.store(key, first)
+    second = str(tmp_path / "second.txt")
+    assert cache.fetch(key, second)
+    for filename in [cache._entry(key), first, second]:
+        assert not os.stat(filename).st_mode & (stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH)
+
+    # Destinations are still replaced rather than edited
+    write_file_atomic(second, b"changed")
+    with open(cache._entry(key), "rb") as f:
+        assert f.read() == b"contents"
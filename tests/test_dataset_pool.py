@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+
+"""Tests for `pyaquacrop.DatasetPool`."""
+
+import numpy as np
+import xarray
+
+from pyaquacrop.DatasetPool import DatasetPool
+
+
+def _write_datasets(tmp_path, n):
+    filenames = []
+    for i in range(n):
+        filename = str(tmp_path / f"data_{i}.nc")
+        xarray.Dataset(
+            {"a": ("x", np.arange(4.) + i), "b": ("x", np.zeros(4))},
+            coords={"x": np.arange(4)}
+        ).to_netcdf(filename)
+        filenames.append(filename)
+    return filenames
+
+
+def test_dataset_pool_shares_datasets(tmp_path):
+    filenames = _write_datasets(tmp_path, 1)
+    pool = DatasetPool()
+    ds = pool.open(filenames)
+    assert pool.open(filenames) is ds
+    assert pool.open(filenames[0]) is ds
+    assert len(pool) == 1
+    pool.clear()
+    assert len(pool) == 0
+
+
+def test_dataset_pool_eviction(tmp_path):
+    filenames = _write_datasets(tmp_path, 3)
+    pool = DatasetPool(max_datasets=2)
+    a = pool.open(filenames[0])["a"]
+    pool.open(filenames[1])
+    pool.open(filenames[0])
+    pool.open(filenames[2])
+    assert pool.key(filenames[0]) in pool
+    assert pool.key(filenames[1]) not in pool
+    # Arrays from a closed dataset can still be read
+    pool.clear()
+    np.testing.assert_array_equal(a.values, np.arange(4.))
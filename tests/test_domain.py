@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+
+"""Tests for `pyaquacrop.Domain`."""
+
+import numpy as np
+import pytest
+import xarray
+
+from pyaquacrop.Domain import Domain
+
+
+@pytest.fixture
+def domain():
+    x = [-1.93, -1.52, -0.11, -0.74]
+    y = [8.91, 6.02, 7.48, 8.05]
+    ds = xarray.Dataset(
+        data_vars=dict(mask=(["space"], [1, 1, 1, 1])),
+        coords=dict(
+            space=(["space"], [1, 2, 3, 4]),
+            x=(["space"], x),
+            y=(["space"], y)
+        )
+    )
+    return Domain(ds, True, "space")
+
+
+@pytest.fixture
+def grid():
+    lat = np.arange(5.125, 10, 0.25)[::-1]
+    lon = np.arange(-3.125, 1, 0.25)
+    data = np.arange(lat.size * lon.size, dtype=float).reshape(lat.size, lon.size)
+    return xarray.DataArray(
+        data, coords=dict(lat=lat, lon=lon), dims=["lat", "lon"]
+    )
+
+
+def test_nearest_grid_index(domain, grid):
+    index = domain.nearest_grid_index(grid)
+    assert list(index.keys()) == ["lat", "lon"]
+    lats = xarray.DataArray(domain.y, dims="xy")
+    lons = xarray.DataArray(domain.x, dims="xy")
+    expected = grid.sel(lat=lats, lon=lons, method="nearest")
+    np.testing.assert_array_equal(
+        grid.values[index["lat"], index["lon"]], expected.values
+    )
+
+
+def test_nearest_grid_index_is_cached(domain, grid):
+    index = domain.nearest_grid_index(grid)
+    assert domain.nearest_grid_index(grid.copy() * 2) is index
+    shifted = grid.assign_coords(lon=grid.lon + 0.1)
+    assert domain.nearest_grid_index(shifted) is not index
+
+
+@pytest.fixture
+def grid_domain(grid):
+    mask = np.zeros(grid.shape, dtype=int)
+    mask[[0, 3, 3, 10], [2, 0, 5, 16]] = 1
+    ds = xarray.Dataset(
+        data_vars=dict(mask=(["lat", "lon"], mask)),
+        coords=dict(lat=grid.lat, lon=grid.lon)
+    )
+    return Domain(ds, False)
+
+
+def test_compressed_domain(grid_domain, grid):
+    assert grid_domain.is_2d
+    assert grid_domain.nxy == 4
+    assert grid_domain.xy.dtype == np.int32
+    np.testing.assert_array_equal(grid_domain.xy, [2, 51, 56, 186])
+    lookup = grid_domain.land_lookup
+    assert lookup[56] == 2 and lookup[0] == -1
+    np.testing.assert_array_equal(grid_domain.point_y, grid.lat.values[[0, 3, 3, 10]])
+    np.testing.assert_array_equal(grid_domain.point_x, grid.lon.values[[2, 0, 5, 16]])
+
+    values = grid_domain.compress(grid.values)
+    np.testing.assert_array_equal(values, grid.values[[0, 3, 3, 10], [2, 0, 5, 16]])
+    restored = grid_domain.decompress(values)
+    mask = grid_domain.mask.values.astype(bool)
+    np.testing.assert_array_equal(restored[mask], grid.values[mask])
+    assert np.all(np.isnan(restored[~mask]))
+
+    # Only the active cells are looked up
+    index = grid_domain.nearest_grid_index(grid)
+    np.testing.assert_array_equal(grid.values[index["lat"], index["lon"]], values)
+
+
+def test_partition_grid_domain(grid_domain, grid):
+    tiles = grid_domain.partition(2)
+    assert [tile.nxy for tile in tiles] == [2, 2]
+    np.testing.assert_array_equal(
+        np.concatenate([tile.parent_index for tile in tiles]), np.arange(4)
+    )
+    for tile in tiles:
+        np.testing.assert_array_equal(tile.point_x, grid_domain.point_x[tile.parent_index])
+        np.testing.assert_array_equal(tile.point_y, grid_domain.point_y[tile.parent_index])
+        index = tile.nearest_grid_index(grid)
+        np.testing.assert_array_equal(
+            grid.values[index["lat"], index["lon"]],
+            grid_domain.compress(grid.values)[tile.parent_index]
+        )
+
+
+def test_partition_strategies(grid):
+    rng = np.random.default_rng(0)
+    n = 200
+    ds = xarray.Dataset(
+        data_vars=dict(mask=(["space"], np.ones(n, dtype=int))),
+        coords=dict(
+            space=(["space"], np.arange(n)),
+            x=(["space"], rng.uniform(-3, 1, n)),
+            y=(["space"], rng.uniform(5, 10, n))
+        )
+    )
+    domain = Domain(ds, True, "space")
+    for strategy in ["balanced", "hilbert"]:
+        tiles = domain.partition(3, strategy=strategy)
+        assert sorted(tile.nxy for tile in tiles) == [66, 67, 67]
+        parent = np.sort(np.concatenate([tile.parent_index for tile in tiles]))
+        np.testing.assert_array_equal(parent, np.arange(n))
+        for tile in tiles:
+            np.testing.assert_array_equal(tile.xy, domain.xy[tile.parent_index])
+
+    # No input chunk is shared between tiles
+    chunked = grid.chunk({"lat": 5, "lon": 5})
+    tiles = domain.partition(4, strategy="chunks", grid=chunked)
+    keys = [set(domain._chunk_index(chunked)[tile.parent_index]) for tile in tiles]
+    for i in range(len(keys)):
+        for j in range(i + 1, len(keys)):
+            assert not keys[i] & keys[j]
+
+    with pytest.raises(ValueError):
+        domain.partition(2, strategy="chunks")
+
+
+def test_cached_coordinates(domain, grid):
+    x = domain.x
+    assert domain.x is x
+    assert not x.flags.writeable and x.flags.c_contiguous
+    with pytest.raises(ValueError):
+        x[0] = 0.
+    assert domain.point_latitude_radians is domain.point_latitude_radians
+    index = domain.nearest_grid_index(grid)
+
+    # Changing the dataset invalidates cached and derived arrays
+    domain._data = domain._data.isel(space=[0, 2])
+    domain._update_metadata()
+    np.testing.assert_array_equal(domain.x, [-1.93, -0.11])
+    np.testing.assert_allclose(domain.point_latitude_radians, np.radians([8.91, 7.48]))
+    assert len(domain.nearest_grid_index(grid)["lat"]) == 2
+    assert domain.nearest_grid_index(grid) is not index
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+
+import numpy as np
+
+from pyaquacrop import et0
+
+
+def _inputs(n_time=10, n_space=7):
+    rng = np.random.default_rng(0)
+    tmin = rng.uniform(-5, 15, (n_time, n_space))
+    tmax = tmin + rng.uniform(1, 15, (n_time, n_space))
+    return dict(
+        tmin=tmin,
+        tmax=tmax,
+        shortwave_radiation=rng.uniform(0, 30, (n_time, n_space)),
+        extraterrestrial_radiation=rng.uniform(5, 40, (n_time, n_space)),
+        wind=rng.uniform(0, 5, (n_time, n_space)),
+        surface_pressure=rng.uniform(80, 105, (n_time, n_space)),
+        dewpoint_temperature=tmin - 2
+    )
+
+
+def test_penman_monteith_blocks():
+    inputs = _inputs()
+    inputs['wind'][0, 0] = 0
+    expected = et0.penman_monteith(**inputs)
+    assert np.all(np.isfinite(expected))
+    assert np.all(expected >= 0)
+    for block_size in [1, 3, 10]:
+        out = np.empty_like(expected)
+        et0.penman_monteith(**inputs, out=out, block_size=block_size)
+        np.testing.assert_array_equal(out, expected)
+
+
+def test_penman_monteith_reference():
+    # Values given for the same inputs by the xarray implementation
+    # which the fused kernel replaced
+    expected = np.array([
+        [1.2760004832479824e-01, 6.5650463953263505e-01, 2.1120872697256656e+00],
+        [2.7343101502266983e-04, 1.8151269660585193e+01, 1.3412637428260634e+00],
+        [3.3123531519492606e+00, 2.4493063942637630e+00, 1.8801492077531210e+00],
+        [6.1251379153067189e+00, 5.0501935718621223e+00, 7.7583149816836824e-02],
+    ])
+    inputs = _inputs(n_time=4, n_space=3)
+    inputs['wind'][0, 0] = 0
+    for block_size in [1, 4]:
+        out = et0.penman_monteith(**inputs, block_size=block_size)
+        np.testing.assert_allclose(out, expected, rtol=1e-12, atol=0)
+
+
+def test_penman_monteith_legacy_vapour_pressure(monkeypatch):
+    # Penman-Monteith keeps the saturation vapour pressure of the
+    # original implementation, which is not that of FAO-56 used by
+    # Priestley-Taylor
+    T = np.array([15., 24.5])
+    legacy = et0._fao_equation_11(T, np.empty(2), np.empty(2))
+    np.testing.assert_allclose(legacy, 0.6108 * np.exp((T + 17.27) / (T + 237.3)), rtol=1e-15)
+    assert not np.allclose(legacy, et0._saturation_vapour_pressure(T, np.empty(2), np.empty(2)))
+
+    inputs = _inputs(n_time=4, n_space=3)
+    expected = et0.penman_monteith(**inputs)
+    monkeypatch.setattr(et0, "_fao_equation_11", et0._saturation_vapour_pressure)
+    assert not np.allclose(et0.penman_monteith(**inputs), expected)
+
+
+def test_penman_monteith_float32():
+    inputs = _inputs()
+    expected = et0.penman_monteith(**inputs)
+    single = {k: v.astype(np.float32) for k, v in inputs.items()}
+    out = et0.penman_monteith(**single)
+    assert out.dtype == np.float32
+    np.testing.assert_allclose(out, expected, rtol=1e-4, atol=1e-4)
+
+
+def test_extraterrestrial_radiation_table(tmp_path):
+    latitude = np.array([51.25, -3.5, 51.25, 0.0, -3.5])
+    days = np.array([1, 2, 180, 365, 366])
+    table = et0.ExtraterrestrialRadiationTable(latitude, cache_dir=str(tmp_path))
+    np.testing.assert_array_equal(
+        table.values(days), et0.extraterrestrial_radiation(latitude, days)
+    )
+    assert table.table.shape == (366, 3)
+    cached = list((tmp_path / 'extraterrestrial_radiation').iterdir())
+    assert len(cached) == 1
+    reused = et0.ExtraterrestrialRadiationTable(latitude[::-1], cache_dir=str(tmp_path))
+    np.testing.assert_array_equal(reused.table, table.table)
+    assert len(list((tmp_path / 'extraterrestrial_radiation').iterdir())) == 1
+
+
+def test_hargreaves():
+    inputs = _inputs()
+    tmin, tmax = inputs['tmin'], inputs['tmax']
+    ra = inputs['extraterrestrial_radiation']
+    expected = 0.0023 * 0.408 * ra * ((tmin + tmax) / 2 + 17.8) * np.sqrt(tmax - tmin)
+    out = et0.hargreaves(tmin, tmax, ra, block_size=3)
+    np.testing.assert_allclose(out, expected, rtol=1e-12)
+
+
+def test_priestley_taylor():
+    inputs = _inputs()
+    del inputs['wind']
+    tmin, tmax = inputs['tmin'], inputs['tmax']
+    shape = tmin.shape
+    tdew = inputs['dewpoint_temperature']
+    ea = 0.6108 * np.exp(17.27 * tdew / (tdew + 237.3))
+    rn = et0._net_radiation(
+        tmin, tmax, inputs['shortwave_radiation'],
+        inputs['extraterrestrial_radiation'], ea,
+        np.empty(shape), np.empty(shape), np.empty(shape)
+    )
+    tmean = (tmin + tmax) / 2
+    delta = 4098 * 0.6108 * np.exp(17.27 * tmean / (tmean + 237.3)) / (tmean + 237.3) ** 2
+    gamma = 0.665e-3 * inputs['surface_pressure']
+    expected = np.maximum(1.26 * delta / (delta + gamma) * rn / 2.45, 0)
+    out = et0.priestley_taylor(**inputs, block_size=4)
+    np.testing.assert_allclose(out, expected, rtol=1e-12)
+
+
+def test_saturation_vapour_pressure():
+    # FAO-56 example 3 (Annex 2, table 2.3)
+    T = np.array([15., 24.5])
+    es = et0._saturation_vapour_pressure(T, np.empty(2), np.empty(2))
+    np.testing.assert_allclose(es, [1.705, 3.075], atol=5e-4)
+
+
+def test_priestley_taylor_reference():
+    # FAO-56 example 18 (Brussels, 6 July): ea = 1.409 kPa, given
+    # here as the equivalent dewpoint temperature, Rn = 13.28 MJ m-2
+    # d-1, delta = 0.122 kPa degC-1 at Tmean = 16.9 degC, and the
+    # surface pressure at 100 m
+    x = np.log(1.409 / 0.6108)
+    tdew = 237.3 * x / (17.27 - x)
+    out = et0.priestley_taylor(
+        tmin=np.array([[12.3]]),
+        tmax=np.array([[21.5]]),
+        shortwave_radiation=np.array([[22.07]]),
+        extraterrestrial_radiation=np.array([[41.09]]),
+        surface_pressure=np.array([[100.1]]),
+        dewpoint_temperature=np.array([[tdew]])
+    )
+    delta = 0.122
+    gamma = 0.665e-3 * 100.1
+    expected = 1.26 * delta / (delta + gamma) * 13.28 / 2.45
+    np.testing.assert_allclose(out, [[expected]], rtol=5e-3)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+
+"""Tests for `pyaquacrop.FileIndex`."""
+
+import os
+
+import numpy as np
+import pandas as pd
+import xarray
+
+from pyaquacrop.FileIndex import FileIndex, open_indexed_mfdataset
+
+
+def _write_monthly_files(tmp_path, varnames=("tmin",)):
+    filenames = []
+    for month in range(1, 4):
+        time = pd.date_range(f"2010-{month:02d}-01", periods=28, freq="D")
+        rng = np.random.default_rng(month)
+        ds = xarray.Dataset(
+            {name: (("time", "lat", "lon"), rng.random((28, 3, 2))) for name in varnames},
+            coords={"time": time, "lat": [1.5, 0.5, -0.5], "lon": [10., 11.]}
+        )
+        ds["tmin"].attrs["units"] = "K"
+        filename = str(tmp_path / f"tmin_{month:02d}.nc")
+        ds.to_netcdf(filename)
+        filenames.append(filename)
+    return filenames
+
+
+def test_open_indexed_mfdataset(tmp_path):
+    filenames = _write_monthly_files(tmp_path)
+    expected = xarray.open_mfdataset(filenames)
+    cache_dir = str(tmp_path / "cache")
+    ds = open_indexed_mfdataset(filenames[::-1], cache_dir=cache_dir)
+    # The index is saved in the cache directory, not with the data
+    assert sorted(os.listdir(str(tmp_path))) == ["cache"] + [os.path.basename(f) for f in filenames]
+    assert len(os.listdir(os.path.join(cache_dir, "file_index"))) == 1
+    xarray.testing.assert_identical(ds["tmin"].load(), expected["tmin"].load())
+
+    # Only the files overlapping the time range are used
+    ds = open_indexed_mfdataset(
+        filenames,
+        time_range=(pd.Timestamp("2010-02-10"), pd.Timestamp("2010-02-20"))
+    )
+    assert ds.sizes["time"] == 28
+    xarray.testing.assert_identical(
+        ds["tmin"].load(), expected["tmin"].sel(time=ds.time).load()
+    )
+
+
+def test_file_index_refresh(tmp_path):
+    filenames = _write_monthly_files(tmp_path)
+    cache_dir = str(tmp_path / "cache")
+    index = FileIndex(str(tmp_path), cache_dir)
+    entry = index.entry(filenames[0])
+    index.save()
+    assert FileIndex(str(tmp_path), cache_dir).entry(filenames[0]) == entry
+
+    xarray.open_dataset(filenames[1]).isel(time=slice(0, 10)).load().to_netcdf(filenames[0])
+    entry = FileIndex(str(tmp_path), cache_dir).entry(filenames[0])
+    assert len(entry["time"]) == 10
+
+
+def test_indexed_files_stay_open(tmp_path, monkeypatch):
+    filenames = _write_monthly_files(tmp_path, varnames=("tmin", "tmax"))
+    opened = []
+    open_dataset = xarray.open_dataset
+
+    def record(filename, *args, **kwargs):
+        opened.append(filename)
+        return open_dataset(filename, *args, **kwargs)
+    monkeypatch.setattr(xarray, "open_dataset", record)
+    ds = open_indexed_mfdataset(filenames)
+    opened.clear()
+    for i in range(0, ds.sizes["time"], 7):
+        ds["tmin"].isel(time=i).values
+        ds["tmax"].isel(time=i).values
+    # Each file is opened once, however many times and for however
+    # many of its variables it is read
+    assert sorted(opened) == filenames
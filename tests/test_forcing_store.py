@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+
+"""Tests for `pyaquacrop.ForcingStore`."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from click.testing import CliRunner
+
+from pyaquacrop import cli
+from pyaquacrop.AquaCrop import AquaCrop
+from pyaquacrop.ForcingStore import PointForcingStore
+from pyaquacrop.Weather import ET0, Precipitation, Temperature
+
+
+def test_point_forcing_store_roundtrip(tmp_path):
+    xy = np.arange(1, 6)
+    time = pd.date_range("2010-01-01", periods=10, freq="D")
+    prec = np.random.default_rng(1).random((len(time), len(xy)))
+    store = PointForcingStore.create(str(tmp_path), ["PREC", "TMIN"], xy, time)
+    store.write("PREC", prec[:4], 0)
+    store.write("PREC", prec[4:], 4)
+    assert not store.is_compatible(xy, time)
+    store.close()
+
+    store = PointForcingStore.open(str(tmp_path))
+    assert store.variables == ("PREC", "TMIN")
+    assert store.is_compatible(xy, time)
+    assert not store.is_compatible(xy[:-1], time)
+    # A store of another dtype is not reused
+    assert not store.is_compatible(xy, time, np.float32)
+    da = store.dataarray("PREC")
+    assert da.dims == ("time", "xy")
+    np.testing.assert_array_equal(da.values, prec)
+    np.testing.assert_array_equal(da.sel(xy=3).values, prec[:, 2])
+
+
+def test_prepare_forcing_store(model_config):
+    # ET0 is read from file rather than computed
+    config = model_config(et0=None, extra='\n[FORCING_STORE]\npath = "store"\n')
+    result = CliRunner().invoke(cli.main, ["prepare", config])
+    assert result.exit_code == 0, result.output
+
+    model = AquaCrop(config)
+    assert model.forcing_store is not None
+    store = model.forcing_store
+    assert store._data[store.variables.index("ET0"), 0].flags["C_CONTIGUOUS"]
+
+    # The store is ignored once the model dtype has changed
+    with open(config, "a") as f:
+        f.write('\n[PRECISION]\ndtype = "float32"\n')
+    with pytest.warns(UserWarning):
+        assert AquaCrop(config).forcing_store is None
+
+    model.forcing_store = None
+    expected = {
+        "PREC": Precipitation(model)._data,
+        "TMIN": Temperature(model).tmin._data,
+        "ET0": ET0(model)._data,
+    }
+    for varname, values in expected.items():
+        np.testing.assert_array_equal(
+            store.dataarray(varname).values,
+            values.transpose("time", "xy").values
+        )
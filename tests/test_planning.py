@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+
+"""Tests for `pyaquacrop.Planning`."""
+
+import numpy as np
+
+from pyaquacrop.Planning import point_signatures, SimulationPlan, SimulationPlanBuilder
+
+
+def _forcing():
+    # Six points in three weather cells, with one cell split by soil
+    cell = np.array([0, 1, 0, 2, 1, 0])
+    series = np.random.default_rng(0).random((3, 10, 2))
+    return cell, series[cell]
+
+
+def test_point_signatures():
+    cell, forcing = _forcing()
+    signatures = point_signatures([forcing])
+    assert signatures.dtype == np.dtype('S16')
+    assert len(set(signatures)) == 3
+    assert signatures[0] == signatures[2] == signatures[5]
+
+    soil = np.array([1, 1, 2, 1, 1, 1])
+    signatures = point_signatures([forcing], point_keys=soil)
+    assert len(set(signatures)) == 4
+    assert signatures[0] == signatures[5] != signatures[2]
+
+    # Shared inputs and the value type are part of the signature
+    assert point_signatures([forcing], common=b'crop')[0] != point_signatures([forcing])[0]
+    assert point_signatures([forcing.astype(np.float32)])[0] != point_signatures([forcing])[0]
+
+
+def test_simulation_plan(tmp_path):
+    cell, forcing = _forcing()
+    xy = np.arange(10, 16)
+    plan = SimulationPlan.from_signatures(xy, point_signatures([forcing]))
+    assert plan.n_points == 6 and plan.n_units == 3
+    assert list(plan.unit) == [0, 1, 0, 2, 1, 0]
+    assert list(plan.representative_xy) == [10, 11, 13]
+    assert list(plan.members(0)) == [0, 2, 5]
+
+    results = forcing[plan.representative].sum(axis=(1, 2))
+    np.testing.assert_array_equal(plan.scatter(results), forcing.sum(axis=(1, 2)))
+
+    plan.save(tmp_path)
+    loaded = SimulationPlan.load(tmp_path)
+    np.testing.assert_array_equal(loaded.xy, plan.xy)
+    np.testing.assert_array_equal(loaded.unit, plan.unit)
+    np.testing.assert_array_equal(loaded.representative, plan.representative)
+
+
+def test_simulation_plan_builder():
+    # Building in blocks gives the same plan as all points at once
+    cell, forcing = _forcing()
+    xy = np.arange(6)
+    signatures = point_signatures([forcing])
+    builder = SimulationPlanBuilder()
+    assert list(builder.add(xy[:3], signatures[:3])) == [0, 1]
+    assert list(builder.add(xy[3:], signatures[3:])) == [0]
+    plan = builder.plan()
+    expected = SimulationPlan.from_signatures(xy, signatures)
+    np.testing.assert_array_equal(plan.unit, expected.unit)
+    np.testing.assert_array_equal(plan.representative, expected.representative)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+
+"""Tests for `pyaquacrop.regrid`."""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+import xarray
+
+from pyaquacrop.regrid import RegridWeights, bilinear_weights
+
+
+def _grid():
+    lat = np.arange(10.0, 0.0, -1.0)
+    lon = np.arange(-5.0, 5.0, 1.0)
+    time = pd.date_range("2010-01-01", periods=6)
+    values = np.random.default_rng(0).random((len(time), len(lat), len(lon)))
+    return xarray.DataArray(
+        values, dims=("time", "lat", "lon"),
+        coords={"time": time, "lat": lat, "lon": lon}
+    ).chunk({"time": 4})
+
+
+def test_bilinear_weights():
+    x = _grid()
+    px = np.array([-4.5, 0.25, 3.9, -5.0])
+    py = np.array([9.5, 5.75, 1.1, 10.0])
+    weights = RegridWeights.bilinear(x.lon.values, x.lat.values, px, py)
+    np.testing.assert_allclose(weights.matrix.sum(axis=1), 1.0)
+    regridded = weights.apply(x, "lat", "lon", np.arange(len(px)))
+    expected = x.interp(
+        lat=xarray.DataArray(py, dims="xy"), lon=xarray.DataArray(px, dims="xy")
+    )
+    assert regridded.dims == ("time", "xy")
+    np.testing.assert_allclose(regridded.values, expected.values)
+
+
+def test_bilinear_weights_outside():
+    x = _grid()
+    # Within the edge cells the edge values are used
+    px, py = np.array([-5.5, 4.5]), np.array([10.5, 0.5])
+    weights = RegridWeights.bilinear(x.lon.values, x.lat.values, px, py)
+    regridded = weights.apply(x, "lat", "lon", np.arange(len(px)))
+    np.testing.assert_allclose(regridded.values[:, 0], x.values[:, 0, 0])
+    np.testing.assert_allclose(regridded.values[:, 1], x.values[:, -1, -1])
+    for px, py in [([5.6], [5.0]), ([0.0], [-0.6]), ([180.0], [5.0])]:
+        with pytest.raises(ValueError):
+            RegridWeights.bilinear(x.lon.values, x.lat.values, np.array(px), np.array(py))
+
+
+def test_bilinear_weights_longitude():
+    # A global grid in 0 to 360 degrees, points in -180 to 180 degrees
+    lat = np.array([1.0, 0.0])
+    lon = np.arange(0.0, 360.0, 10.0)
+    values = np.random.default_rng(0).random((3, len(lat), len(lon)))
+    x = xarray.DataArray(values, dims=("time", "lat", "lon"), coords={"lat": lat, "lon": lon})
+    px, py = np.array([-5.0, -172.5, 20.0]), np.array([0.5, 0.0, 1.0])
+    weights = RegridWeights.bilinear(lon, lat, px, py, x_period=360.)
+    regridded = weights.apply(x, "lat", "lon", np.arange(len(px)))
+    expected = np.stack([
+        (values[:, 0, -1] + values[:, 0, 0] + values[:, 1, -1] + values[:, 1, 0]) / 4,
+        0.25 * values[:, 1, 18] + 0.75 * values[:, 1, 19],
+        values[:, 0, 2]
+    ], axis=-1)
+    np.testing.assert_allclose(regridded.values, expected)
+
+    # A regional grid across the antimeridian
+    lon = np.array([170.0, 180.0, -170.0, -160.0])
+    values = values[..., :len(lon)]
+    x = xarray.DataArray(values, dims=("time", "lat", "lon"), coords={"lat": lat, "lon": lon})
+    px, py = np.array([-175.0, 545.0]), np.array([1.0, 1.0])
+    weights = RegridWeights.bilinear(lon, lat, px, py, x_period=360.)
+    regridded = weights.apply(x, "lat", "lon", np.arange(len(px)))
+    np.testing.assert_allclose(regridded.values[:, 0], (values[:, 0, 1] + values[:, 0, 2]) / 2)
+    np.testing.assert_allclose(regridded.values[:, 1], regridded.values[:, 0])
+    with pytest.raises(ValueError):
+        RegridWeights.bilinear(lon, lat, np.array([0.0]), np.array([1.0]), x_period=360.)
+
+
+def test_bilinear_weights_missing():
+    x = _grid().load()
+    x[:, 0, 0] = np.nan
+    x[:2, 0, 1] = np.nan
+    px, py = np.array([-4.75, 0.25]), np.array([10.0, 5.75])
+    weights = RegridWeights.bilinear(x.lon.values, x.lat.values, px, py)
+    regridded = weights.apply(x, "lat", "lon", np.arange(len(px))).values
+    # Only finite cells are used, with their weights renormalised
+    assert np.all(np.isnan(regridded[:2, 0]))
+    np.testing.assert_allclose(regridded[2:, 0], x.values[2:, 0, 1])
+    expected = x.interp(lat=5.75, lon=0.25).values
+    np.testing.assert_allclose(regridded[:, 1], expected)
+
+
+def test_bilinear_weights_cache(tmp_path):
+    x = _grid()
+    px, py = np.array([0.5, 1.5]), np.array([3.5, 4.0])
+    weights = bilinear_weights(x.lon.values, x.lat.values, px, py, cache_dir=str(tmp_path))
+    filenames = os.listdir(tmp_path / "regrid_weights")
+    assert len(filenames) == 1
+    cached = bilinear_weights(x.lon.values, x.lat.values, px, py, cache_dir=str(tmp_path))
+    assert (cached.matrix != weights.matrix).nnz == 0
+    assert cached.y_window == weights.y_window
+    assert cached.x_window == weights.x_window
@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+
+"""Tests for `pyaquacrop.resample`."""
+
+import numpy as np
+import pandas as pd
+import xarray
+
+from pyaquacrop.resample import aggregate_daily
+
+
+def _hourly(start="2010-01-01 00:00", periods=24 * 10):
+    time = pd.date_range(start, periods=periods, freq="H")
+    values = np.random.default_rng(0).random((periods, 3))
+    return xarray.DataArray(
+        values, dims=("time", "xy"),
+        coords={"time": time, "xy": np.arange(3)}
+    ).chunk({"time": 50})
+
+
+def test_aggregate_daily():
+    x = _hourly()
+    for method, how in [("mean", "mean"), ("min", "min"), ("max", "max"), ("total", "sum")]:
+        daily = aggregate_daily(x, "hourly", method)
+        expected = getattr(x.resample(time="1D"), how)()
+        np.testing.assert_allclose(daily.values, expected.values)
+        assert (daily.indexes["time"] == expected.indexes["time"]).all()
+
+
+def test_aggregate_daily_partial_days():
+    # Incomplete first and last days are dropped
+    x = _hourly(start="2010-01-01 06:00", periods=24 * 5)
+    daily = aggregate_daily(x, "hourly", "total")
+    assert list(daily.indexes["time"]) == list(pd.date_range("2010-01-02", periods=4))
+    np.testing.assert_allclose(daily.values[0], x.values[18:42].sum(axis=0))
+
+    # Only days in the time range are read
+    daily = aggregate_daily(x, "hourly", "max", time_range=("2010-01-03", "2010-01-04"))
+    assert list(daily.indexes["time"]) == list(pd.date_range("2010-01-03", periods=2))
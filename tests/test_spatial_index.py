@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+
+"""Tests for `pyaquacrop.SpatialIndex`."""
+
+import numpy as np
+import xarray
+
+from pyaquacrop.Domain import Domain
+from pyaquacrop.SpatialIndex import EARTH_RADIUS, SpatialIndex
+
+
+def _haversine(lon1, lat1, lon2, lat2):
+    lon1, lat1, lon2, lat2 = map(np.radians, (lon1, lat1, lon2, lat2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(a))
+
+
+def _point_domain(x, y):
+    ds = xarray.Dataset(
+        data_vars=dict(mask=(["space"], np.ones(len(x), dtype=int))),
+        coords=dict(
+            space=(["space"], np.arange(len(x))),
+            x=(["space"], x),
+            y=(["space"], y)
+        )
+    )
+    return Domain(ds, True, "space")
+
+
+def test_spatial_index_query():
+    rng = np.random.default_rng(0)
+    lon, lat = rng.uniform(-180, 180, 500), rng.uniform(-90, 90, 500)
+    index = SpatialIndex(lon, lat, ("station",), (500,))
+    # Points near the poles and either side of the antimeridian
+    qlon = np.array([179.9, -179.9, 10.0, -45.0])
+    qlat = np.array([0.0, -30.0, 89.5, -89.9])
+    distance, found = index.query(qlon, qlat, k=3)
+    expected = _haversine(qlon[:, None], qlat[:, None], lon[None, :], lat[None, :])
+    np.testing.assert_array_equal(found["station"], np.argsort(expected, axis=1)[:, :3])
+    np.testing.assert_allclose(distance, np.sort(expected, axis=1)[:, :3], rtol=1e-6)
+
+
+def test_nearest_grid_index_point_input():
+    stations = xarray.Dataset(
+        coords=dict(
+            lon=(["station"], [179.8, -179.7, 0.0]),
+            lat=(["station"], [10.0, 10.0, 10.0])
+        )
+    )
+    domain = _point_domain([-179.9, 179.95, 1.0], [10.0, 10.0, 10.0])
+    index = domain.nearest_grid_index(stations)
+    np.testing.assert_array_equal(index["station"], [1, 0, 2])
+
+
+def test_nearest_grid_index_antimeridian():
+    grid = xarray.DataArray(
+        np.zeros((3, 1440)), dims=["lat", "lon"],
+        coords=dict(lat=[1.0, 0.0, -1.0], lon=np.arange(0.125, 360, 0.25))
+    )
+    domain = _point_domain([-0.05, 0.05, -179.9, 359.99], [0.0, 0.0, 0.0, 0.0])
+    index = domain.nearest_grid_index(grid)
+    np.testing.assert_array_equal(index["lon"], [1439, 0, 720, 1439])
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+
+"""Tests for `pyaquacrop.Staging`."""
+
+import os
+
+import numpy as np
+import pytest
+
+from pyaquacrop.AquaCrop import AquaCrop
+from pyaquacrop.Planning import SimulationPlan
+from pyaquacrop.Staging import InputStager, point_directory
+from pyaquacrop.Weather import Precipitation, SpaceTimeInput
+
+
+def _write_crop_file(filename):
+    with open(filename, "w") as f:
+        f.write("Crop file" + os.linesep)
+
+
+def _write_point_file(filename, xy):
+    with open(filename, "w") as f:
+        f.write(f"Point {xy}" + os.linesep)
+
+
+def _read_tree(directory):
+    files = {}
+    for root, _, filenames in os.walk(directory):
+        for filename in filenames:
+            path = os.path.join(root, filename)
+            with open(path, "rb") as f:
+                files[os.path.relpath(path, directory)] = f.read()
+    return files
+
+
+@pytest.mark.parametrize("is_2d", [False, True])
+def test_input_stager_workers(model_config, tmp_path, is_2d):
+    # 23 points in blocks of 5, the last of which is partial
+    model = AquaCrop(model_config(n_points=23, is_2d=is_2d))
+    trees = []
+    for n_workers in [1, 2]:
+        directory = str(tmp_path / f"staged_{n_workers}")
+        InputStager(model, directory, n_workers=n_workers, block_size=5).stage(
+            parameter_files={"crop.CRO": _write_crop_file},
+            point_files={"point.txt": _write_point_file}
+        )
+        trees.append(_read_tree(directory))
+    assert trees[0] == trees[1]
+    assert len(trees[0]) == 23 * 5 + 1
+    assert InputStager.STATE_FILENAME in trees[0]
+
+    xy = model.domain.xy[-1]
+    precipitation = Precipitation(model)
+    precipitation._select_point(xy)
+    filename = str(tmp_path / "climate.PLU")
+    precipitation._write_aquacrop_input(filename)
+    with open(filename, "rb") as f:
+        assert trees[0][os.path.join(str(xy), "climate.PLU")] == f.read()
+    assert trees[0][os.path.join(str(xy), "point.txt")] == f"Point {xy}{os.linesep}".encode()
+    assert os.path.isdir(point_directory(str(tmp_path / "staged_1"), xy))
+
+
+def _with_model_time(config, tmp_path, name, start_time="2010-01-01", end_time="2010-03-31"):
+    with open(config) as f:
+        text = f.read()
+    text = text.replace(
+        'start_time = "2010-01-01"\nend_time = "2010-03-31"',
+        f'start_time = "{start_time}"\nend_time = "{end_time}"'
+    )
+    filename = str(tmp_path / name)
+    with open(filename, "w") as f:
+        f.write(text)
+    return filename
+
+
+def test_input_stager_append(model_config, tmp_path, monkeypatch):
+    config = model_config(n_points=7)
+    directory = str(tmp_path / "staged")
+    reference = str(tmp_path / "reference")
+    model = AquaCrop(_with_model_time(config, tmp_path, "short.toml", end_time="2010-02-28"))
+    InputStager(model, directory, n_workers=1, block_size=3).stage()
+
+    # One file has lost its last record, another is missing
+    xy = AquaCrop(config).domain.xy
+    with open(os.path.join(directory, str(xy[1]), "climate.PLU"), "rb") as f:
+        lines = f.read().splitlines(keepends=True)
+    with open(os.path.join(directory, str(xy[1]), "climate.PLU"), "wb") as f:
+        f.write(b"".join(lines[:-1]))
+    os.remove(os.path.join(directory, str(xy[5]), "climate.TMP"))
+
+    loads = []
+    point_values = SpaceTimeInput._point_values
+
+    def record(self, index, time_start=0):
+        loads.append((index, time_start))
+        return point_values(self, index, time_start)
+    monkeypatch.setattr(SpaceTimeInput, "_point_values", record)
+
+    model = AquaCrop(config)
+    InputStager(model, directory, n_workers=1, block_size=3, append=True).stage()
+    # Only the last staged day and the new days are read, except for
+    # the points whose files are written in full
+    assert {time_start for index, time_start in loads if isinstance(index, slice)} == {58}
+    retried = [index for index, time_start in loads if not isinstance(index, slice)]
+    assert all(time_start == 0 for index, time_start in loads if not isinstance(index, slice))
+    assert sorted(set(i for index in retried for i in index)) == [1, 5]
+
+    monkeypatch.undo()
+    InputStager(model, reference, n_workers=1, block_size=3).stage()
+    assert _read_tree(directory) == _read_tree(reference)
+
+    # Files cannot be extended if the start of the period has changed
+    model = AquaCrop(_with_model_time(config, tmp_path, "late.toml", start_time="2010-01-02"))
+    with pytest.raises(ValueError):
+        InputStager(model, directory, n_workers=1, append=True).stage()
+
+
+def test_input_stager_deduplicate(model_config, tmp_path):
+    # Reference ET is read from file, so that points sharing a
+    # weather cell have identical inputs
+    model = AquaCrop(model_config(n_points=23, et0=None))
+    directory = str(tmp_path / "staged")
+    reference = str(tmp_path / "reference")
+    plan = InputStager(model, directory, n_workers=2, block_size=5, deduplicate=True).stage(
+        parameter_files={"crop.CRO": _write_crop_file}
+    )
+    InputStager(model, reference, n_workers=1, block_size=5).stage(
+        parameter_files={"crop.CRO": _write_crop_file}
+    )
+    # Points sharing a weather cell are simulated once
+    assert 0 < plan.n_units < plan.n_points
+    np.testing.assert_array_equal(plan.xy, model.domain.xy)
+
+    # Only the representative points are staged, with the files of
+    # every member point
+    tree = _read_tree(directory)
+    full = _read_tree(reference)
+    staged = {os.path.dirname(name) for name in tree if os.path.dirname(name)}
+    assert staged == {str(xy) for xy in plan.representative_xy}
+    for xy, unit in zip(plan.xy, plan.unit):
+        representative = plan.representative_xy[unit]
+        for basename in ["climate.PLU", "climate.TMP", "climate.ETo", "crop.CRO"]:
+            assert tree[os.path.join(str(representative), basename)] == \
+                full[os.path.join(str(xy), basename)]
+
+    loaded = SimulationPlan.load(directory)
+    np.testing.assert_array_equal(loaded.xy, plan.xy)
+    np.testing.assert_array_equal(loaded.unit, plan.unit)
+    np.testing.assert_array_equal(loaded.representative, plan.representative)
+
+    with pytest.raises(ValueError):
+        InputStager(model, directory, append=True, deduplicate=True)
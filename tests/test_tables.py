@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+
+"""Tests for `pyaquacrop.tables`."""
+
+import numpy as np
+import pandas as pd
+import pyarrow
+import pyarrow.feather
+import pyarrow.parquet
+import pytest
+
+from pyaquacrop.tables import open_point_table, table_format
+
+
+def _table(points, time, seed=0):
+    ids, dates = np.meshgrid(points, time, indexing="ij")
+    values = np.random.default_rng(seed).random(ids.size)
+    schema = pyarrow.schema([
+        pyarrow.field("station", pyarrow.int32()),
+        pyarrow.field("date", pyarrow.date32()),
+        pyarrow.field("tmin", pyarrow.float64(), metadata={"units": "K"})
+    ])
+    return pyarrow.Table.from_arrays(
+        [pyarrow.array(ids.ravel(), pyarrow.int32()),
+         pyarrow.array(dates.ravel().astype("datetime64[D]")),
+         pyarrow.array(values)],
+        schema=schema
+    )
+
+
+def test_table_format():
+    assert table_format(["a.parquet", "b.pq"]) == "parquet"
+    assert table_format("a.feather") == "ipc"
+    assert table_format(["a.parquet", "b.nc"]) is None
+    assert table_format([]) is None
+
+
+def test_open_point_table(tmp_path):
+    time = pd.date_range("2010-01-01", periods=20)
+    table = _table(np.arange(10), time)
+    filenames = [str(tmp_path / "a.parquet"), str(tmp_path / "b.parquet")]
+    pyarrow.parquet.write_table(table.slice(0, 100), filenames[0], row_group_size=30)
+    pyarrow.parquet.write_table(table.slice(100), filenames[1], row_group_size=30)
+
+    # Point 42 is not in the tables
+    points = np.array([7, 2, 42])
+    model_time = time[5:15]
+    x = open_point_table(filenames, "tmin", "station", "date", points, model_time)
+    assert x.dims == ("time", "xy")
+    assert x.attrs["units"] == "K"
+    expected = table.to_pandas().set_index(["date", "station"])["tmin"]
+    for i, t in enumerate(model_time):
+        for j, p in enumerate(points[:2]):
+            assert x.values[i, j] == expected[(t.date(), p)]
+    assert np.all(np.isnan(x.values[:, 2]))
+
+    filename = str(tmp_path / "a.feather")
+    pyarrow.feather.write_feather(table, filename)
+    y = open_point_table(filename, "tmin", "station", "date", points, model_time, dtype=np.float32)
+    assert y.dtype == np.float32
+    np.testing.assert_allclose(y.values, x.values.astype(np.float32))
+
+
+def test_open_point_table_view(tmp_path):
+    # Complete tables in either row order are viewed, not copied
+    time = pd.date_range("2010-01-01", periods=20)
+    points = np.arange(10)
+    table = _table(points, time)
+    expected = table.to_pandas().pivot(index="date", columns="station", values="tmin").values
+    for name, order in [("point", ["station", "date"]), ("time", ["date", "station"])]:
+        filename = str(tmp_path / f"{name}.parquet")
+        pyarrow.parquet.write_table(table.sort_by([(c, "ascending") for c in order]), filename)
+        x = open_point_table(filename, "tmin", "station", "date", points, time)
+        assert not x.values.flags.writeable
+        np.testing.assert_array_equal(x.values, expected)
+
+
+def test_open_point_table_subdaily(tmp_path):
+    time = pd.date_range("2010-01-01", periods=4 * 8, freq="3H")
+    ids, dates = np.meshgrid(np.arange(3), time, indexing="ij")
+    table = pyarrow.table({
+        "station": pyarrow.array(ids.ravel(), pyarrow.int32()),
+        "date": pyarrow.array(dates.ravel().astype("datetime64[s]")),
+        "tmin": pyarrow.array(np.random.default_rng(0).random(ids.size))
+    })
+    filename = str(tmp_path / "a.parquet")
+    pyarrow.parquet.write_table(table, filename)
+    model_time = pd.date_range("2010-01-02", periods=2)
+    x = open_point_table(
+        filename, "tmin", "station", "date", np.arange(3), model_time, interval="three_hourly"
+    )
+    assert x.shape == (16, 3)
+    expected = table.to_pandas().pivot(index="date", columns="station", values="tmin")
+    np.testing.assert_array_equal(x.values, expected.values[8:24])
+    with pytest.raises(ValueError):
+        open_point_table(filename, "tmin", "station", "date", np.arange(3), model_time)
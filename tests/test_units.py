@@ -0,0 +1,34 @@
+#!/usr/bin/env python
+
+"""Tests for `pyaquacrop.units`."""
+
+import numpy as np
+import pytest
+from metpy.units import units
+from pint.errors import DimensionalityError
+
+from pyaquacrop.units import linear_conversion, register_conversion
+
+
+@pytest.mark.parametrize("source,target", [
+    ("K", "degree_Celsius"),
+    ("J m**-2", "MJ m**-2"),
+    ("Pa", "kilopascal"),
+    ("m s-1", "m s**-1"),
+    ("degF", "degree_Celsius"),
+])
+def test_linear_conversion(source, target):
+    values = np.linspace(-50., 400., 11)
+    factor, offset = linear_conversion(source, target)
+    expected = units.Quantity(values, source).to(target).magnitude
+    np.testing.assert_allclose(values * factor + offset, expected, rtol=1e-12, atol=1e-12)
+
+
+def test_linear_conversion_incompatible():
+    with pytest.raises(DimensionalityError):
+        linear_conversion("Pa", "degree_Celsius")
+
+
+def test_register_conversion():
+    register_conversion("tenths of mm", "mm", 0.1)
+    assert linear_conversion("tenths of mm", "mm") == (0.1, 0.)
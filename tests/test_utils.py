@@ -0,0 +1,21 @@
+#!/usr/bin/env python
+
+"""Tests for `pyaquacrop.utils`."""
+
+import io
+
+import numpy as np
+
+from pyaquacrop.utils import format_fixed_point
+
+
+def test_format_fixed_point_matches_savetxt():
+    rng = np.random.default_rng(42)
+    values = rng.normal(0, 100, size=(4, 30, 2))
+    values[0, :6, 0] = [-0.001, -0.0, 0.125, 2.675, 1.005, 999.995]
+    records = format_fixed_point(values, delimiter="\t", newline="\n")
+    assert len(records) == 4
+    for i in range(4):
+        f = io.StringIO()
+        np.savetxt(f, values[i], fmt="%.2f", delimiter="\t", newline="\n")
+        assert records[i] == f.getvalue().encode()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+
+"""Tests for `pyaquacrop.VariableGraph`."""
+
+import pytest
+
+from pyaquacrop.VariableGraph import VariableGraph
+
+
+def _graph(loaded, has_u=True, has_speed=True):
+    def loader(name):
+        def load(scale):
+            loaded.append(name)
+            return scale
+        return load
+    graph = VariableGraph()
+    graph.add_source('u', loader('u'), available=has_u)
+    graph.add_source('v', loader('v'), available=lambda: has_u)
+    graph.add_source('speed', loader('speed'), available=has_speed)
+    graph.add_derived('wind', ['u', 'v'], lambda u, v: (u ** 2 + v ** 2) ** 0.5)
+    graph.add_derived('wind', ['speed'], lambda speed: speed)
+    graph.add_derived('double_wind', ['wind'], lambda wind: 2 * wind)
+    return graph
+
+
+def test_variable_graph_routes():
+    loaded = []
+    graph = _graph(loaded, has_speed=False)
+    assert graph.sources(['wind']) == ['u', 'v']
+    assert graph.compute(['wind', 'double_wind'], 2.) == {'wind': 8. ** 0.5, 'double_wind': 2 * 8. ** 0.5}
+    assert loaded == ['u', 'v']
+
+    loaded.clear()
+    graph = _graph(loaded, has_u=False)
+    assert graph.compute(['double_wind'], 3.) == {'double_wind': 6.}
+    assert loaded == ['speed']
+
+
+def test_variable_graph_cost():
+    # The route reading fewer sources is used, whatever the order in
+    # which the routes were declared
+    graph = _graph([])
+    assert graph.sources(['wind']) == ['speed']
+    # Sources which are read anyway are free
+    assert graph.sources(['u', 'v', 'wind']) == ['u', 'v']
+    # Unless the cheaper route is made more expensive
+    graph.add_source('gust', lambda scale: scale)
+    graph.add_derived('peak', ['gust'], lambda gust: gust, cost=2)
+    graph.add_derived('peak', ['u', 'v'], lambda u, v: u + v)
+    assert graph.sources(['peak']) == ['u', 'v']
+
+
+def test_variable_graph_unavailable():
+    graph = _graph([], has_u=False, has_speed=False)
+    assert not graph.is_available('wind')
+    with pytest.raises(KeyError):
+        graph.compute(['double_wind'], 1.)
@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+
+"""Tests for `pyaquacrop.Weather`."""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+import xarray
+
+from pyaquacrop.AquaCrop import AquaCrop
+from pyaquacrop.Cache import InputFileCache
+from pyaquacrop.Weather import (ET0,
+                                Precipitation,
+                                SpaceTimeInput,
+                                Temperature,
+                                open_spacetimeinput,
+                                _ET0_InputData,
+                                _ET0_Method,
+                                _climate_file_header,
+                                _extend_climate_files,
+                                _write_climate_files,
+                                write_climate_files)
+
+
+def test_write_climate_files_append(tmp_path):
+    header = _climate_file_header(pd.Timestamp("2010-01-01"), "  Total Rain (mm)")
+    values = np.random.default_rng(0).random((40, 2))
+    filenames = [str(tmp_path / "a.PLU"), str(tmp_path / "b.PLU")]
+    expected = [str(tmp_path / "c.PLU"), str(tmp_path / "d.PLU")]
+    write_climate_files(values, expected, header)
+
+    write_climate_files(values[:30], filenames, header)
+    inode = os.stat(filenames[0]).st_ino
+    write_climate_files(values, filenames, header, append=True)
+    assert os.stat(filenames[0]).st_ino == inode
+    for filename, reference in zip(filenames, expected):
+        with open(filename) as f, open(reference) as g:
+            assert f.read() == g.read()
+
+    # A file with a different start date is rewritten
+    other = _climate_file_header(pd.Timestamp("2010-01-02"), "  Total Rain (mm)")
+    write_climate_files(values[1:], filenames, other, append=True)
+    with open(filenames[0]) as f:
+        assert f.read().startswith(other)
+
+
+def test_extend_climate_files(tmp_path):
+    header = _climate_file_header(pd.Timestamp("2010-01-01"), "  Average ETo (mm/day)")
+    values = np.random.default_rng(1).random((3, 40))
+    filenames = [str(tmp_path / f"{i}.ETo") for i in range(3)]
+    expected = [str(tmp_path / f"{i}_full.ETo") for i in range(3)]
+    _write_climate_files(expected, values, header)
+    _write_climate_files(filenames, values[:, :15], header)
+    _extend_climate_files(filenames, values[:, 15:])
+    for filename, reference in zip(filenames, expected):
+        with open(filename) as f, open(reference) as g:
+            assert f.read() == g.read()
+
+
+@pytest.mark.parametrize("is_2d", [False, True])
+def test_iter_point_blocks(model_config, monkeypatch, is_2d):
+    # Points are selected from the source grid in blocks of 5
+    monkeypatch.setattr(SpaceTimeInput, "POINT_BLOCK_SIZE", 5)
+    model = AquaCrop(model_config(n_points=23, is_2d=is_2d))
+    tmin = open_spacetimeinput(model, "TMIN")
+    assert tmin._data.chunks[tmin._data.dims.index("xy")] == (5, 5, 5, 5, 3)
+
+    source = xarray.open_mfdataset(model.config.TMIN.filename)["tmin"]
+    index = model.domain.nearest_grid_index(source)
+    expected = source.isel(
+        {dim: xarray.DataArray(i, dims="xy") for dim, i in index.items()}
+    ).transpose("xy", "time").values
+
+    for block_size in [1, 4, 5, 23, 50]:
+        blocks = list(tmin.iter_point_blocks(block_size))
+        sizes = [len(xy) for xy, _ in blocks]
+        assert sizes[:-1] == [block_size] * (len(blocks) - 1)
+        assert sum(sizes) == 23 and 0 < sizes[-1] <= block_size
+        np.testing.assert_array_equal(np.concatenate([xy for xy, _ in blocks]), model.domain.xy)
+        np.testing.assert_array_equal(np.concatenate([b for _, b in blocks]), expected)
+
+    points = list(tmin.iter_points(4))
+    assert [xy for xy, _ in points] == list(model.domain.xy)
+    np.testing.assert_array_equal(points[-1][1], expected[-1])
+    tmin._select_point(model.domain.xy[-1])
+    np.testing.assert_array_equal(tmin.values, expected[-1])
+
+
+@pytest.mark.parametrize("is_2d", [False, True])
+def test_select_point_blocks(model_config, monkeypatch, is_2d):
+    # Selecting points outside the loaded block loads another block
+    monkeypatch.setattr(SpaceTimeInput, "POINT_BLOCK_SIZE", 5)
+    model = AquaCrop(model_config(n_points=23, is_2d=is_2d))
+    tmin = open_spacetimeinput(model, "TMIN")
+    temperature = Temperature(model)
+    assert tmin.values is None
+    for i in [0, 4, 6, 22, 3, 11]:
+        tmin._select_point(model.domain.xy[i])
+        np.testing.assert_array_equal(tmin.values, tmin._data.isel(xy=i).values)
+        temperature._select_point(model.domain.xy[i])
+        np.testing.assert_array_equal(temperature.values, np.column_stack(
+            (temperature.tmin._data.isel(xy=i).values, temperature.tmax._data.isel(xy=i).values)
+        ))
+    np.testing.assert_array_equal(
+        temperature._point_values([22, 6], time_start=10),
+        np.stack((temperature.tmin._data.isel(xy=[22, 6], time=slice(10, None)).values.T,
+                  temperature.tmax._data.isel(xy=[22, 6], time=slice(10, None)).values.T), axis=-1)
+    )
+
+
+def test_write_aquacrop_inputs(model_config, tmp_path):
+    model = AquaCrop(model_config(n_points=7))
+    for obj in [Precipitation(model), Temperature(model), ET0(model)]:
+        filenames = [str(tmp_path / f"{xy}.txt") for xy in model.domain.xy]
+        obj._write_aquacrop_inputs(filenames, block_size=3)
+        for xy, filename in zip(model.domain.xy, filenames):
+            obj._select_point(xy)
+            obj._write_aquacrop_input(str(tmp_path / "single.txt"))
+            with open(filename) as f, open(str(tmp_path / "single.txt")) as g:
+                assert f.read() == g.read()
+
+
+def test_write_climate_files_append_cached(tmp_path):
+    # Files taken from the cache are rewritten rather than extended,
+    # even once the cache entry has been evicted
+    header = _climate_file_header(pd.Timestamp("2010-01-01"), "  Total Rain (mm)")
+    values = np.random.default_rng(2).random((40, 1))
+    cache = InputFileCache(str(tmp_path / "cache"), max_size=0)
+    filename = str(tmp_path / "a.PLU")
+    write_climate_files(values[:30], [filename], header, cache=cache)
+    cache.evict()
+    assert os.stat(filename).st_nlink == 1
+    inode = os.stat(filename).st_ino
+    write_climate_files(values, [filename], header, append=True)
+    assert os.stat(filename).st_ino != inode
+    reference = str(tmp_path / "b.PLU")
+    write_climate_files(values, [reference], header)
+    with open(filename) as f, open(reference) as g:
+        assert f.read() == g.read()
+
+
+def test_et0_stream(model_config, tmp_path, monkeypatch):
+    # Streamed reference ET is written from blocks of time, including
+    # by the point-major writers, without computing the whole period
+    # in memory
+    model = AquaCrop(model_config(n_points=7, extra='\n[CACHE]\npath = "cache"\n'))
+    expected = ET0(model)._data.transpose("xy", "time").values
+    model.config.ET0.stream = True
+    model.config.ET0.time_block_size = 10
+
+    def compute(self):
+        raise AssertionError("reference ET computed for the whole period")
+    monkeypatch.setattr(_ET0_Method, "compute", compute)
+    filenames = [str(tmp_path / f"{xy}.ETo") for xy in model.domain.xy]
+    cache = InputFileCache(str(tmp_path / "files"))
+    eto = ET0(model)
+    eto._write_aquacrop_inputs(filenames, block_size=3, cache=cache)
+    np.testing.assert_allclose(eto._data.values, expected, rtol=1e-12)
+    for xy, filename in zip(model.domain.xy, filenames):
+        eto._select_point(xy)
+        eto._write_aquacrop_input(str(tmp_path / "single.ETo"))
+        with open(filename) as f, open(str(tmp_path / "single.ETo")) as g:
+            assert f.read() == g.read()
+    with pytest.raises(TypeError):
+        _ET0_Method(model)
+
+
+def test_et0_humidity_route(model_config):
+    # Actual vapour pressure follows the FAO-56 order of preference
+    model = AquaCrop(model_config(n_points=3))
+    data = _ET0_InputData(model)
+    data.initial()
+    cases = [
+        (("TDEW", "RHMAX", "RHMIN", "RHMEAN"), ["dewpoint_temperature"]),
+        (("RHMAX", "RHMIN", "RHMEAN"), ["max_relative_humidity", "min_relative_humidity"]),
+        (("RHMAX", "RHMEAN"), ["max_relative_humidity"]),
+        (("RHMEAN",), ["mean_relative_humidity"]),
+    ]
+    for sections, sources in cases:
+        for section in ("TDEW", "RHMAX", "RHMIN", "RHMEAN"):
+            vars(model.config)[section].use = section in sections
+        assert data.graph.sources(["humidity"]) == sources
+
+
+def test_et0_point_table(model_config, tmp_path):
+    # Reference ET read from a point table rather than computed
+    model = AquaCrop(model_config(n_points=5, et0=None, point_tables=True))
+    eto = ET0(model)
+    table = pd.read_parquet(str(tmp_path / "tables" / "et0.parquet"))
+    expected = table.pivot(index="time", columns="xy", values="value")
+    assert eto._data.dims == ("time", "xy")
+    np.testing.assert_array_equal(eto._data.values, expected.loc[:, model.domain.xy].values)
+    eto._select_point(model.domain.xy[2])
+    np.testing.assert_array_equal(eto.values, expected[model.domain.xy[2]].values)
+
+
+def test_et0_derived_inputs(model_config, tmp_path, monkeypatch):
+    # Wind speed and surface pressure derived from other inputs are
+    # only evaluated at the model points, with the values of the
+    # derivation on the full source grid
+    lat = np.arange(5.125, 8, 0.25)[::-1]
+    lon = np.arange(-3.125, -1, 0.25)
+    elevation = np.random.default_rng(3).uniform(0, 2000, (len(lat), len(lon)))
+    xarray.DataArray(
+        elevation, dims=("lat", "lon"), coords={"lat": lat, "lon": lon},
+        name="elev", attrs={"units": "m"}
+    ).to_netcdf(str(tmp_path / "elev.nc"))
+    model = AquaCrop(model_config(n_points=7, extra=(
+        '\n[ELEV]\nuse = true\nfilename = "elev.nc"\nvarname = "elev"\nis_1d = false\n'
+    )))
+    model.config.SP.use = False
+    data = _ET0_InputData(model)
+    data.initial()
+    assert data.graph.sources(["wind", "surface_pressure"]) == ["wind_u", "wind_v", "elevation"]
+
+    shapes = []
+    open_input = _ET0_InputData._open
+
+    def record(self, section, units=None):
+        x = open_input(self, section, units)
+        shapes.append((section, x.sizes["xy"]))
+        return x
+    monkeypatch.setattr(_ET0_InputData, "_open", record)
+    n_time = len(model.time.values)
+    values = data.graph.compute(["wind", "surface_pressure"], 0, n_time)
+    assert {"WIND_U", "WIND_V", "ELEV"} <= {section for section, _ in shapes}
+    assert all(n == 7 for _, n in shapes)
+    assert values["wind"].shape == (n_time, 7)
+    assert values["surface_pressure"].shape == (7,)
+
+    def full_grid(section):
+        return xarray.open_mfdataset(vars(model.config)[section].filename)[
+            vars(model.config)[section].varname
+        ]
+    u, v, elev = full_grid("WIND_U"), full_grid("WIND_V"), full_grid("ELEV")
+    index = {
+        dim: xarray.DataArray(i, dims="xy")
+        for dim, i in model.domain.nearest_grid_index(u).items()
+    }
+    wind = np.sqrt(u ** 2 + v ** 2).isel(index).transpose("time", "xy").values
+    pressure = (101.3 * ((293. - 0.0065 * elev) / 293) ** 5.26).isel(index).values
+    np.testing.assert_allclose(values["wind"], wind, rtol=1e-6)
+    np.testing.assert_allclose(values["surface_pressure"], pressure, rtol=1e-6)